@@ -0,0 +1,145 @@
+"""
+Diffusion aux groupes : RedisChannelLayer contre HybridChannelLayer.
+
+    python -m benchmarks.channel_layer [--rooms 20] [--players 6] [--messages 50]
+                                       [--processes 1 2] [--redis HOST:PORT]
+
+Chaque room est un groupe de joueurs qui écoutent leur channel comme un
+consumer ; chaque room diffuse `--messages` trames, chacune une fois la
+précédente reçue par tous ses joueurs (comme les événements d'un round). Avec
+`--processes 2`, les joueurs de chaque room sont répartis entre deux instances
+du layer (deux processus daphne) : seule la moitié des membres est locale.
+
+Sans `--redis`, un serveur Redis de substitution (fakeredis, installé avec
+requirements.txt) est lancé dans le processus et écoute en TCP sur 127.0.0.1 : les
+allers-retours passent par une vraie socket, mais chaque commande y coûte plus
+cher qu'avec Redis.
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+
+from channels_redis.core import RedisChannelLayer
+
+from game.channel_layer import HybridChannelLayer
+
+LAYERS = {"redis": RedisChannelLayer, "hybrid": HybridChannelLayer}
+
+
+def percentile(values, p):
+    """Percentile par rang le plus proche (values triées)"""
+    rank = max(1, -(-len(values) * p // 100))
+    return values[int(rank) - 1]
+
+
+def start_stand_in():
+    """Redis de substitution (fakeredis) en TCP ; retourne (hôte, port)"""
+    try:
+        from fakeredis import TcpFakeServer
+    except ImportError:
+        raise SystemExit(
+            "fakeredis est nécessaire sans --redis : pip install -r requirements.txt"
+        )
+    server = TcpFakeServer(("127.0.0.1", 0), server_type="redis")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.server_address
+
+
+async def join_room(layers, group, players):
+    """Joueur i sur le processus i % len(layers)"""
+    members = []
+    for i in range(players):
+        layer = layers[i % len(layers)]
+        channel = await layer.new_channel()
+        await layer.group_add(group, channel)
+        members.append((layer, channel))
+    return members
+
+
+async def play_room(layers, group, members, messages, latencies):
+    received = asyncio.Queue()
+
+    async def listen(layer, channel):
+        for _ in range(messages):
+            message = await layer.receive(channel)
+            latencies.append(time.perf_counter() - message["sent"])
+            received.put_nowait(message["seq"])
+
+    listeners = [
+        asyncio.ensure_future(listen(layer, channel)) for layer, channel in members
+    ]
+    await asyncio.sleep(0)  # Les joueurs écoutent, comme un consumer connecté
+    for seq in range(messages):
+        await layers[0].group_send(
+            group, {"type": "broadcast", "seq": seq, "sent": time.perf_counter()}
+        )
+        # Trame suivante une fois celle-ci reçue par toute la room
+        for _ in members:
+            await asyncio.wait_for(received.get(), timeout=30)
+    await asyncio.gather(*listeners)
+
+
+async def measure(layer_class, host, processes, args):
+    layers = [
+        layer_class(hosts=[host], prefix=f"bench-{layer_class.__name__}")
+        for _ in range(processes)
+    ]
+    groups = [f"room{room}" for room in range(args.rooms)]
+    rooms = [await join_room(layers, group, args.players) for group in groups]
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            play_room(layers, group, members, args.messages, latencies)
+            for group, members in zip(groups, rooms)
+        )
+    )
+    elapsed = time.perf_counter() - start
+    await layers[0].flush()
+    for layer in layers[1:]:
+        await layer.close_pools()
+    latencies.sort()
+    return elapsed, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rooms", type=int, default=20)
+    parser.add_argument("--players", type=int, default=6)
+    parser.add_argument("--messages", type=int, default=50)
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2])
+    parser.add_argument("--redis", help="HOST:PORT d'un vrai serveur Redis")
+    args = parser.parse_args()
+
+    if args.redis:
+        hostname, port = args.redis.rsplit(":", 1)
+        host = (hostname, int(port))
+    else:
+        host = start_stand_in()
+
+    sends = args.rooms * args.messages
+    print(
+        f"{args.rooms} rooms x {args.players} joueurs, {args.messages} diffusions "
+        f"par room ({sends} group_send, {sends * args.players} réceptions)"
+    )
+    print(
+        f"{'processus':>9} {'layer':>7} {'durée (s)':>10} {'group_send/s':>13} "
+        f"{'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9}"
+    )
+    for processes in args.processes:
+        for name, layer_class in LAYERS.items():
+            elapsed, latencies = asyncio.run(
+                measure(layer_class, host, processes, args)
+            )
+            print(
+                f"{processes:>9} {name:>7} {elapsed:>10.2f} {sends / elapsed:>13.0f} "
+                + " ".join(
+                    f"{percentile(latencies, p) * 1000:>9.1f}" for p in (50, 95, 99)
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Latence par message des accès base sous concurrence, selon la façon d'appeler l'ORM :
+`database_sync_to_async` (thread unique), ORM async natif de Django (aget/aupdate)
+et exécuteur borné par room (game.db_executor).
+
+    python -m benchmarks.db_access [--rooms 50] [--messages 20] [--query-ms 2] [--slow-ms 0]
+
+Chaque message fait une lecture (joueur et sa room, select_related) et une mise à
+jour de score. Une fonction SQLite `sleep_ms` simule la latence réseau d'une vraie
+base ; `--slow-ms` rend lentes les requêtes de la première room uniquement.
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.test_settings")
+django.setup()
+
+from channels.db import database_sync_to_async  # noqa: E402
+from django.db import connection, connections  # noqa: E402
+from django.db.backends.signals import connection_created  # noqa: E402
+from django.db.models import F, Func, IntegerField, Value  # noqa: E402
+
+from benchmarks.load import percentile  # noqa: E402
+from game.db_executor import DatabaseExecutor  # noqa: E402
+from game.models import GameRoom, Player  # noqa: E402
+
+
+def sleep_ms(ms, value):
+    time.sleep(ms / 1000)
+    return value
+
+
+def install_sleep(sender, connection, **kwargs):
+    connection.connection.create_function("sleep_ms", 2, sleep_ms)
+    connection.cursor().execute("PRAGMA journal_mode=WAL")
+
+
+def delay(ms, value):
+    return Func(Value(ms), value, function="sleep_ms", output_field=IntegerField())
+
+
+def read_player(session_id, ms):
+    return (
+        Player.objects.select_related("room")
+        .annotate(delayed=delay(ms, F("id")))
+        .get(session_id=session_id)
+    )
+
+
+def add_point(player_id, ms):
+    Player.objects.filter(id=player_id).update(score=delay(ms, F("score") + 1))
+
+
+def sync_message(session_id, ms):
+    player = read_player(session_id, ms)
+    add_point(player.id, ms)
+
+
+async def run_sync_to_async(room, session_id, ms, executor):
+    await database_sync_to_async(sync_message)(session_id, ms)
+
+
+async def run_async_orm(room, session_id, ms, executor):
+    player = (
+        await Player.objects.select_related("room")
+        .annotate(delayed=delay(ms, F("id")))
+        .aget(session_id=session_id)
+    )
+    await Player.objects.filter(id=player.id).aupdate(score=delay(ms, F("score") + 1))
+
+
+async def run_executor(room, session_id, ms, executor):
+    await executor.run(room, sync_message, session_id, ms)
+
+
+STRATEGIES = {
+    "database_sync_to_async": run_sync_to_async,
+    "ORM async": run_async_orm,
+    "exécuteur": run_executor,
+}
+
+
+async def measure(strategy, sessions, args):
+    executor = DatabaseExecutor(max_workers=args.workers)
+    latencies = []
+
+    async def room_loop(index, room, session_id):
+        ms = args.slow_ms if index == 0 and args.slow_ms else args.query_ms
+        for _ in range(args.messages):
+            start = time.perf_counter()
+            await strategy(room, session_id, ms, executor)
+            if index or not args.slow_ms:
+                latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(room_loop(i, room, session) for i, (room, session) in enumerate(sessions))
+    )
+    elapsed = time.perf_counter() - start
+    executor.shutdown()
+    return elapsed, sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rooms", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--query-ms", type=float, default=2)
+    parser.add_argument("--slow-ms", type=float, default=0)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    test_db = os.path.join(tempfile.mkdtemp(), "db_access.sqlite3")
+    settings_dict = connection.settings_dict
+    settings_dict["TEST"]["NAME"] = test_db
+    settings_dict.setdefault("OPTIONS", {})["timeout"] = 60
+    connection.creation.create_test_db(verbosity=0)
+    connection_created.connect(install_sleep)
+    try:
+        sessions = []
+        for i in range(args.rooms):
+            room = GameRoom.objects.create(code=f"B{i:05d}")
+            player = Player.objects.create(
+                room=room, pseudo="joueur", session_id=uuid.uuid4()
+            )
+            sessions.append((room.code, player.session_id))
+        connections.close_all()
+
+        print(
+            f"{args.rooms} rooms x {args.messages} messages, {args.query_ms} ms par requête"
+            + (f", room lente à {args.slow_ms} ms" if args.slow_ms else "")
+            + f", exécuteur à {args.workers} threads"
+        )
+        print(
+            f"{'stratégie':<24} {'msg/s':>7} {'p50 (ms)':>9} {'p95 (ms)':>9} "
+            f"{'p99 (ms)':>9}"
+        )
+        for name, strategy in STRATEGIES.items():
+            elapsed, latencies = asyncio.run(measure(strategy, sessions, args))
+            print(
+                f"{name:<24} {args.rooms * args.messages / elapsed:>7.0f} "
+                + " ".join(
+                    f"{percentile(latencies, p) * 1000:>9.1f}" for p in (50, 95, 99)
+                )
+            )
+    finally:
+        connection_created.disconnect(install_sleep)
+        connections.close_all()
+        connection.creation.destroy_test_db(test_db, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Bande passante des tentatives d'un round : guess_made avec la liste complète
+allGuesses (avant) contre la seule nouvelle tentative et sa position (après).
+
+    python -m benchmarks.guess_bandwidth [--players 20] [--clues 10]
+
+Après chaque indice, chaque devineur fait une tentative ; chaque guess_made est
+diffusé aux sockets de tous les joueurs de la room. Les trames sont encodées
+avec les deux codecs (JSON et msgpack), numéro de séquence du journal compris.
+La dernière ligne donne la taille d'un round_snapshot en fin de round, coût
+d'une resynchronisation pour un client qui a perdu des trames.
+"""
+
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from game.protocol import JsonCodec, MsgpackCodec
+
+CODECS = {"json": JsonCodec, "msgpack": MsgpackCodec}
+
+
+def play_round(players, clues):
+    """Trames guess_made (avant, après) de chaque tentative, et le snapshot final"""
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    guesses, frames = [], []
+    seq = 0
+    for clue in range(clues):
+        seq += 1  # clue_given
+        for player in range(1, players):
+            seq += 1
+            guess = {
+                "playerId": str(player),
+                "word": f"essai{clue}-{player}",
+                "timestamp": (start + timedelta(seconds=seq)).isoformat(),
+            }
+            guesses.append(guess)
+            common = {
+                "type": "guess_made",
+                "playerId": guess["playerId"],
+                "guess": guess["word"],
+                "timestamp": guess["timestamp"],
+                "seq": seq,
+            }
+            frames.append(
+                (
+                    {**common, "allGuesses": list(guesses)},
+                    {**common, "guessIndex": len(guesses) - 1},
+                )
+            )
+    snapshot = {
+        "type": "round_snapshot",
+        "epoch": "0123abcd",
+        "seq": seq,
+        "roundId": 1,
+        "phase": "guess",
+        "clues": [f"indice{clue}" for clue in range(clues)],
+        "guesses": [[g["playerId"], g["word"], g["timestamp"]] for g in guesses],
+        "guessingPlayers": [str(player) for player in range(1, players)],
+        "isCompleted": False,
+    }
+    return frames, snapshot
+
+
+def size(codec, frame):
+    data = codec.encode(frame)
+    return len(data.encode() if isinstance(data, str) else data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--players", type=int, default=20)
+    parser.add_argument("--clues", type=int, default=10)
+    args = parser.parse_args()
+
+    frames, snapshot = play_round(args.players, args.clues)
+    print(
+        f"{args.players} joueurs, {args.clues} indices : {len(frames)} tentatives, "
+        f"{len(frames) * args.players} trames guess_made envoyées"
+    )
+    print(
+        f"{'codec':>8} {'avant (o)':>11} {'après (o)':>11} "
+        f"{'max avant':>10} {'max après':>10} {'facteur':>8}"
+    )
+    for name, codec in CODECS.items():
+        before = [size(codec, legacy) for legacy, _ in frames]
+        after = [size(codec, incremental) for _, incremental in frames]
+        # Chaque trame part vers chacune des sockets de la room
+        total_before = sum(before) * args.players
+        total_after = sum(after) * args.players
+        print(
+            f"{name:>8} {total_before:>11} {total_after:>11} "
+            f"{max(before):>10} {max(after):>10} {total_before / total_after:>7.1f}x"
+        )
+    print(
+        "round_snapshot en fin de round : "
+        + ", ".join(
+            f"{name} {size(codec, snapshot)} o" for name, codec in CODECS.items()
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
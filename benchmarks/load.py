@@ -0,0 +1,356 @@
+"""
+Charge synthétique : M rooms de N joueurs simulés jouent des parties complètes
+dans le processus (API REST + GameConsumer, channel layer en mémoire, SQLite).
+
+    python -m benchmarks.load [--rooms 50] [--players 6] [--total-rounds 1] [--protocol json]
+                              [--spectators 0]
+
+Affiche le débit et les latences p50/p95/p99 par type de message, mesurées du
+message envoyé par le client à la trame qui y répond. Avec --spectators, chaque
+room est en plus suivie par autant de spectateurs (ws/game/<code>/spectate/),
+pour vérifier que les latences des joueurs n'en dépendent pas.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import itertools
+import os
+import random
+import time
+from collections import defaultdict
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.test_settings")
+django.setup()
+
+from asgiref.sync import sync_to_async  # noqa: E402
+from channels.routing import URLRouter  # noqa: E402
+from channels.testing import WebsocketCommunicator  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+
+from game.db_executor import get_db_executor  # noqa: E402
+from game.protocol import JsonCodec, MsgpackCodec  # noqa: E402
+from game.routing import websocket_urlpatterns  # noqa: E402
+
+application = URLRouter(websocket_urlpatterns)
+
+# Trame qui marque la fin du traitement de chaque type de message
+RESPONSES = {
+    "init": {"welcome"},
+    "start_game": {"game_started"},
+    "word_choice": {"word_selected"},
+    "give_clue": {"clue_given"},
+    "make_guess": {"guess_made"},
+    "join_game": {"game_started"},
+    "start_new_round": {"new_round", "game_end"},
+    "apply-malus": {"round_complete"},
+    "leave_room": {"websocket.close"},
+}
+
+
+CODECS = {"json": JsonCodec, "msgpack": MsgpackCodec}
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)  # {type de message: [secondes]}
+        self.frames = 0
+        self.games = 0
+        self.bytes_sent = 0  # Client -> serveur
+        self.bytes_received = 0  # Serveur -> client
+        self.samples = []  # Trames décodées, si record=True (benchmarks.protocol)
+        self.record = False
+        self.spectator_frames = 0
+        self.spectator_bytes = 0
+
+    def report(self, elapsed, rooms, players):
+        sent = sum(len(values) for values in self.latencies.values())
+        print(f"{rooms} rooms x {players} joueurs, {self.games} parties terminées")
+        print(
+            f"{elapsed:.2f} s, {sent / elapsed:.0f} messages/s reçus, "
+            f"{self.frames / elapsed:.0f} trames/s envoyées"
+        )
+        print(
+            f"octets : {self.bytes_sent} reçus par le serveur, "
+            f"{self.bytes_received} envoyés aux clients"
+        )
+        if self.spectator_frames:
+            print(
+                f"spectateurs : {self.spectator_frames} instantanés, "
+                f"{self.spectator_bytes} octets"
+            )
+        print(
+            f"{'message':<16} {'nombre':>7} {'p50 (ms)':>9} {'p95 (ms)':>9} "
+            f"{'p99 (ms)':>9} {'max (ms)':>9}"
+        )
+        for msg_type in RESPONSES:
+            values = sorted(self.latencies.get(msg_type, []))
+            if not values:
+                continue
+            print(
+                f"{msg_type:<16} {len(values):>7} "
+                + " ".join(
+                    f"{percentile(values, p) * 1000:>9.1f}" for p in (50, 95, 99, 100)
+                )
+            )
+
+        db = get_db_executor().metrics.snapshot()
+        print(
+            f"exécuteur base : {db['completed']} tâches, file max {db['max_queue_depth']}, "
+            f"attente p50/p95/max {db['wait_p50_ms']:.1f}/{db['wait_p95_ms']:.1f}/"
+            f"{db['wait_max_ms']:.1f} ms, durée p95 {db['duration_p95_ms']:.1f} ms"
+        )
+
+
+def percentile(values, p):
+    """Percentile par rang le plus proche (values triées)"""
+    rank = max(1, -(-len(values) * p // 100))
+    return values[int(rank) - 1]
+
+
+class Bot:
+    """Joueur simulé : réagit aux trames reçues comme le ferait le frontend"""
+
+    def __init__(self, room, stats, session_id, player_id, pseudo, is_owner):
+        self.codec = room.codec
+        self.room = room
+        self.stats = stats
+        self.session_id = session_id
+        self.player_id = str(player_id)
+        self.pseudo = pseudo
+        self.is_owner = is_owner
+        self.pending = {}  # {type de message: instant d'envoi}
+        self.communicator = None
+
+    async def connect(self):
+        self.communicator = WebsocketCommunicator(
+            application,
+            f"/ws/game/{self.room.code}/",
+            subprotocols=[self.codec.subprotocol] if self.codec.subprotocol else None,
+        )
+        connected, _ = await self.communicator.connect()
+        assert connected, "connexion websocket refusée"
+        await self.send({"type": "init", "sessionId": self.session_id})
+
+    async def send(self, message):
+        self.pending[message["type"]] = time.perf_counter()
+        data = self.codec.encode(message)
+        self.stats.bytes_sent += len(data if self.codec.binary else data.encode())
+        if self.stats.record:
+            self.stats.samples.append(message)
+        if self.codec.binary:
+            await self.communicator.send_to(bytes_data=data)
+        else:
+            await self.communicator.send_to(text_data=data)
+
+    def acknowledge(self, frame_type):
+        for msg_type, started in list(self.pending.items()):
+            if frame_type in RESPONSES[msg_type]:
+                self.stats.latencies[msg_type].append(time.perf_counter() - started)
+                del self.pending[msg_type]
+
+    async def run(self):
+        while True:
+            output = await self.communicator.receive_output(timeout=300)
+            if output["type"] == "websocket.close":
+                self.acknowledge("websocket.close")
+                return
+            self.stats.frames += 1
+            if self.codec.binary:
+                self.stats.bytes_received += len(output["bytes"])
+                frame = self.codec.decode(output["bytes"])
+            else:
+                self.stats.bytes_received += len(output["text"].encode())
+                frame = self.codec.decode(output["text"])
+            if self.stats.record:
+                self.stats.samples.append(frame)
+            self.acknowledge(frame["type"])
+            await self.room.on_frame(self, frame)
+
+
+class Spectator:
+    """Spectateur passif : compte les instantanés reçus"""
+
+    def __init__(self, room, stats):
+        self.room = room
+        self.stats = stats
+        self.communicator = None
+
+    async def connect(self):
+        self.communicator = WebsocketCommunicator(
+            application, f"/ws/game/{self.room.code}/spectate/"
+        )
+        connected, _ = await self.communicator.connect()
+        assert connected, "connexion spectateur refusée"
+
+    async def run(self):
+        while True:
+            output = await self.communicator.receive_output(timeout=300)
+            if output["type"] == "websocket.close":
+                return
+            self.stats.spectator_frames += 1
+            self.stats.spectator_bytes += len(output["text"].encode())
+
+
+class SimulatedRoom:
+    """Une room créée via l'API REST, dont les bots jouent une partie complète"""
+
+    def __init__(
+        self, index, players, total_rounds, stats, codec=JsonCodec, spectators=0
+    ):
+        self.codec = codec
+        self.spectators = spectators
+        self.index = index
+        self.players = players
+        self.total_rounds = total_rounds
+        self.stats = stats
+        self.bots = []
+        self.clues = itertools.count()
+        self.round = None
+        self.joined = False
+        self.roster = {}  # {player_id: entrée}, tenu à jour avec les deltas
+
+    @sync_to_async
+    def create(self):
+        client = Client()
+        response = client.post(
+            "/api/game/create-room/",
+            {"pseudo": "joueur0"},
+            content_type="application/json",
+        )
+        data = response.json()
+        self.code = data["roomCode"]
+        players = [(data["sessionId"], data["playerId"], "joueur0", True)]
+        for i in range(1, self.players):
+            data = client.post(
+                "/api/game/join-room/",
+                {"roomCode": self.code, "pseudo": f"joueur{i}"},
+                content_type="application/json",
+            ).json()
+            players.append((data["sessionId"], data["playerId"], f"joueur{i}", False))
+        return players
+
+    async def play(self):
+        players = await self.create()
+        self.bots = [Bot(self, self.stats, *player) for player in players]
+        spectators = [Spectator(self, self.stats) for _ in range(self.spectators)]
+        for spectator in spectators:
+            await spectator.connect()
+        for bot in self.bots:
+            await bot.connect()
+        watching = [asyncio.create_task(spectator.run()) for spectator in spectators]
+        tasks = [asyncio.create_task(bot.run()) for bot in self.bots]
+        await self.bots[0].send(
+            {"type": "start_game", "totalRounds": self.total_rounds}
+        )
+        await asyncio.gather(*tasks)
+        for spectator, task in zip(spectators, watching):
+            task.cancel()
+            await spectator.communicator.disconnect()
+
+    def guessers(self):
+        return [bot for bot in self.bots if bot.player_id != self.round["current"]]
+
+    async def on_frame(self, bot, frame):
+        frame_type = frame["type"]
+        if "players" in frame and frame_type in ("room_state", "game_started"):
+            self.roster.update((p["id"], p) for p in frame["players"])
+        for player in frame.get("changedPlayers", ()):
+            self.roster[player["id"]] = player
+
+        if frame_type in ("game_started", "new_round"):
+            current = frame.get("currentPlayer") or frame.get("nextPlayer")
+            if (
+                frame_type == "game_started"
+                and bot is self.bots[-1]
+                and not self.joined
+            ):
+                # Un joueur recharge l'état de la partie, comme après un rafraîchissement
+                self.joined = True
+                await bot.send({"type": "join_game"})
+            if self.round is None or self.round["current"] != current:
+                self.round = {"current": current, "word": None, "clues": set()}
+            if bot.player_id == current and self.round["word"] is None:
+                choice = frame["wordChoices"]["word1"]
+                self.round.update(word=choice["word"], required=choice["clues"])
+                await bot.send({"type": "word_choice", "word": choice["word"]})
+
+        elif frame_type == "phase_started":
+            # L'indice est donné à chaque (re)passage en phase d'indices
+            if frame["phase"] == "clue" and bot.player_id == frame["currentPlayer"]:
+                clue = f"indice{next(self.clues)}"
+                await bot.send({"type": "give_clue", "clue": clue})
+
+        elif frame_type == "clue_given" and bot.player_id != self.round["current"]:
+            self.round["clues"].add(frame["clue"])
+            if len(self.round["clues"]) < self.round["required"]:
+                await bot.send(
+                    {"type": "make_guess", "guess": f"raté{random.random()}"}
+                )
+            elif bot is self.guessers()[0]:
+                # Dernier indice : le premier devineur trouve le mot
+                await bot.send({"type": "make_guess", "guess": self.round["word"]})
+
+        elif frame_type == "round_complete" and not frame.get("malusApplied"):
+            if bot.player_id != self.round["current"]:
+                return
+            if frame.get("canMalus"):
+                target = next((p for p in self.roster.values() if p["score"] > 0), None)
+                if target:
+                    await bot.send(
+                        {"type": "apply-malus", "targetPlayerPseudo": target["pseudo"]}
+                    )
+            await bot.send({"type": "start_new_round"})
+
+        elif frame_type == "game_end":
+            if bot.is_owner:
+                self.stats.games += 1
+            await bot.send({"type": "leave_room"})
+
+
+async def run(args, stats):
+    rooms = [
+        SimulatedRoom(
+            i,
+            args.players,
+            args.total_rounds,
+            stats,
+            CODECS[args.protocol],
+            getattr(args, "spectators", 0),
+        )
+        for i in range(args.rooms)
+    ]
+    await asyncio.wait_for(
+        asyncio.gather(*(room.play() for room in rooms)), timeout=args.timeout
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rooms", type=int, default=50)
+    parser.add_argument("--players", type=int, default=6)
+    parser.add_argument("--total-rounds", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--protocol", choices=CODECS, default="json")
+    parser.add_argument("--spectators", type=int, default=0)
+    args = parser.parse_args()
+
+    connection.creation.create_test_db(verbosity=0)
+    stats = Stats()
+    start = time.perf_counter()
+    try:
+        # Les print de débogage du consumer fausseraient la mesure
+        with contextlib.redirect_stdout(io.StringIO()):
+            asyncio.run(run(args, stats))
+    finally:
+        elapsed = time.perf_counter() - start
+        connection.creation.destroy_test_db(":memory:", verbosity=0)
+    stats.report(elapsed, args.rooms, args.players)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Protocole JSON texte contre msgpack binaire (sous-protocole maudit.msgpack.v1)
+sur des parties complètes jouées par benchmarks.load.
+
+    python -m benchmarks.protocol [--rooms 1] [--players 6] [--total-rounds 2]
+
+Affiche les octets échangés dans chaque sens, puis le coût CPU d'encodage et de
+décodage de toutes les trames de la partie avec chaque codec.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+
+from benchmarks.load import CODECS, Stats, run
+from django.db import connection
+
+from game.protocol import JsonCodec, MsgpackCodec
+
+
+def play(args, protocol):
+    args.protocol = protocol
+    stats = Stats()
+    stats.record = True
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            asyncio.run(run(args, stats))
+    finally:
+        connection.creation.destroy_test_db(":memory:", verbosity=0)
+    return stats
+
+
+def cpu_cost(codec, frames, repeat):
+    """Microsecondes par trame pour encoder puis décoder"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        encoded = [codec.encode(frame) for frame in frames]
+    encode = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for data in encoded:
+            codec.decode(data)
+    decode = time.perf_counter() - start
+
+    scale = 1e6 / (repeat * len(frames))
+    return encode * scale, decode * scale
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rooms", type=int, default=1)
+    parser.add_argument("--players", type=int, default=6)
+    parser.add_argument("--total-rounds", type=int, default=2)
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    results = {protocol: play(args, protocol) for protocol in CODECS}
+    frames = results["json"].samples
+
+    print(
+        f"{args.rooms} room(s) x {args.players} joueurs, {args.total_rounds} tour(s), "
+        f"{len(frames)} trames"
+    )
+    print(
+        f"{'protocole':<10} {'client->serveur':>16} {'serveur->client':>16} "
+        f"{'encodage (µs)':>14} {'décodage (µs)':>14}"
+    )
+    for protocol, codec in (("json", JsonCodec), ("msgpack", MsgpackCodec)):
+        stats = results[protocol]
+        encode, decode = cpu_cost(codec, frames, args.repeat)
+        print(
+            f"{protocol:<10} {stats.bytes_sent:>16} {stats.bytes_received:>16} "
+            f"{encode:>14.2f} {decode:>14.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Débit de création de rooms sous requêtes concurrentes : ancien tirage aléatoire
+avec boucle exists() contre l'allocateur de codes (compteur brouillé).
+
+    python -m benchmarks.rooms [--rooms 2000] [--concurrency 16] [--existing 20000]
+
+Les créations passent par un pool de threads sur une base SQLite fichier
+(chaque thread garde sa connexion) ; la base est pré-remplie de `--existing` rooms.
+Affiche le débit, les requêtes SQL et les collisions par création.
+"""
+
+import argparse
+import os
+import random
+import string
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.test_settings")
+django.setup()
+
+from django.db import connection, connections  # noqa: E402
+from django.db.backends.signals import connection_created  # noqa: E402
+
+from game import room_codes  # noqa: E402
+from game.models import GameRoom, Player  # noqa: E402
+
+
+class Counters:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queries = 0
+        self.collisions = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql != "BEGIN":
+            with self.lock:
+                self.queries += 1
+        return execute(sql, params, many, context)
+
+    def collision(self):
+        with self.lock:
+            self.collisions += 1
+
+
+counters = Counters()
+
+
+def install_counter(sender, connection, **kwargs):
+    # Toute nouvelle connexion (une par thread) est comptée
+    connection.cursor().execute("PRAGMA journal_mode=WAL")
+    connection.execute_wrappers.append(counters)
+
+
+def generate_room_code(length=6):
+    return "".join(random.choices(string.ascii_uppercase + string.digits, k=length))
+
+
+def create_legacy():
+    """Ancienne implémentation de CreateRoomView"""
+    code = generate_room_code()
+    while GameRoom.objects.filter(code=code).exists():
+        counters.collision()
+        code = generate_room_code()
+    return GameRoom.objects.create(code=code)
+
+
+def create_allocated():
+    return room_codes.create_room()
+
+
+def create_with_owner(create_room):
+    room = create_room()
+    Player.objects.create(
+        room=room, pseudo="hôte", session_id=uuid.uuid4(), is_owner=True
+    )
+
+
+def prefill(count):
+    GameRoom.objects.bulk_create(
+        [GameRoom(code=generate_room_code()) for _ in range(count)],
+        ignore_conflicts=True,
+    )
+
+
+def measure(name, create_room, args):
+    Player.objects.all().delete()
+    GameRoom.objects.all().delete()
+    prefill(args.existing)
+    counters.queries = counters.collisions = 0
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as executor:
+        list(executor.map(lambda _: create_with_owner(create_room), range(args.rooms)))
+    elapsed = time.perf_counter() - start
+
+    codes = GameRoom.objects.values_list("code", flat=True)
+    assert len(set(codes)) == len(codes), "codes en double"
+    print(
+        f"{name:<12} {args.rooms / elapsed:>9.0f} {counters.queries / args.rooms:>10.2f} "
+        f"{counters.collisions:>11}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rooms", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--existing", type=int, default=20000)
+    args = parser.parse_args()
+
+    test_db = os.path.join(tempfile.mkdtemp(), "rooms.sqlite3")
+    settings_dict = connection.settings_dict
+    settings_dict["TEST"]["NAME"] = test_db
+    # Les écritures concurrentes attendent le verrou SQLite au lieu d'échouer
+    settings_dict.setdefault("OPTIONS", {})["timeout"] = 60
+    connection.creation.create_test_db(verbosity=0)
+    connection_created.connect(install_counter)
+    try:
+        print(
+            f"{args.rooms} créations, {args.concurrency} en parallèle, "
+            f"{args.existing} rooms existantes"
+        )
+        print(f"{'stratégie':<12} {'rooms/s':>9} {'req./room':>10} {'collisions':>11}")
+        measure("exists()", create_legacy, args)
+        measure("allocateur", create_allocated, args)
+    finally:
+        connection_created.disconnect(install_counter)
+        connections.close_all()
+        connection.creation.destroy_test_db(test_db, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
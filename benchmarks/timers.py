@@ -0,0 +1,128 @@
+"""
+Compare le modèle historique (une tâche asyncio par room qui se réveille chaque
+seconde) et la roue temporelle unique du LocalPhaseScheduler.
+
+    python -m benchmarks.timers [--rooms 1000 10000 50000] [--window 3]
+
+Pour chaque nombre de rooms : réveils de l'event loop, événements déclenchés,
+temps CPU par seconde et coût d'un changement de timer (switch).
+"""
+
+import argparse
+import asyncio
+import time
+
+from game.scheduler import LocalPhaseScheduler, now_ms
+
+PHASE_DURATION = 60
+
+
+async def run_tasks(rooms, window):
+    """Modèle historique : une tâche run_timer par room, un tick par seconde"""
+    stats = {"wakeups": 0, "events": 0}
+
+    async def run_timer(duration):
+        for _ in range(duration, 0, -1):
+            await asyncio.sleep(1)
+            stats["wakeups"] += 1
+            stats["events"] += 1  # group_send du timer_update
+
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(run_timer(PHASE_DURATION)) for _ in range(rooms)]
+    switch_cost = (time.perf_counter() - start) / rooms
+
+    cpu = time.process_time()
+    await asyncio.sleep(window)
+    cpu = time.process_time() - cpu
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return stats, cpu, switch_cost
+
+
+def phase_events(base, mode):
+    deadline = base + PHASE_DURATION * 1000
+    if mode == "tick":
+        events = [
+            (base + (PHASE_DURATION - t + 1) * 1000, "tick", t)
+            for t in range(PHASE_DURATION, 0, -1)
+        ]
+    else:
+        events = [(deadline - t * 1000, "tick", t) for t in (10, 5)]
+    events.append((deadline, "end", 0))
+    return deadline, events
+
+
+async def schedule_rooms(scheduler, rooms, base, mode):
+    for i in range(rooms):
+        deadline, events = phase_events(base, mode)
+        timer = {
+            "timer_id": scheduler.new_timer_id(),
+            "phase": "clue",
+            "currentPlayer": "1",
+            "deadline": deadline,
+        }
+        await scheduler.schedule(f"R{i}", timer, events)
+
+
+async def run_wheel(rooms, window, mode, poll_interval=0.1):
+    """Roue temporelle : une seule tâche relève tous les événements échus"""
+    stats = {"wakeups": 0, "events": 0}
+
+    # Coût d'un switch mesuré à part, sur une roue déjà peuplée
+    probe = LocalPhaseScheduler(poll_interval=poll_interval)
+    sample = min(rooms, 1000)
+    await schedule_rooms(probe, sample, now_ms(), mode)
+    start = time.perf_counter()
+    await schedule_rooms(probe, sample, now_ms(), mode)
+    switch_cost = (time.perf_counter() - start) / sample
+
+    # Les phases démarrent toutes une fois la roue remplie, comme en régime établi
+    scheduler = LocalPhaseScheduler(poll_interval=poll_interval)
+    base = now_ms() + int(switch_cost * rooms * 2000) + 500
+    await schedule_rooms(scheduler, rooms, base, mode)
+    await asyncio.sleep(max(0, base - now_ms()) / 1000)
+
+    async def driver():
+        while True:
+            await asyncio.sleep(poll_interval - (time.time() % poll_interval))
+            stats["wakeups"] += 1
+            while due := await scheduler.claim_due(now_ms(), limit=10000):
+                stats["events"] += len(due)
+
+    cpu = time.process_time()
+    task = asyncio.create_task(driver())
+    await asyncio.sleep(window)
+    cpu = time.process_time() - cpu
+    task.cancel()
+    return stats, cpu, switch_cost
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rooms", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--window", type=float, default=3.0)
+    args = parser.parse_args()
+
+    print(
+        f"{'rooms':>7} {'modèle':<14} {'réveils/s':>10} {'événements/s':>13} "
+        f"{'CPU/s':>7} {'switch (µs)':>12}"
+    )
+    for rooms in args.rooms:
+        runs = [
+            ("tâche/room", run_tasks(rooms, args.window)),
+            ("roue (tick)", run_wheel(rooms, args.window, "tick")),
+            ("roue (deadline)", run_wheel(rooms, args.window, "deadline")),
+        ]
+        for label, coro in runs:
+            stats, cpu, switch_cost = asyncio.run(coro)
+            print(
+                f"{rooms:>7} {label:<14} {stats['wakeups'] / args.window:>10.0f} "
+                f"{stats['events'] / args.window:>13.0f} {cpu / args.window:>7.3f} "
+                f"{switch_cost * 1e6:>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Amplification d'écriture des indices et tentatives d'un round : listes JSON
+réécrites sur Round (avant) contre lignes ajoutées dans Clue et Guess (après).
+
+    python -m benchmarks.write_amplification [--clues 5] [--players 6 12 20]
+
+Chaque indice est suivi d'une tentative par devineur, et l'état est écrit après
+chaque action (pire cas, sans regroupement). « Avant » compte les octets des
+colonnes JSON que l'ancien code réécrivait à chaque ajout ; « après » compte les
+octets des paramètres des INSERT réellement exécutés.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.test_settings")
+django.setup()
+
+from asgiref.sync import sync_to_async  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from game.db_executor import get_db_executor  # noqa: E402
+from game.models import GameRoom, Player  # noqa: E402
+from game.room_state import RoomState  # noqa: E402
+
+
+def param_bytes(value):
+    if value is None:
+        return 0
+    return len(str(value).encode())
+
+
+class InsertBytes:
+    """execute_wrapper qui compte les octets des paramètres des INSERT"""
+
+    def __init__(self):
+        self.total = 0
+        self.largest = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.startswith("INSERT"):
+            rows = params if many else [params]
+            size = sum(param_bytes(p) for row in rows for p in row)
+            self.total += size
+            self.largest = max(self.largest, size)
+        return execute(sql, params, many, context)
+
+
+def legacy_bytes(clues, players):
+    """Octets des listes JSON réécrites par l'ancien add_clue / add_guess"""
+    given_clues, given_guesses = [], []
+    total = largest = 0
+    for clue in range(clues):
+        given_clues.append(f"indice{clue}")
+        size = len(json.dumps(given_clues).encode())
+        total, largest = total + size, max(largest, size)
+        guessing_players = []
+        for player in range(1, players):
+            given_guesses.append(
+                {
+                    "playerId": str(player),
+                    "word": f"essai{clue}-{player}",
+                    "timestamp": timezone.now().isoformat(),
+                }
+            )
+            guessing_players.append(str(player))
+            size = len(json.dumps(given_guesses).encode()) + len(
+                json.dumps(guessing_players).encode()
+            )
+            total, largest = total + size, max(largest, size)
+    return total, largest
+
+
+@sync_to_async
+def create_room(code, players):
+    room = GameRoom.objects.create(code=code)
+    return [
+        Player.objects.create(room=room, pseudo=f"joueur{i}", is_owner=i == 0)
+        for i in range(players)
+    ]
+
+
+async def appended_bytes(code, clues, players):
+    created = await create_room(code, players)
+    state = await RoomState.get(code)
+    await state.start_round(created[0].id)
+
+    counter = InsertBytes()
+    # Les écritures passent par le thread unique de l'exécuteur : on s'y branche
+    await get_db_executor().run(
+        code, lambda: connection.execute_wrappers.append(counter)
+    )
+    try:
+        for clue in range(clues):
+            state.add_clue(f"indice{clue}", created[0].id)
+            await state.flush()
+            for player in created[1:]:
+                state.add_guess(player.id, f"essai{clue}-{player.id}")
+                await state.flush()
+    finally:
+        await get_db_executor().run(
+            code, lambda: connection.execute_wrappers.remove(counter)
+        )
+    return counter.total, counter.largest
+
+
+async def run(args):
+    print(f"{args.clues} indices, une tentative par devineur après chaque indice")
+    print(
+        f"{'joueurs':>7} {'écritures':>9} {'avant (o)':>10} {'après (o)':>10} "
+        f"{'max avant':>10} {'max après':>10} {'facteur':>8}"
+    )
+    for i, players in enumerate(args.players):
+        writes = args.clues * players
+        before, before_max = legacy_bytes(args.clues, players)
+        after, after_max = await appended_bytes(f"WA{i:04d}", args.clues, players)
+        print(
+            f"{players:>7} {writes:>9} {before:>10} {after:>10} "
+            f"{before_max:>10} {after_max:>10} {before / after:>7.1f}x"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clues", type=int, default=5)
+    parser.add_argument("--players", type=int, nargs="+", default=[6, 12, 20])
+    args = parser.parse_args()
+
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        asyncio.run(run(args))
+    finally:
+        get_db_executor().shutdown()
+        connection.creation.destroy_test_db(":memory:", verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
@@ -152,12 +152,77 @@ REST_FRAMEWORK = {
     ),
 }
 
-# Configuration du channel layer (Redis)
+# Configuration du channel layer : Redis, avec remise directe en mémoire aux
+# consumers du processus (même CONFIG que channels_redis.core.RedisChannelLayer)
 CHANNEL_LAYERS = {
     "default": {
-        "BACKEND": "channels_redis.core.RedisChannelLayer",
+        "BACKEND": "game.channel_layer.HybridChannelLayer",
         "CONFIG": {
             "hosts": [("127.0.0.1", 6379)],
         },
     },
 }
+
+# État des rooms en mémoire : délai max (secondes) avant l'écriture différée en base
+ROOM_STATE_FLUSH_INTERVAL = 1.0
+# Échecs consécutifs de l'écriture d'une room avant d'écarter les éléments refusés
+# par la base (modèle DeadLetter)
+ROOM_STATE_WRITE_ATTEMPTS = 3
+
+# Timers de phase : "deadline" (une échéance diffusée au début de phase, décompte côté
+# client) ou "tick" (un timer_update par seconde)
+TIMER_MODE = "deadline"
+TIMER_CHECKPOINTS = (10, 5)  # Secondes restantes auxquelles un timer_update est renvoyé
+
+# Échéances des timers de phase, partagées entre workers (survivent aux redémarrages)
+PHASE_SCHEDULER = {
+    "BACKEND": "game.scheduler.RedisPhaseScheduler",
+    "CONFIG": {
+        "url": "redis://127.0.0.1:6379/0",
+        "poll_interval": 0.2,
+    },
+}
+
+# Codes de room : compteur brouillé et codes libérés partagés entre workers
+ROOM_CODE_ALLOCATOR = {
+    "BACKEND": "game.room_codes.RedisRoomCodeAllocator",
+    "CONFIG": {"url": "redis://127.0.0.1:6379/0"},
+}
+
+# Pool de threads des requêtes ORM des consumers (rooms en parallèle, ordre conservé par room)
+DB_EXECUTOR = {
+    "max_workers": 4,
+    "wait_warning": 0.5,  # Attente (s) en file au-delà de laquelle un avertissement est loggé
+}
+
+# Répartition des rooms entre workers par hachage cohérent : {nom: url websocket}
+# des shards, et nom de ce worker (SHARD_NAME)
+ROOM_SHARDS = {
+    "BACKEND": "game.sharding.RedisShardDirectory",
+    "CONFIG": {
+        "url": "redis://127.0.0.1:6379/0",
+        "shards": {"daphne-1": "ws://127.0.0.1:8000"},
+        "local": os.getenv("SHARD_NAME", "daphne-1"),
+        "check_interval": 5.0,  # Secondes entre deux vérifications des rooms à céder
+        # Secondes après lesquelles une room pas encore cédée change de shard d'office
+        "handover_timeout": 30.0,
+    },
+}
+
+# Délai de grâce (secondes) avant de retirer un joueur déconnecté, partagé entre workers
+DISCONNECT_GRACE = {
+    "BACKEND": "game.grace_period.RedisGracePeriods",
+    "CONFIG": {"url": "redis://127.0.0.1:6379/0", "delay": 30, "poll_interval": 1.0},
+}
+
+# Roster des joueurs (pseudo, propriétaire, score, présence) hors de la base
+PLAYER_ROSTER = {
+    "BACKEND": "game.roster.RedisRoster",
+    "CONFIG": {"url": "redis://127.0.0.1:6379/0"},
+}
+
+# Événements de groupe gardés par room pour rejouer ceux manqués à la reconnexion
+EVENT_BUFFER_SIZE = 256
+
+# Instantanés envoyés aux spectateurs d'une room, par seconde au plus
+SPECTATOR_UPDATE_RATE = 2
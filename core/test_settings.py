@@ -0,0 +1,45 @@
+"""
+Réglages pour les tests et les benchmarks : SQLite et channel layer en
+mémoire, aucun service externe (Postgres, Redis) n'est nécessaire.
+
+    python manage.py test --settings=core.test_settings
+"""
+
+from .settings import *  # noqa: F401,F403
+
+SECRET_KEY = SECRET_KEY or "test-secret-key"  # noqa: F405
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "test_db.sqlite3",  # noqa: F405
+    }
+}
+
+CHANNEL_LAYERS = {
+    "default": {
+        "BACKEND": "channels.layers.InMemoryChannelLayer",
+    },
+}
+
+PHASE_SCHEDULER = {
+    "BACKEND": "game.scheduler.LocalPhaseScheduler",
+    "CONFIG": {"poll_interval": 0.05},
+}
+
+# SQLite en mémoire : une seule écriture à la fois
+DB_EXECUTOR = {"max_workers": 1}
+
+ROOM_CODE_ALLOCATOR = {"BACKEND": "game.room_codes.LocalRoomCodeAllocator"}
+
+DISCONNECT_GRACE = {"BACKEND": "game.grace_period.LocalGracePeriods"}
+
+PLAYER_ROSTER = {"BACKEND": "game.roster.LocalRoster"}
+
+# Un seul processus : toutes les rooms sont locales
+ROOM_SHARDS = {"BACKEND": "game.sharding.LocalShardDirectory"}
+
+# Pas d'écriture différée pendant une mesure : seules les écritures forcées comptent
+ROOM_STATE_FLUSH_INTERVAL = 60
+
+ALLOWED_HOSTS = ALLOWED_HOSTS + ["testserver"]  # noqa: F405
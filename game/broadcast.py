@@ -0,0 +1,31 @@
+from .event_log import RoomEventLog
+from .roles import EVENT_AUDIENCES, role_group, scope_frame
+from .spectators import SpectatorFeed
+
+
+async def group_broadcast(channel_layer, group_name, frame):
+    """
+    Numérote la trame, la sérialise une seule fois par format utilisé dans la
+    room (JSON, msgpack) et la diffuse telle quelle au groupe : chaque consumer
+    renvoie à son client la version de son protocole sans la reconstruire.
+    L'événement est gardé dans le journal de la room pour les reconnexions.
+
+    Un événement réservé à certains rôles (EVENT_AUDIENCES) part seulement aux
+    sous-groupes de ces rôles, chacun avec sa version de la trame. Les
+    spectateurs en verront l'effet dans leur prochain instantané.
+    """
+    SpectatorFeed.touch(group_name)
+    event_log = RoomEventLog.get_instance(group_name)
+    audience = EVENT_AUDIENCES.get(frame.get("type"))
+    if audience is None:
+        event = event_log.append(frame)
+        await channel_layer.group_send(group_name, {"type": "broadcast", **event})
+        return
+
+    events = event_log.append_scoped(
+        {role: scope_frame(frame, role) for role in audience}
+    )
+    for role, event in events.items():
+        await channel_layer.group_send(
+            role_group(group_name, role), {"type": "broadcast", **event}
+        )
@@ -0,0 +1,213 @@
+import asyncio
+import collections
+import functools
+import logging
+import time
+
+from channels.exceptions import ChannelFull
+from channels_redis.core import BoundedQueue, RedisChannelLayer
+
+logger = logging.getLogger(__name__)
+
+
+class HybridChannelLayer(RedisChannelLayer):
+    """
+    Channel layer Redis avec un raccourci en mémoire pour les membres locaux.
+
+    Les rooms sont détenues par un worker et leurs joueurs y sont redirigés
+    (ROOM_SHARDS) : les membres d'un groupe sont presque toujours des consumers
+    du processus qui diffuse. Un message destiné à un channel de ce processus
+    (qui attend un receive()) lui est remis directement, sans sérialisation ni
+    aller-retour Redis. Redis reste utilisé pour les membres des autres
+    processus : les groupes y sont toujours enregistrés en entier, un
+    group_send lit donc leur composition (un seul aller-retour) et n'envoie
+    par Redis qu'aux channels qu'il n'a pas servis localement.
+
+    Ordre : un channel créé par ce processus (new_channel) reçoit tous les
+    messages envoyés par ce processus en mémoire, jusqu'à l'arrêt de son
+    consumer, même entre deux receive() ; ceux des autres processus lui
+    arrivent par Redis. Chaque expéditeur (processus) n'utilise donc qu'un
+    seul chemin par channel et ses messages arrivent dans l'ordre d'envoi,
+    comme avec RedisChannelLayer. L'ordre entre messages de processus
+    différents n'est pas garanti.
+
+    Mêmes options que RedisChannelLayer ; les messages locaux ne passent pas
+    par msgpack, chaque destinataire reçoit une copie du dict envoyé.
+    """
+
+    GROUP_SEND_SCRIPT = """
+        local over_capacity = 0
+        local current_time = ARGV[#ARGV - 1]
+        local expiry = ARGV[#ARGV]
+        for i=1,#KEYS do
+            if redis.call('ZCOUNT', KEYS[i], '-inf', '+inf') < tonumber(ARGV[i + #KEYS]) then
+                redis.call('ZADD', KEYS[i], current_time, ARGV[i])
+                redis.call('EXPIRE', KEYS[i], expiry)
+            else
+                over_capacity = over_capacity + 1
+            end
+        end
+        return over_capacity
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Messages remis en mémoire, par channel local
+        self.local_buffer = collections.defaultdict(
+            functools.partial(BoundedQueue, self.capacity)
+        )
+        # Channels créés par ce processus dont le consumer n'est pas arrêté
+        self._local_channels = set()
+        # {channel local: tâche receive() Redis en cours}
+        self._remote_receives = {}
+        # {groupe: channels locaux inscrits}
+        self._local_groups = collections.defaultdict(set)
+
+    def _is_local(self, channel):
+        return "!" in channel and self.non_local_name(channel).endswith(
+            self.client_prefix + "!"
+        )
+
+    def _deliver(self, channel, message):
+        """Remet le message en mémoire si le channel est local ; sinon False"""
+        if channel not in self._local_channels:
+            return False
+        self.local_buffer[channel].put_nowait(dict(message))
+        return True
+
+    ### Channel layer API ###
+
+    async def send(self, channel, message):
+        assert isinstance(message, dict), "message is not a dict"
+        assert self.valid_channel_name(channel), "Channel name not valid"
+        if channel in self._local_channels:
+            if self.local_buffer[channel].full():
+                raise ChannelFull()
+            self._deliver(channel, message)
+            return
+        await super().send(channel, message)
+
+    async def new_channel(self, prefix="specific"):
+        channel = await super().new_channel(prefix)
+        self._local_channels.add(channel)
+        return channel
+
+    async def receive(self, channel):
+        """
+        Premier message arrivé sur le channel, en mémoire ou par Redis. Pour un
+        channel local, l'écoute Redis reste en place d'un appel à l'autre :
+        un message local ne l'interrompt pas.
+        """
+        if not self._is_local(channel):
+            return await super().receive(channel)
+        queue = self.local_buffer[channel]
+        if not queue.empty():
+            return queue.get_nowait()
+        remote = self._remote_receives.get(channel)
+        if remote is None:
+            remote = asyncio.ensure_future(super().receive(channel))
+            self._remote_receives[channel] = remote
+        local = asyncio.ensure_future(queue.get())
+        try:
+            done, _ = await asyncio.wait(
+                (local, remote), return_when=asyncio.FIRST_COMPLETED
+            )
+        except asyncio.CancelledError:
+            # Le consumer s'arrête : plus personne n'écoute ce channel
+            self._local_channels.discard(channel)
+            local.cancel()
+            remote.cancel()
+            if self._remote_receives.get(channel) is remote:
+                del self._remote_receives[channel]
+            self.local_buffer.pop(channel, None)
+            raise
+        if local in done:
+            return local.result()
+        local.cancel()
+        del self._remote_receives[channel]
+        return remote.result()
+
+    ### Flush extension ###
+
+    async def flush(self):
+        for remote in self._remote_receives.values():
+            remote.cancel()
+        self._remote_receives.clear()
+        self._local_channels.clear()
+        self.local_buffer.clear()
+        self._local_groups.clear()
+        await super().flush()
+
+    ### Groups extension ###
+
+    async def group_add(self, group, channel):
+        await super().group_add(group, channel)
+        if self._is_local(channel):
+            self._local_groups[group].add(channel)
+
+    async def group_discard(self, group, channel):
+        await super().group_discard(group, channel)
+        members = self._local_groups.get(group)
+        if members is not None:
+            members.discard(channel)
+            if not members:
+                del self._local_groups[group]
+
+    async def group_send(self, group, message):
+        assert self.valid_group_name(group), "Group name not valid"
+        delivered = {
+            channel
+            for channel in self._local_groups.get(group, ())
+            if self._deliver(channel, message)
+        }
+
+        # Composition complète du groupe : les membres des autres processus
+        key = self._group_key(group)
+        connection = self.connection(self.consistent_hash(group))
+        pipe = connection.pipeline(transaction=False)
+        pipe.zremrangebyscore(key, min=0, max=int(time.time()) - self.group_expiry)
+        pipe.zrange(key, 0, -1)
+        _, members = await pipe.execute()
+        # Channels de ce processus inscrits par un autre : en mémoire aussi
+        channel_names = [
+            channel
+            for channel in (member.decode("utf8") for member in members)
+            if channel not in delivered and not self._deliver(channel, message)
+        ]
+        if channel_names:
+            await self._send_to_channels(group, channel_names, message)
+
+    async def _send_to_channels(self, group, channel_names, message):
+        """Envoi par Redis, comme RedisChannelLayer.group_send"""
+        (
+            connection_to_channel_keys,
+            channel_keys_to_message,
+            channel_keys_to_capacity,
+        ) = self._map_channel_keys_to_connection(channel_names, message)
+
+        for index, channel_keys in connection_to_channel_keys.items():
+            connection = self.connection(index)
+            pipe = connection.pipeline(transaction=False)
+            for channel_key in channel_keys:
+                pipe.zremrangebyscore(
+                    channel_key, min=0, max=int(time.time()) - int(self.expiry)
+                )
+            await pipe.execute()
+
+            args = [
+                channel_keys_to_message[channel_key] for channel_key in channel_keys
+            ]
+            args += [
+                channel_keys_to_capacity[channel_key] for channel_key in channel_keys
+            ]
+            args += [time.time(), self.expiry]
+            over_capacity = await connection.eval(
+                self.GROUP_SEND_SCRIPT, len(channel_keys), *channel_keys, *args
+            )
+            if over_capacity > 0:
+                logger.info(
+                    "%s of %s channels over capacity in group %s",
+                    over_capacity,
+                    len(channel_names),
+                    group,
+                )
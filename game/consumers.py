@@ -1,17 +1,44 @@
-import json
 from math import e
 from pydoc import text
 import random
-import asyncio
 from channels.generic.websocket import AsyncWebsocketConsumer
-from channels.db import database_sync_to_async
-from django.apps import apps
 
+from .broadcast import group_broadcast
+from .event_log import RoomEventLog
+from .game_manager import GameManager
+from .grace_period import ensure_expiry_worker, get_grace_periods, remove_players
+from .normalize import normalize_word
+from .protocol import JsonCodec, decode_frame, event_payload, negotiate
+from .roles import (
+    CLUE_GIVER,
+    GUESSERS,
+    join_role_group,
+    leave_role_group,
+    scope_frame,
+)
+from .room_actor import RoomActor
+from .room_state import RoomState
 from .round_manager import RoundManager
+from .sharding import ensure_watcher, get_shard_directory, remote_endpoint
+from .spectators import ROOM_GONE, SpectatorFeed
 from .timer_manager import RoomTimerManager
-from .word_list import WORDS
 
-DISCONNECT_TIMEOUTS = {}
+# Messages qui modifient l'état de la room : appliqués un à un par son acteur
+ROOM_COMMANDS = {
+    "start_game",
+    "word_choice",
+    "give_clue",
+    "make_guess",
+    "start_new_round",
+    "apply-malus",
+    "leave_room",
+    # Lu entre deux commandes : l'état envoyé correspond au dernier seq diffusé
+    "round_sync",
+    "roster_sync",
+}
+
+# Longueur maximale d'un indice ou d'une tentative (Clue.text, Guess.word)
+MAX_WORD_LENGTH = 100
 
 
 class GameConsumer(AsyncWebsocketConsumer):
@@ -19,6 +46,14 @@ class GameConsumer(AsyncWebsocketConsumer):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.timer_manager = None
+        self.game_manager = None
+        self.codec = JsonCodec
+        # Numéros des événements de groupe reçus avant l'init (pas à rejouer)
+        self.early_seqs = set()
+        # Journal de la room où le format de ce client est compté
+        self.event_log = None
+        # Dernier numéro renvoyé à la reprise : la file du groupe peut le répéter
+        self.replayed_seq = 0
 
     # --- Méthodes de connexion/déconnexion ---
     async def connect(self):
@@ -26,78 +61,79 @@ class GameConsumer(AsyncWebsocketConsumer):
         self.room_group_name = f"game_{self.room_code}"
         self.timer_manager = RoomTimerManager.get_instance(self.room_code)
         self.round_manager = RoundManager(self.room_code)
+        self.game_manager = GameManager(self.room_code)
+        # Binaire (msgpack) si le client le demande via le sous-protocole, sinon JSON
+        self.codec = negotiate(self.scope.get("subprotocols"))
+
+        # Room détenue par un autre worker : le client est redirigé vers son shard
+        endpoint = await remote_endpoint(self.room_code)
+        if endpoint:
+            await self.accept(subprotocol=self.codec.subprotocol)
+            await self.send_frame({"type": "shard_moved", "wsUrl": endpoint})
+            await self.close()
+            return
+        ensure_watcher()
 
-        room = await self.get_room()
-        if not room:
+        state = await RoomState.get(self.room_code)
+        if not state:
             await self.close()
             return
 
-        # Définir ce consumer comme actif seulement s'il est le premier à se connecter
-        if self.room_code not in RoomTimerManager._active_consumers:
-            self.timer_manager.set_active_consumer(self)
+        # Récupère les joueurs qui viennent de rejoindre via l'API (roster, sans SQL)
+        await state.sync_players()
 
         await self.channel_layer.group_add(self.room_group_name, self.channel_name)
-        await self.accept()
+        # Les diffusions de la room sont encodées dans le format de ce client
+        self.event_log = RoomEventLog.get_instance(self.room_group_name)
+        self.event_log.add_client(self.codec)
+        await self.accept(subprotocol=self.codec.subprotocol)
 
-        players = await self.get_room_players()
-        await self.send(json.dumps({"type": "room_state", "players": players}))
+        # Roster complet à la connexion ; ensuite, seulement des deltas
+        await self.send_frame({"type": "room_state", **state.full_roster()})
 
     async def disconnect(self, close_code):
         if hasattr(self, "pseudo"):
-            # On ne supprime pas tout de suite, on attend un délai
-            loop = asyncio.get_event_loop()
-            session_id = getattr(self, "session_id", None)
-            player_id = getattr(self, "player_id", None)
-            pseudo = getattr(self, "pseudo", None)
-            room_code = self.room_code
-
-            async def delayed_remove():
-                await asyncio.sleep(30)  # délai de grâce (30 secondes)
-                # Vérifie si le joueur ne s'est pas reconnecté
-                if DISCONNECT_TIMEOUTS.get(session_id) == remove_task:
-                    player = await self.get_player(session_id)
-                    was_owner = player and player.is_owner
-
-                    await self.channel_layer.group_send(
-                        self.room_group_name,
-                        {
-                            "type": "player_left",
-                            "player": {
-                                "id": player_id,
-                                "pseudo": pseudo,
-                            },
-                        },
-                    )
-
-                    if was_owner:
-                        new_owner = await self.transfer_ownership()
-                        if new_owner:
-                            await self.channel_layer.group_send(
-                                self.room_group_name,
-                                {
-                                    "type": "owner_changed",
-                                    "player": {
-                                        "id": str(new_owner.id),
-                                        "pseudo": new_owner.pseudo,
-                                        "is_owner": True,
-                                    },
-                                },
-                            )
-
-                    await self.remove_player()
-                    DISCONNECT_TIMEOUTS.pop(session_id, None)
-
-            remove_task = loop.create_task(delayed_remove())
-            DISCONNECT_TIMEOUTS[session_id] = remove_task
+            state = RoomState.get_loaded(self.room_code)
+            if state:
+                state.set_online(self.player_id, False)
+                await leave_role_group(
+                    self.channel_layer,
+                    self.room_code,
+                    self.player_id,
+                    self.channel_name,
+                )
+            # On ne supprime pas tout de suite : délai de grâce partagé par le processus
+            await get_grace_periods().schedule(
+                self.room_code, self.player_id, self.session_id
+            )
+            ensure_expiry_worker()
 
         await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
+        if self.event_log:
+            self.event_log.remove_client(self.codec)
 
     # --- Méthode principale de réception des messages ---
-    async def receive(self, text_data):
-        data = json.loads(text_data)
+    async def receive(self, text_data=None, bytes_data=None):
+        moved_to = get_shard_directory().moved.get(self.room_code)
+        if moved_to:
+            # Room cédée à un autre worker pendant la connexion
+            await self.send_frame({"type": "shard_moved", "wsUrl": moved_to})
+            await self.close()
+            return
+
+        data = decode_frame(text_data, bytes_data)
         msg_type = data.get("type")
         print(f"Received message: {msg_type}")
 
+        if msg_type in ROOM_COMMANDS:
+            # Les messages qui modifient l'état de la room passent un à un
+            await RoomActor.get_instance(self.room_code).submit(
+                self.handle_message_type, msg_type, data
+            )
+        else:
+            await self.handle_message_type(msg_type, data)
+
+    async def handle_message_type(self, msg_type, data):
         if msg_type == "init":
             await self.handle_init(data)
         elif msg_type == "message" and self.pseudo:
@@ -113,26 +149,28 @@ class GameConsumer(AsyncWebsocketConsumer):
         elif msg_type == "join_game":
             await self.handle_join_game()
         elif msg_type == "start_new_round":
-            await self.start_new_round()
+            await self.game_manager.start_new_round()
         elif msg_type == "apply-malus":
             await self.apply_malus(data)
         elif msg_type == "leave_room":
             await self.handle_leave_room()
+        elif msg_type == "timer_sync":
+            await self.handle_timer_sync()
+        elif msg_type == "round_sync":
+            await self.handle_round_sync()
+        elif msg_type == "roster_sync":
+            await self.handle_roster_sync()
 
     # --- Méthodes de traitement des messages ---
     async def handle_init(self, data):
         session_id = data.get("sessionId")
         if not session_id:
-            await self.send(
-                json.dumps({"type": "error", "message": "Session ID manquant"})
-            )
+            await self.send_frame({"type": "error", "message": "Session ID manquant"})
             return
 
         player = await self.get_player(session_id)
         if not player:
-            await self.send(
-                json.dumps({"type": "error", "message": "Session invalide"})
-            )
+            await self.send_frame({"type": "error", "message": "Session invalide"})
             await self.close()
             return
 
@@ -141,21 +179,46 @@ class GameConsumer(AsyncWebsocketConsumer):
         self.session_id = str(player.session_id)
 
         # Si le joueur était en attente de suppression, on annule la suppression
-        remove_task = DISCONNECT_TIMEOUTS.pop(session_id, None)
-        if remove_task:
-            remove_task.cancel()
+        await get_grace_periods().cancel(self.session_id)
+        state = await RoomState.get(self.room_code)
+        state.set_online(self.player_id, True)
+        # Sous-groupe du rôle : événements réservés (mot secret, choix de mots)
+        self.role = await join_role_group(
+            self.channel_layer, self.room_code, self.player_id, self.channel_name
+        )
 
-        await self.send(
-            json.dumps(
-                {
-                    "type": "welcome",
-                    "message": f"Bienvenue dans la room {self.room_code} !",
-                    "playerId": self.player_id,
-                }
-            )
+        # Reprise : le client renvoie l'époque et le dernier numéro reçus
+        event_log = RoomEventLog.get_instance(self.room_group_name)
+        missed = None
+        if data.get("lastSeq") is not None:
+            missed = event_log.since(data.get("epoch"), data["lastSeq"], self.role)
+        if missed is not None:
+            self.replayed_seq = event_log.seq
+
+        await self.send_frame(
+            {
+                "type": "welcome",
+                "message": f"Bienvenue dans la room {self.room_code} !",
+                "playerId": self.player_id,
+                "role": self.role,
+                "epoch": event_log.epoch,
+                "seq": event_log.seq,
+                "resumed": missed is not None,
+            }
         )
 
-        await self.channel_layer.group_send(
+        if missed is not None:
+            # Seuls les événements manqués, déjà encodés, sont renvoyés
+            for event in missed:
+                if event["seq"] not in self.early_seqs:
+                    await self.send_event(event)
+        elif data.get("lastSeq") is not None:
+            # Trou trop grand (ou autre époque) : instantané de la partie
+            await self.handle_join_game()
+        self.early_seqs.clear()
+
+        await group_broadcast(
+            self.channel_layer,
             self.room_group_name,
             {
                 "type": "player_joined",
@@ -170,7 +233,8 @@ class GameConsumer(AsyncWebsocketConsumer):
     async def handle_message(self, data):
         message = data.get("message")
         if message:
-            await self.channel_layer.group_send(
+            await group_broadcast(
+                self.channel_layer,
                 self.room_group_name,
                 {
                     "type": "lobby_message",
@@ -185,14 +249,13 @@ class GameConsumer(AsyncWebsocketConsumer):
 
         await self.reset_game_state()
 
-        # Récupérer la room et les joueurs
-        room = await self.get_room()
-        players = await self.get_room_players()
+        # Récupérer la room et les joueurs (roster complet, diffusé à toute la room)
+        state = await RoomState.get(self.room_code)
+        roster = state.full_roster(published=True)
+        players = roster["players"]
 
         total_rounds = data.get("totalRounds", 2)
-        room.total_rounds = total_rounds
-        room.completed_rounds = 0
-        await database_sync_to_async(room.save)()
+        state.update_room(total_rounds=total_rounds, completed_rounds=0)
 
         # Mélanger aléatoirement les joueurs pour définir l'ordre de jeu
         shuffled_players = players.copy()
@@ -207,23 +270,26 @@ class GameConsumer(AsyncWebsocketConsumer):
         await self.round_manager.start_new_round(first_player)
 
         # Stocke les choix de mots dans la room
-        words = await self.generate_word_choices()
-        await self.set_current_word_choices(words)
+        words = await self.game_manager.generate_word_choices()
+        await self.game_manager.set_current_word_choices(words)
 
         # Informe les joueurs
-        await self.channel_layer.group_send(
+        await group_broadcast(
+            self.channel_layer,
             self.room_group_name,
             {
-                "type": "start_game",
+                "type": "game_started",
                 "currentPlayer": first_player,
                 "wordChoices": words,
                 "timeLeft": 30,
-                "players": players,
+                "currentRound": 0,
+                "totalRounds": total_rounds,
+                **roster,
                 "playerOrder": player_order,
             },
         )
 
-        await self.switch_timer(30, "choice", first_player)
+        await self.game_manager.switch_timer(30, "choice", first_player)
 
     async def handle_word_choice(self, data):
         word = data.get("word")
@@ -243,7 +309,8 @@ class GameConsumer(AsyncWebsocketConsumer):
         )
 
         # Informe les joueurs
-        await self.channel_layer.group_send(
+        await group_broadcast(
+            self.channel_layer,
             self.room_group_name,
             {
                 "type": "word_selected",
@@ -252,50 +319,51 @@ class GameConsumer(AsyncWebsocketConsumer):
             },
         )
 
-        await self.switch_timer(60, "clue", self.player_id)
+        await self.game_manager.switch_timer(60, "clue", self.player_id)
 
     async def handle_give_clue(self, data):
         clue = data.get("clue")
-        if not clue:
+        if not clue or not isinstance(clue, str):
             return
 
-        round = await self.round_manager.get_current_round()
+        round = await self.round_manager.get_current_round_with_player()
+        # Comparaisons sans accents ni casse : "Élève" vaut "eleve"
+        key = normalize_word(clue)
+        if not await self.check_word_length(clue, key):
+            return
 
         # Vérifier si le clue est le mot à deviner
-        if clue.lower() == round.word.lower():
-            await self.send(
-                json.dumps(
-                    {
-                        "type": "error",
-                        "message": "Vous ne pouvez pas donner votre mot comme indice",
-                    }
-                )
+        if key == round["word_key"]:
+            await self.send_frame(
+                {
+                    "type": "error",
+                    "message": "Vous ne pouvez pas donner votre mot comme indice",
+                }
             )
             return
 
         # Vérifie si le clue n'a pas déjà été utilisé comme indice ou comme guess
-        if clue.lower() in [c.lower() for c in round.given_clues]:
-            await self.send(
-                json.dumps({"type": "error", "message": "Cet indice a déjà été donné"})
+        if key in round["clue_keys"]:
+            await self.send_frame(
+                {"type": "error", "message": "Cet indice a déjà été donné"}
             )
             return
 
-        if any(guess["word"].lower() == clue.lower() for guess in round.given_guesses):
-            await self.send(
-                json.dumps(
-                    {
-                        "type": "error",
-                        "message": "Ce mot a déjà été proposé comme réponse, il ne peut pas être utilisé comme indice",
-                    }
-                )
+        if key in round["guess_keys"]:
+            await self.send_frame(
+                {
+                    "type": "error",
+                    "message": "Ce mot a déjà été proposé comme réponse, il ne peut pas être utilisé comme indice",
+                }
             )
             return
 
         # Ajoute l'indice et met à jour la phase
-        await self.round_manager.add_clue(clue)
+        await self.round_manager.add_clue(clue, key)
 
         # Informe les joueurs
-        await self.channel_layer.group_send(
+        await group_broadcast(
+            self.channel_layer,
             self.room_group_name,
             {
                 "type": "clue_given",
@@ -304,52 +372,76 @@ class GameConsumer(AsyncWebsocketConsumer):
             },
         )
 
-        await self.switch_timer(60, "guess", self.player_id)
+        await self.game_manager.switch_timer(60, "guess", self.player_id)
+
+    async def check_word_length(self, word, key):
+        """Refuse un mot trop long pour la base (le mot comme sa forme normalisée)"""
+        if len(word) <= MAX_WORD_LENGTH and len(key) <= MAX_WORD_LENGTH:
+            return True
+        await self.send_frame(
+            {
+                "type": "error",
+                "message": f"Un mot ne peut pas dépasser {MAX_WORD_LENGTH} caractères",
+            }
+        )
+        return False
 
     async def handle_make_guess(self, data):
         guess = data.get("guess")
-        if not guess:
+        if not guess or not isinstance(guess, str):
             return
 
         # Récupère les informations du round de manière asynchrone
         round_info = await self.round_manager.get_current_round_with_player()
-        if not round_info or self.player_id in round_info["guessing_players"]:
+        if (
+            not round_info
+            or round_info["is_completed"]
+            or self.player_id in round_info["guessing_players"]
+        ):
+            return
+
+        key = normalize_word(guess)
+        if not await self.check_word_length(guess, key):
             return
 
         # Ajoute la tentative et met à jour les joueurs ayant deviné
-        given_guesses, guessing_players, timestamp = await self.round_manager.add_guess(
-            self.player_id, guess
+        guess_index, guessing_players, timestamp = await self.round_manager.add_guess(
+            self.player_id, guess, key
         )
 
-        # Informe tous les joueurs de la tentative
-        await self.channel_layer.group_send(
+        # Informe tous les joueurs de la seule nouvelle tentative : un client qui
+        # constate un trou dans guessIndex redemande le round (round_sync)
+        await group_broadcast(
+            self.channel_layer,
             self.room_group_name,
             {
                 "type": "guess_made",
                 "playerId": self.player_id,
                 "guess": guess,
                 "timestamp": timestamp,
-                "allGuesses": given_guesses,
+                "guessIndex": guess_index,
             },
         )
 
         # Vérifie si c'est le bon mot
-        if guess.lower() == round_info["word"].lower():
+        if key == round_info["word_key"]:
             # Le mot est trouvé
             clues_used = len(round_info["given_clues"])
 
             # Attribution des points
             points = clues_used
-            await self.update_score(self.player_id, points)
+            await self.game_manager.update_score(self.player_id, points)
             perfect_guess = (
                 len(round_info["given_clues"]) == round_info["required_clues"]
             )
 
             if perfect_guess:
-                await self.update_score(round_info["current_player"]["id"], points)
+                await self.game_manager.update_score(
+                    round_info["current_player"]["id"], points
+                )
 
             # Marque le round comme terminé
-            await self.send_round_complete(
+            await self.game_manager.send_round_complete(
                 word_found=True,
                 winner={"id": self.player_id, "pseudo": self.pseudo},
                 round_info=round_info,
@@ -357,7 +449,7 @@ class GameConsumer(AsyncWebsocketConsumer):
 
         else:
             # Vérifie si tous les joueurs ont deviné
-            all_players = await self.get_room_players()
+            all_players = await self.game_manager.get_room_players()
             non_current_players = [
                 p["id"]
                 for p in all_players
@@ -366,204 +458,154 @@ class GameConsumer(AsyncWebsocketConsumer):
 
             if len(guessing_players) >= len(non_current_players):
                 if len(round_info["given_clues"]) >= round_info["required_clues"]:
-                    await self.send_round_complete(
+                    await self.game_manager.send_round_complete(
                         word_found=False, round_info=round_info
                     )
                 else:
-                    await self.switch_timer(
+                    await self.game_manager.switch_timer(
                         60, "clue", round_info["current_player"]["id"]
                     )
 
+    async def handle_timer_sync(self):
+        """Renvoie l'échéance du timer en cours au seul client qui la demande"""
+        timer_state = await self.timer_manager.get_timer_state()
+        if timer_state:
+            await self.send_frame({"type": "timer_update", **timer_state})
+
+    async def handle_round_sync(self):
+        """
+        Renvoie l'état compact du round au seul client qui le demande. `seq` est
+        celui du dernier événement diffusé : les trames reçues avec un seq
+        inférieur ou égal sont déjà comprises dans l'état.
+        """
+        snapshot = await self.round_manager.get_round_snapshot()
+        if snapshot:
+            event_log = RoomEventLog.get_instance(self.room_group_name)
+            await self.send_frame(
+                {
+                    "type": "round_snapshot",
+                    "epoch": event_log.epoch,
+                    "seq": event_log.seq,
+                    **snapshot,
+                }
+            )
+
+    async def handle_roster_sync(self):
+        """Roster complet pour un client dont la version est dépassée"""
+        state = await RoomState.get(self.room_code)
+        if state:
+            await self.send_frame({"type": "roster", **state.full_roster()})
+
     async def handle_join_game(self):
         round_data = await self.round_manager.get_current_round_with_player()
         room = await self.get_room()
 
         if round_data:
             # Récupère les choix de mots actuels
-            word_choices = await self.get_current_word_choices()
+            word_choices = await self.game_manager.get_current_word_choices()
             player_order = await self.round_manager.get_player_order()
+            timer_state = await self.timer_manager.get_timer_state() or {}
+
+            frame = {
+                "type": "game_started",
+                "currentPlayer": round_data["current_player"]["id"],
+                "wordChoices": word_choices,
+                "timeLeft": timer_state.get("timeLeft", 30),
+                "deadline": timer_state.get("deadline"),
+                "serverTime": timer_state.get("serverTime"),
+                "phase": round_data["phase"],
+                "givenClues": round_data["given_clues"],
+                "guesses": round_data["given_guesses"],
+                "requiredClues": round_data["required_clues"],
+                "currentRound": room.completed_rounds,
+                "totalRounds": room.total_rounds,
+                "playerOrder": player_order,
+            }
 
-            text_data = json.dumps(
-                {
-                    "type": "game_started",
-                    "currentPlayer": round_data["current_player"]["id"],
-                    "wordChoices": word_choices,
-                    "timeLeft": 30,
-                    "phase": round_data["phase"],
-                    "givenClues": round_data["given_clues"],
-                    "guesses": round_data["given_guesses"],
-                    "requiredClues": round_data["required_clues"],
-                    "currentRound": room.completed_rounds,
-                    "totalRounds": room.total_rounds,
-                    "playerOrder": player_order,
-                }
+            # Les choix de mots ne sont envoyés qu'au joueur qui donne les indices
+            is_clue_giver = round_data["current_player"]["id"] == getattr(
+                self, "player_id", None
             )
+            frame = scope_frame(frame, CLUE_GIVER if is_clue_giver else GUESSERS)
 
-            print(f"Sending game state to {self.pseudo}: {text_data}")
+            print(f"Sending game state to {self.pseudo}: {frame}")
 
             # Envoie l'état actuel du jeu au joueur qui rejoint
-            await self.send(text_data=text_data)
+            await self.send_frame(frame)
 
     async def apply_malus(self, data):
         target_player_pseudo = data.get("targetPlayerPseudo")
         if not target_player_pseudo:
-            await self.send(
-                text_data=json.dumps(
-                    {"type": "error", "message": "Pseudo cible manquant"}
-                )
-            )
+            await self.send_frame({"type": "error", "message": "Pseudo cible manquant"})
             return
 
         round_info = await self.round_manager.get_current_round_with_player()
         if not round_info or not round_info["can_malus"]:
-            await self.send(
-                text_data=json.dumps(
-                    {"type": "error", "message": "Malus non applicable"}
-                )
-            )
+            await self.send_frame({"type": "error", "message": "Malus non applicable"})
             return
 
         # Récupération du pseudo du joueur cible via son pseudo
-        old_players = await self.get_room_players()
+        old_players = await self.game_manager.get_room_players()
         target_player = next(
             (p for p in old_players if p["pseudo"] == target_player_pseudo), None
         )
         if not target_player:
-            await self.send(
-                text_data=json.dumps(
-                    {"type": "error", "message": "Joueur cible introuvable"}
-                )
+            await self.send_frame(
+                {"type": "error", "message": "Joueur cible introuvable"}
             )
             return
 
         # Applique le malus si le joueur cible n'est pas à 0
         if target_player["score"] <= 0:
-            await self.send(
-                text_data=json.dumps(
-                    {"type": "error", "message": "Le joueur cible est déjà à 0 points"}
-                )
+            await self.send_frame(
+                {"type": "error", "message": "Le joueur cible est déjà à 0 points"}
             )
             return
 
-        await self.update_score(target_player["id"], -1)
-
-        # Récupère les joueurs mis à jour
-        updated_players = await self.get_room_players()
+        await self.game_manager.update_score(target_player["id"], -1)
 
         # Informe les joueurs
-        await self.channel_layer.group_send(
+        await group_broadcast(
+            self.channel_layer,
             self.room_group_name,
             {
                 "type": "round_complete",
                 "malusApplied": True,
                 "message": f"{self.pseudo} a appliqué un malus à {target_player_pseudo}",
-                "players": updated_players,
+                **await self.game_manager.get_roster_delta(),
             },
         )
 
     async def handle_leave_room(self):
         # Suppression immédiate, sans délai
-        session_id = getattr(self, "session_id", None)
-        player_id = getattr(self, "player_id", None)
-        pseudo = getattr(self, "pseudo", None)
-
-        if session_id:
-            remove_task = DISCONNECT_TIMEOUTS.pop(session_id, None)
-            if remove_task:
-                remove_task.cancel()
-
-        player = await self.get_player(session_id)
-        was_owner = player and player.is_owner
-
-        await self.channel_layer.group_send(
-            self.room_group_name,
-            {
-                "type": "player_left",
-                "player": {
-                    "id": player_id,
-                    "pseudo": pseudo,
-                },
-            },
-        )
-
-        if was_owner:
-            new_owner = await self.transfer_ownership()
-            if new_owner:
-                await self.channel_layer.group_send(
-                    self.room_group_name,
-                    {
-                        "type": "owner_changed",
-                        "player": {
-                            "id": str(new_owner.id),
-                            "pseudo": new_owner.pseudo,
-                            "is_owner": True,
-                        },
-                    },
-                )
-
-        await self.remove_player()
+        if hasattr(self, "player_id"):
+            await get_grace_periods().cancel(self.session_id)
+            await remove_players(self.room_code, [self.player_id])
         await self.close()
 
-    # --- Méthodes d'accès à la base de données ---
-    @database_sync_to_async
-    def get_room(self):
-        GameRoom = apps.get_model("game", "GameRoom")
-        try:
-            return GameRoom.objects.get(code=self.room_code)
-        except GameRoom.DoesNotExist:
-            return None
-
-    @database_sync_to_async
-    def get_player(self, session_id):
-        Player = apps.get_model("game", "Player")
-        try:
-            return Player.objects.get(session_id=session_id, room__code=self.room_code)
-        except Player.DoesNotExist:
-            return None
+    # --- Méthodes d'accès aux données (état en mémoire de la room) ---
+    async def get_room(self):
+        state = await RoomState.get(self.room_code)
+        return state.room if state else None
 
-    @database_sync_to_async
-    def get_room_players(self):
-        GameRoom = apps.get_model("game", "GameRoom")
-        room = GameRoom.objects.get(code=self.room_code)
-        return [
-            {
-                "id": str(player.id),
-                "pseudo": player.pseudo,
-                "is_owner": player.is_owner,
-                "score": player.score,
-            }
-            for player in room.players.all()
-        ]
-
-    @database_sync_to_async
-    def is_room_owner(self):
-        Player = apps.get_model("game", "Player")
-        try:
-            player = Player.objects.get(id=self.player_id)
-            return player.is_owner
-        except Player.DoesNotExist:
-            return False
-
-    @database_sync_to_async
-    def transfer_ownership(self):
-        GameRoom = apps.get_model("game", "GameRoom")
-        try:
-            room = GameRoom.objects.get(code=self.room_code)
-            new_owner = room.players.filter(is_owner=False).first()
-            if new_owner:
-                room.players.filter(is_owner=True).update(is_owner=False)
-                new_owner.is_owner = True
-                new_owner.save()
-                return new_owner
+    async def get_player(self, session_id):
+        state = await RoomState.get(self.room_code)
+        if not state:
             return None
-        except GameRoom.DoesNotExist:
-            return None
-
-    @database_sync_to_async
-    def get_word_choice(self, word):
-        GameRoom = apps.get_model("game", "GameRoom")
-        room = GameRoom.objects.get(code=self.room_code)
-        word_choices = room.current_word_choices
+        player = state.get_player_by_session(session_id)
+        if player is None:
+            # Absent du roster (inscription concurrente au chargement) : une requête
+            await state.sync_players(from_db=True)
+            player = state.get_player_by_session(session_id)
+        return player
+
+    async def is_room_owner(self):
+        state = await RoomState.get(self.room_code)
+        player = state.get_player(self.player_id) if state else None
+        return bool(player and player.is_owner)
+
+    async def get_word_choice(self, word):
+        word_choices = await self.game_manager.get_current_word_choices()
         if word_choices:
             if word == word_choices["word1"]["word"]:
                 return word_choices["word1"]
@@ -571,328 +613,100 @@ class GameConsumer(AsyncWebsocketConsumer):
                 return word_choices["word2"]
         return None
 
-    @database_sync_to_async
-    def update_score(self, player_id, points):
-        Player = apps.get_model("game", "Player")
-        player = Player.objects.get(id=player_id)
-        score = (player.score or 0) + points
-        if score < 0:
-            score = 0
-        player.score = score
-        player.save()
-
-    @database_sync_to_async
-    def generate_word_choices(self):
-        # Sélectionner deux mots différents au hasard
-        word1, word2 = random.sample(WORDS, 2)
-
-        # Générer deux nombres d'indices différents entre 1 et 5
-        indices_possibles = list(range(1, 6))
-        nb_indices1 = random.choice(indices_possibles)
-        indices_possibles.remove(nb_indices1)
-        nb_indices2 = random.choice(indices_possibles)
-        while nb_indices2 == nb_indices1:
-            nb_indices2 = random.choice(indices_possibles)
-
-        # Tirage d'un malus qui permettra au joueur d'infliger -1 point à un autre joueur, 20% de chance séparé entre les deux mots
-        malus_rate = random.random()
-        malus_word1 = False
-        malus_word2 = False
-        if malus_rate < 0.1:
-            malus_word1 = True
-        elif malus_rate > 0.9:
-            malus_word2 = True
-
-        return {
-            "word1": {"word": word1, "clues": nb_indices1, "malus": malus_word1},
-            "word2": {"word": word2, "clues": nb_indices2, "malus": malus_word2},
-        }
-
-    @database_sync_to_async
-    def remove_player(self):
-        Player = apps.get_model("game", "Player")
-        try:
-            player = Player.objects.get(id=self.player_id)
-            player.delete()
-        except Player.DoesNotExist:
-            pass
-
-    @database_sync_to_async
-    def set_current_word_choices(self, word_choices):
-        GameRoom = apps.get_model("game", "GameRoom")
-        room = GameRoom.objects.get(code=self.room_code)
-        room.current_word_choices = word_choices
-        room.save()
-
-    @database_sync_to_async
-    def get_current_word_choices(self):
-        GameRoom = apps.get_model("game", "GameRoom")
-        try:
-            room = GameRoom.objects.get(code=self.room_code)
-            return room.current_word_choices
-        except GameRoom.DoesNotExist:
-            return None
-
-    @database_sync_to_async
-    def reset_game_state(self):
-        GameRoom = apps.get_model("game", "GameRoom")
-        Player = apps.get_model("game", "Player")
-
-        # Récupérer la room de manière synchrone
-        room = GameRoom.objects.get(code=self.room_code)
+    async def reset_game_state(self):
+        state = await RoomState.get(self.room_code)
+        await state.reset_game()
 
-        # Reset les scores des joueurs d'abord
-        Player.objects.filter(room=room).update(score=0)
-
-        # Supprimer tous les rounds
-        room.rounds.all().delete()
-
-        # Reset la room ensuite
-        room.current_word_choices = None
-        room.current_turn = 0
-        room.current_round = None
-        room.completed_rounds = 0
-        room.save()
+    async def send_frame(self, frame):
+        """Envoie une trame à ce seul client, dans le format négocié"""
+        if self.codec.binary:
+            await self.send(bytes_data=self.codec.encode(frame))
+        else:
+            await self.send(text_data=self.codec.encode(frame))
 
     # --- Gestionnaires d'événements ---
     async def game_message(self, event):
-        await self.send(
-            text_data=json.dumps(
-                {
-                    "type": "game_message",
-                    "message": event["message"],
-                    "player": event["player"],
-                }
-            )
-        )
-
-    async def player_joined(self, event):
-        await self.send(
-            text_data=json.dumps({"type": "player_joined", "player": event["player"]})
-        )
-
-    async def player_left(self, event):
-        await self.send(
-            text_data=json.dumps({"type": "player_left", "player": event["player"]})
-        )
-
-    async def lobby_message(self, event):
-        await self.send(
-            text_data=json.dumps(
-                {
-                    "type": "lobby_message",
-                    "message": event["message"],
-                    "player": event["player"],
-                }
-            )
-        )
-
-    async def start_game(self, event):
-        room = await self.get_room()
-        await self.send(
-            text_data=json.dumps(
-                {
-                    "type": "game_started",
-                    "currentPlayer": event["currentPlayer"],
-                    "wordChoices": event["wordChoices"],
-                    "timeLeft": event["timeLeft"],
-                    "currentRound": room.completed_rounds,
-                    "totalRounds": room.total_rounds,
-                    "players": event["players"],
-                    "playerOrder": event.get("playerOrder", []),
-                }
-            )
-        )
-
-    async def owner_changed(self, event):
-        await self.send(
-            text_data=json.dumps({"type": "owner_changed", "player": event["player"]})
+        await self.send_frame(
+            {
+                "type": "game_message",
+                "message": event["message"],
+                "player": event["player"],
+            }
         )
 
-    async def word_selected(self, event):
-        await self.send(text_data=json.dumps(event))
+    async def broadcast(self, event):
+        """Trame de groupe déjà sérialisée par l'émetteur : renvoyée telle quelle"""
+        if not hasattr(self, "player_id"):
+            self.early_seqs.add(event["seq"])
+        elif event["seq"] <= self.replayed_seq:
+            return  # Déjà renvoyé avec les événements manqués
+        await self.send_event(event)
+
+    async def send_event(self, event):
+        """Envoie un événement numéroté du journal dans le format négocié"""
+        if self.codec.binary:
+            await self.send(bytes_data=event_payload(event, self.codec))
+        else:
+            await self.send(text_data=event_payload(event, self.codec))
 
-    async def clue_given(self, event):
-        await self.send(text_data=json.dumps(event))
 
-    async def guess_made(self, event):
-        await self.send(text_data=json.dumps(event))
+class SpectatorConsumer(AsyncWebsocketConsumer):
+    """
+    Spectateur d'une room (ws/game/<code>/spectate/) : ne rejoint pas le
+    groupe des joueurs et ne reçoit que les instantanés de SpectatorFeed.
+    """
 
-    async def timer_update(self, event):
-        await self.send(
-            text_data=json.dumps(
-                {
-                    "type": "timer_update",
-                    "timeLeft": event["timeLeft"],
-                    "phase": event["phase"],
-                    "currentPlayer": event["currentPlayer"],
-                }
+    async def connect(self):
+        self.room_code = self.scope["url_route"]["kwargs"]["room_code"]
+        self.feed = None
+        self.codec = negotiate(self.scope.get("subprotocols"))
+
+        # Les spectateurs suivent la room sur le worker qui la détient
+        endpoint = await remote_endpoint(self.room_code)
+        if endpoint:
+            await self.accept(subprotocol=self.codec.subprotocol)
+            await self.send_frame(
+                {"type": "shard_moved", "wsUrl": f"{endpoint}spectate/"}
             )
-        )
-
-    async def timer_end(self, event):
-        """
-        Annule le timer existant et en démarre un nouveau.
-        """
-        round_info = await self.round_manager.get_current_round_with_player()
-        if not round_info:
+            await self.close()
             return
 
-        current_phase = round_info["phase"]
-        print("Timer end")
-
-        if current_phase == "choice":
-            # Le joueur n'a pas choisi de mot
-            await self.start_new_round()
-        elif current_phase == "clue":
-            # Le joueur n'a pas donné d'indice
-            await self.update_score(
-                round_info["current_player"]["id"], -round_info["required_clues"]
-            )
-            await self.send_round_complete(
-                word_found=False, round_info=round_info, clue_missing=True
-            )
-        elif current_phase == "guess":
-            if len(round_info["given_clues"]) >= round_info["required_clues"]:
-                # Tous les indices ont été donnés, fin du round
-                await self.send_round_complete(word_found=False, round_info=round_info)
-            else:
-                # Retour à la phase d'indices
-                await self.switch_timer(60, "clue", round_info["current_player"]["id"])
-
-    async def new_round(self, event):
-        """Gestionnaire pour l'événement new_round"""
-        await self.send(
-            text_data=json.dumps(
-                {
-                    "type": "new_round",
-                    "nextPlayer": event["nextPlayer"],
-                    "wordChoices": event["wordChoices"],
-                    "players": event["players"],
-                    "currentRound": event["currentRound"],
-                    "totalRounds": event["totalRounds"],
-                    "playerOrder": event.get("playerOrder", []),
-                }
-            )
-        )
-
-    async def round_complete(self, event):
-        """Gestionnaire pour l'événement round_complete"""
-        await self.send(text_data=json.dumps(event))
-
-    async def game_end(self, event):
-        """Gestionnaire pour l'événement game_end"""
-        await self.send(
-            text_data=json.dumps(
-                {
-                    "type": "game_end",
-                    "players": event["players"],
-                }
-            )
-        )
-
-    # === Méthodes utilitaires ===
-    async def switch_timer(self, duration, phase, current_player):
-        """
-        Annule le timer existant et en démarre un nouveau.
-        """
-        await self.timer_manager.cancel_timer()
-        await self.round_manager.update_phase(phase)
-        round = await self.round_manager.get_current_round()
-        print(round.phase)
-        await self.timer_manager.switch_timer(duration, phase, current_player)
-
-    async def start_new_round(self):
-        room = await self.get_room()
-        room.completed_rounds += 1
-        await database_sync_to_async(room.save)()
-
-        number_of_players = len(await self.get_room_players())
-
-        if room.completed_rounds >= room.total_rounds * number_of_players:
-            # Fin de la partie
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {"type": "game_end", "players": await self.get_room_players()},
-            )
+        if not await RoomState.get(self.room_code):
+            await self.close()
             return
 
-        # Récupérer le round actuel avec les infos joueur
-        round_info = await self.round_manager.get_current_round_with_player()
-
-        # Récupérer l'ordre des joueurs
-        player_order = await self.round_manager.get_player_order()
-
-        # Trouver l'index du joueur actuel dans l'ordre
-        current_player_index = player_order.index(round_info["current_player"]["id"])
-
-        # Déterminer le prochain joueur dans l'ordre
-        next_player = player_order[(current_player_index + 1) % len(player_order)]
-
-        # Générer de nouveaux mots pour le prochain tour
-        new_words = await self.generate_word_choices()
-
-        # Stocker les nouveaux choix de mots
-        await self.set_current_word_choices(new_words)
-
-        # Créer un nouveau round pour le prochain joueur
-        await self.round_manager.start_new_round(next_player)
-
-        # Récupérer les scores mis à jour
-        updated_players = await self.get_room_players()
-
-        # Informer tous les joueurs du début du nouveau round
-        await self.channel_layer.group_send(
-            self.room_group_name,
-            {
-                "type": "new_round",
-                "nextPlayer": next_player,
-                "wordChoices": new_words,
-                "players": updated_players,
-                "currentRound": room.completed_rounds // number_of_players + 1,
-                "totalRounds": room.total_rounds,
-                "playerOrder": player_order,
-            },
-        )
-
-        # Démarrer le nouveau timer pour la phase de choix
-        await self.switch_timer(30, "choice", next_player)
-
-    async def send_round_complete(
-        self, word_found=False, winner=None, round_info=None, clue_missing=False
-    ):
-        """Méthode utilitaire pour envoyer un message de fin de round"""
-        if not round_info:
-            round_info = await self.round_manager.get_current_round_with_player()
+        await self.accept(subprotocol=self.codec.subprotocol)
+        self.feed = SpectatorFeed.get_instance(f"game_{self.room_code}")
+        latest = await self.feed.join(self)
+        if latest is None:
+            # Room supprimée pendant la connexion
+            self.feed.leave(self)
+            self.feed = None
+            await self.close(code=ROOM_GONE)
+            return
+        await self.broadcast(latest)
 
-        # Marquer le round comme terminé
-        await self.round_manager.complete_round(
-            word_found=word_found, winner_id=winner.get("id") if winner else None
-        )
+    async def disconnect(self, close_code):
+        if self.feed:
+            self.feed.leave(self)
+            if not self.feed.viewers:
+                await RoomActor.get_instance(self.room_code).submit(
+                    SpectatorFeed.unload_room, self.room_code
+                )
 
-        # Récupérer les scores mis à jour
-        updated_players = await self.get_room_players()
+    async def receive(self, text_data=None, bytes_data=None):
+        # Lecture seule : les messages des spectateurs sont ignorés
+        pass
 
-        perfect = (
-            True
-            if winner and len(round_info["given_clues"]) == round_info["required_clues"]
-            else False
-        )
+    async def send_frame(self, frame):
+        if self.codec.binary:
+            await self.send(bytes_data=self.codec.encode(frame))
+        else:
+            await self.send(text_data=self.codec.encode(frame))
 
-        # Construction du message de base
-        message = {
-            "type": "round_complete",
-            "winner": winner,
-            "clueMissing": clue_missing,
-            "word": round_info["word"],
-            "cluesCount": len(round_info["given_clues"]),
-            "requiredClues": round_info["required_clues"],
-            "currentPlayer": round_info["current_player"],
-            "canMalus": round_info["can_malus"],
-            "perfect": perfect,
-            "players": updated_players,
-        }
-
-        # Envoyer le message
-        await self.channel_layer.group_send(self.room_group_name, message)
-        await self.timer_manager.cancel_timer()
+    async def broadcast(self, event):
+        """Instantané (ou trame) déjà encodé par SpectatorFeed, dans le format négocié"""
+        if self.codec.binary:
+            await self.send(bytes_data=event_payload(event, self.codec))
+        else:
+            await self.send(text_data=event_payload(event, self.codec))
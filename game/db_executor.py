@@ -0,0 +1,224 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseExecutorMetrics:
+    """Compteurs de l'exécuteur : profondeur de file, attente et durée des tâches"""
+
+    SAMPLES = 1000  # Nombre de mesures récentes gardées pour les percentiles
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.busy_workers = 0
+        self.waits = deque(maxlen=self.SAMPLES)
+        self.durations = deque(maxlen=self.SAMPLES)
+
+    def task_submitted(self):
+        with self._lock:
+            self.submitted += 1
+            self.queue_depth += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+
+    def task_started(self, wait):
+        with self._lock:
+            self.queue_depth -= 1
+            self.busy_workers += 1
+            self.waits.append(wait)
+
+    def task_finished(self, duration, failed):
+        with self._lock:
+            self.busy_workers -= 1
+            self.completed += 1
+            self.failed += failed
+            self.durations.append(duration)
+
+    @staticmethod
+    def _percentile(values, p):
+        if not values:
+            return 0.0
+        values = sorted(values)
+        return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+    def snapshot(self):
+        """Instantané des métriques (durées en millisecondes)"""
+        with self._lock:
+            waits = list(self.waits)
+            durations = list(self.durations)
+            snapshot = {
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "queue_depth": self.queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+                "busy_workers": self.busy_workers,
+            }
+        for name, values in (("wait", waits), ("duration", durations)):
+            for p in (50, 95, 99):
+                snapshot[f"{name}_p{p}_ms"] = self._percentile(values, p) * 1000
+            snapshot[f"{name}_max_ms"] = max(values, default=0.0) * 1000
+        return snapshot
+
+
+class DatabaseExecutor:
+    """
+    Pool borné de threads pour les requêtes ORM des consumers.
+
+    Contrairement à `database_sync_to_async` (thread_sensitive=True), qui passe
+    toutes les requêtes du processus sur un seul thread, les requêtes de rooms
+    différentes s'exécutent en parallèle sur `max_workers` threads. Les tâches
+    d'une même room restent exécutées une à une, dans l'ordre de soumission.
+
+    Chaque thread a sa propre connexion : elle est recyclée avant et après
+    chaque tâche selon CONN_MAX_AGE (comme une requête HTTP) et fermée à l'arrêt.
+    """
+
+    def __init__(self, max_workers=4, wait_warning=0.5):
+        self.max_workers = max_workers
+        self.wait_warning = wait_warning  # Attente (s) au-delà de laquelle on avertit
+        self.metrics = DatabaseExecutorMetrics()
+        self._queue = queue.SimpleQueue()
+        self._threads = []
+        self._start_lock = threading.Lock()
+        # {room_code: future résolue quand la dernière tâche de la room est finie}
+        self._lanes = {}
+
+    # --- Soumission (boucle asyncio) ---
+    async def run(self, room_code, func, *args, **kwargs):
+        """
+        Exécute func(*args, **kwargs) dans un thread du pool et retourne son
+        résultat. Avec room_code=None, la tâche n'attend aucune autre tâche.
+        """
+        if room_code is None:
+            return await asyncio.shield(self._submit(func, args, kwargs))
+
+        loop = asyncio.get_running_loop()
+        previous = self._lanes.get(room_code)
+        turn = loop.create_future()
+        self._lanes[room_code] = turn
+
+        def release(future):
+            if not future.cancelled():
+                future.exception()  # Évite l'avertissement « exception never retrieved »
+            if not turn.done():
+                turn.set_result(None)
+            if self._lanes.get(room_code) is turn:
+                del self._lanes[room_code]
+
+        if previous is not None:
+            try:
+                await asyncio.shield(previous)
+            except asyncio.CancelledError:
+                # La tâche suivante de la room attendra quand même la précédente
+                previous.add_done_callback(release)
+                raise
+
+        job = self._submit(func, args, kwargs)
+        # Le tour de la room n'est libéré qu'à la fin réelle de la tâche, même si
+        # l'appelant est annulé entre-temps
+        job.add_done_callback(release)
+        return await asyncio.shield(job)
+
+    def _submit(self, func, args, kwargs):
+        self._ensure_workers()
+        loop = asyncio.get_running_loop()
+        job = loop.create_future()
+        self.metrics.task_submitted()
+        self._queue.put((loop, job, func, args, kwargs, time.monotonic()))
+        return job
+
+    # --- Threads ---
+    def _ensure_workers(self):
+        if len(self._threads) == self.max_workers:
+            return
+        with self._start_lock:
+            while len(self._threads) < self.max_workers:
+                thread = threading.Thread(
+                    target=self._work,
+                    name=f"db-executor-{len(self._threads)}",
+                    daemon=True,
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            loop, job, func, args, kwargs, submitted = item
+
+            started = time.monotonic()
+            wait = started - submitted
+            self.metrics.task_started(wait)
+            if wait > self.wait_warning:
+                logger.warning(
+                    "Tâche base de données en attente depuis %.0f ms (file : %s)",
+                    wait * 1000,
+                    self.metrics.queue_depth,
+                )
+
+            close_old_connections()
+            try:
+                outcome = (_set_result, func(*args, **kwargs))
+            except BaseException as exc:
+                outcome = (_set_exception, exc)
+            finally:
+                close_old_connections()
+            # Métriques à jour avant que l'appelant ne reprenne la main
+            self.metrics.task_finished(
+                time.monotonic() - started, outcome[0] is _set_exception
+            )
+            _notify(loop, outcome[0], job, outcome[1])
+        connections.close_all()
+
+    def shutdown(self, wait=True):
+        """Arrête les threads (après les tâches en file) et ferme leurs connexions"""
+        with self._start_lock:
+            threads, self._threads = self._threads, []
+            for _ in threads:
+                self._queue.put(None)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+
+def _notify(loop, callback, job, value):
+    try:
+        loop.call_soon_threadsafe(callback, job, value)
+    except RuntimeError:
+        pass  # Boucle fermée entre-temps : plus personne n'attend le résultat
+
+
+def _set_result(job, result):
+    if not job.done():
+        job.set_result(result)
+
+
+def _set_exception(job, exc):
+    if not job.done():
+        job.set_exception(exc)
+
+
+_executor = None
+
+
+def get_db_executor():
+    """Retourne l'exécuteur configuré par DB_EXECUTOR (un par processus)"""
+    global _executor
+    if _executor is None:
+        _executor = DatabaseExecutor(**getattr(settings, "DB_EXECUTOR", {}))
+    return _executor
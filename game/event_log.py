@@ -0,0 +1,107 @@
+import uuid
+from collections import Counter, deque
+
+from django.conf import settings
+
+from .protocol import encode_for_group, frame_format
+
+
+class RoomEventLog:
+    """
+    Journal des événements diffusés au groupe d'une room.
+
+    Chaque événement reçoit un numéro de séquence croissant et reste dans un
+    tampon circulaire borné (EVENT_BUFFER_SIZE), déjà encodé : un client qui se
+    reconnecte reçoit uniquement les événements manqués. Seuls les formats
+    (JSON, msgpack) des clients connectés sont encodés. Un événement réservé
+    à certains rôles (voir roles.EVENT_AUDIENCES) garde un seul numéro et une
+    version encodée par rôle. L'époque change à
+    chaque création du journal (redémarrage, room recréée) ; un client d'une
+    autre époque doit repartir d'un instantané.
+    """
+
+    _instances = {}
+
+    @classmethod
+    def get_instance(cls, group_name):
+        if group_name not in cls._instances:
+            cls._instances[group_name] = cls(group_name)
+        return cls._instances[group_name]
+
+    @classmethod
+    def discard(cls, group_name):
+        cls._instances.pop(group_name, None)
+
+    def __init__(self, group_name):
+        self.group_name = group_name
+        self.epoch = uuid.uuid4().hex[:8]
+        self.seq = 0
+        self.events = deque(maxlen=getattr(settings, "EVENT_BUFFER_SIZE", 256))
+        self.clients = Counter()  # {format: consumers connectés au groupe}
+
+    def add_client(self, codec):
+        self.clients[frame_format(codec)] += 1
+
+    def remove_client(self, codec):
+        if self.clients[frame_format(codec)] > 0:
+            self.clients[frame_format(codec)] -= 1
+
+    @property
+    def formats(self):
+        """Formats à encoder : ceux des clients connectés (JSON sans client)"""
+        return [key for key, count in self.clients.items() if count] or ["text"]
+
+    def append(self, frame):
+        """Numérote et encode la trame ; retourne l'événement à diffuser"""
+        self.seq += 1
+        event = {
+            "seq": self.seq,
+            **encode_for_group({**frame, "seq": self.seq}, self.formats),
+        }
+        self.events.append(event)
+        return event
+
+    def append_scoped(self, frames):
+        """
+        Numérote un événement décliné par rôle ({rôle: trame}) ; chaque trame
+        distincte n'est encodée qu'une fois. Retourne {rôle: événement}.
+        """
+        self.seq += 1
+        formats = self.formats
+        encoded = {}
+        events = {}
+        for role, frame in frames.items():
+            # Les versions ne diffèrent que par les champs retirés
+            key = tuple(frame)
+            if key not in encoded:
+                encoded[key] = {
+                    "seq": self.seq,
+                    **encode_for_group({**frame, "seq": self.seq}, formats),
+                }
+            events[role] = encoded[key]
+        self.events.append({"seq": self.seq, "roles": events})
+        return events
+
+    def since(self, epoch, last_seq, role=None):
+        """
+        Événements postérieurs à last_seq, dans la version du rôle donné, ou
+        None si le client doit repartir d'un instantané (autre époque, ou
+        événements déjà sortis du tampon)
+        """
+        if epoch != self.epoch or last_seq > self.seq:
+            return None
+        if last_seq == self.seq:
+            return []
+        if not self.events or self.events[0]["seq"] > last_seq + 1:
+            return None
+        # Les numéros se suivent : on saute directement au premier événement manqué
+        start = len(self.events) - (self.seq - last_seq)
+        missed = []
+        for i in range(start, len(self.events)):
+            event = self.events[i]
+            if "roles" in event:
+                # Événement réservé : la version du rôle, s'il en a une
+                event = event["roles"].get(role)
+            if event:
+                missed.append(event)
+        return missed
@@ -0,0 +1,224 @@
+import random
+
+from channels.layers import get_channel_layer
+from django.conf import settings
+
+from .broadcast import group_broadcast
+from .room_state import RoomState
+from .round_manager import RoundManager
+from .scheduler import get_scheduler
+from .timer_manager import RoomTimerManager
+
+# Nombre de joueurs du classement envoyé en fin de round et de partie
+LEADERBOARD_SIZE = getattr(settings, "LEADERBOARD_SIZE", 10)
+
+
+class GameManager:
+    """
+    Déroulement de la partie d'une room (fin de timer, rounds, scores).
+
+    Ne dépend d'aucun consumer : les fins de timer sont traitées par
+    n'importe quel worker ayant réclamé l'échéance.
+    """
+
+    def __init__(self, room_code):
+        self.room_code = room_code
+        self.room_group_name = f"game_{room_code}"
+        self.round_manager = RoundManager(room_code)
+        self.timer_manager = RoomTimerManager.get_instance(room_code)
+
+    async def get_room_players(self):
+        state = await RoomState.get(self.room_code)
+        return state.players_list() if state else []
+
+    async def get_roster_delta(self):
+        """Joueurs changés depuis le dernier événement diffusé (voir RoomState.roster_delta)"""
+        state = await RoomState.get(self.room_code)
+        return state.roster_delta()
+
+    async def update_score(self, player_id, points):
+        state = await RoomState.get(self.room_code)
+        state.add_points(player_id, points)
+
+    async def get_leaderboard(self):
+        """Top du classement, tenu à jour à chaque changement de score"""
+        state = await RoomState.get(self.room_code)
+        return state.leaderboard.top(LEADERBOARD_SIZE) if state else []
+
+    async def generate_word_choices(self):
+        # Tirer deux mots différents du paquet de la room (sans accès à la base)
+        state = await RoomState.get(self.room_code)
+        word1, word2 = (word.text for word in state.word_deck.draw(2))
+
+        # Générer deux nombres d'indices différents entre 1 et 5
+        indices_possibles = list(range(1, 6))
+        nb_indices1 = random.choice(indices_possibles)
+        indices_possibles.remove(nb_indices1)
+        nb_indices2 = random.choice(indices_possibles)
+        while nb_indices2 == nb_indices1:
+            nb_indices2 = random.choice(indices_possibles)
+
+        # Tirage d'un malus qui permettra au joueur d'infliger -1 point à un autre joueur, 20% de chance séparé entre les deux mots
+        malus_rate = random.random()
+        malus_word1 = False
+        malus_word2 = False
+        if malus_rate < 0.1:
+            malus_word1 = True
+        elif malus_rate > 0.9:
+            malus_word2 = True
+
+        return {
+            "word1": {"word": word1, "clues": nb_indices1, "malus": malus_word1},
+            "word2": {"word": word2, "clues": nb_indices2, "malus": malus_word2},
+        }
+
+    async def set_current_word_choices(self, word_choices):
+        state = await RoomState.get(self.room_code)
+        state.update_room(current_word_choices=word_choices)
+
+    async def get_current_word_choices(self):
+        state = await RoomState.get(self.room_code)
+        return state.room.current_word_choices if state else None
+
+    # --- Déroulement de la partie ---
+    async def timer_end(self, event):
+        """
+        Fin d'un timer de phase : passe à la suite selon la phase du round.
+        """
+        # Une commande passée avant dans la file a pu relancer un autre timer
+        timer = await get_scheduler().get_timer(self.room_code)
+        if timer and timer["timer_id"] != event.get("timer_id"):
+            return
+
+        round_info = await self.round_manager.get_current_round_with_player()
+        if not round_info:
+            return
+
+        current_phase = round_info["phase"]
+        print("Timer end")
+
+        if current_phase == "choice":
+            # Le joueur n'a pas choisi de mot
+            await self.start_new_round()
+        elif current_phase == "clue":
+            # Le joueur n'a pas donné d'indice
+            await self.update_score(
+                round_info["current_player"]["id"], -round_info["required_clues"]
+            )
+            await self.send_round_complete(
+                word_found=False, round_info=round_info, clue_missing=True
+            )
+        elif current_phase == "guess":
+            if len(round_info["given_clues"]) >= round_info["required_clues"]:
+                # Tous les indices ont été donnés, fin du round
+                await self.send_round_complete(word_found=False, round_info=round_info)
+            else:
+                # Retour à la phase d'indices
+                await self.switch_timer(60, "clue", round_info["current_player"]["id"])
+
+    async def switch_timer(self, duration, phase, current_player):
+        """
+        Annule le timer existant et en démarre un nouveau.
+        """
+        await self.timer_manager.cancel_timer()
+        await self.round_manager.update_phase(phase)
+        round = await self.round_manager.get_current_round()
+        print(round.phase)
+        await self.timer_manager.switch_timer(duration, phase, current_player)
+
+    async def start_new_round(self):
+        state = await RoomState.get(self.room_code)
+        room = state.room
+        state.update_room(completed_rounds=room.completed_rounds + 1)
+
+        number_of_players = len(state.players)
+
+        if room.completed_rounds >= room.total_rounds * number_of_players:
+            # Fin de la partie
+            await group_broadcast(
+                get_channel_layer(),
+                self.room_group_name,
+                {
+                    "type": "game_end",
+                    **await self.get_roster_delta(),
+                    "leaderboard": await self.get_leaderboard(),
+                },
+            )
+            return
+
+        # Récupérer le round actuel avec les infos joueur
+        round_info = await self.round_manager.get_current_round_with_player()
+
+        # Récupérer l'ordre des joueurs
+        player_order = await self.round_manager.get_player_order()
+
+        # Trouver l'index du joueur actuel dans l'ordre
+        current_player_index = player_order.index(round_info["current_player"]["id"])
+
+        # Déterminer le prochain joueur dans l'ordre
+        next_player = player_order[(current_player_index + 1) % len(player_order)]
+
+        # Générer de nouveaux mots pour le prochain tour
+        new_words = await self.generate_word_choices()
+
+        # Stocker les nouveaux choix de mots
+        await self.set_current_word_choices(new_words)
+
+        # Créer un nouveau round pour le prochain joueur
+        await self.round_manager.start_new_round(next_player)
+
+        # Informer tous les joueurs du début du nouveau round
+        await group_broadcast(
+            get_channel_layer(),
+            self.room_group_name,
+            {
+                "type": "new_round",
+                "nextPlayer": next_player,
+                "wordChoices": new_words,
+                **await self.get_roster_delta(),
+                "currentRound": room.completed_rounds // number_of_players + 1,
+                "totalRounds": room.total_rounds,
+                "playerOrder": player_order,
+            },
+        )
+
+        # Démarrer le nouveau timer pour la phase de choix
+        await self.switch_timer(30, "choice", next_player)
+
+    async def send_round_complete(
+        self, word_found=False, winner=None, round_info=None, clue_missing=False
+    ):
+        """Méthode utilitaire pour envoyer un message de fin de round"""
+        if not round_info:
+            round_info = await self.round_manager.get_current_round_with_player()
+
+        # Marquer le round comme terminé
+        await self.round_manager.complete_round(
+            word_found=word_found, winner_id=winner.get("id") if winner else None
+        )
+
+        perfect = (
+            True
+            if winner and len(round_info["given_clues"]) == round_info["required_clues"]
+            else False
+        )
+
+        # Construction du message de base
+        message = {
+            "type": "round_complete",
+            "winner": winner,
+            "clueMissing": clue_missing,
+            "word": round_info["word"],
+            "cluesCount": len(round_info["given_clues"]),
+            "requiredClues": round_info["required_clues"],
+            "currentPlayer": round_info["current_player"],
+            "canMalus": round_info["can_malus"],
+            "perfect": perfect,
+            # Seuls les scores modifiés pendant le round
+            **await self.get_roster_delta(),
+            "leaderboard": await self.get_leaderboard(),
+        }
+
+        # Envoyer le message
+        await group_broadcast(get_channel_layer(), self.room_group_name, message)
+        await self.timer_manager.cancel_timer()
@@ -0,0 +1,306 @@
+import asyncio
+import heapq
+import logging
+import time
+from collections import defaultdict
+
+from channels.layers import get_channel_layer
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .broadcast import group_broadcast
+from .db_executor import get_db_executor
+from .event_log import RoomEventLog
+from .room_actor import RoomActor
+from .room_codes import release_room
+from .room_state import RoomState
+from .roster import get_roster
+from .scheduler import get_scheduler, now_ms
+from .sharding import get_shard_directory
+from .timer_manager import RoomTimerManager
+
+logger = logging.getLogger(__name__)
+
+
+class BaseGracePeriods:
+    """
+    Délais de grâce des joueurs déconnectés, pour tout le processus.
+
+    Un joueur déconnecté n'est retiré de sa room qu'après `delay` secondes ;
+    une reconnexion (init) annule son délai. Les délais expirés sont réclamés
+    par lots par une seule tâche, qui regroupe les départs par room.
+    """
+
+    def __init__(self, delay=30, poll_interval=1.0, batch_size=500, **kwargs):
+        self.delay = delay
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+
+    async def schedule(self, room_code, player_id, session_id):
+        """(Re)lance le délai de grâce du joueur"""
+        raise NotImplementedError
+
+    async def cancel(self, session_id):
+        """Annule le délai du joueur ; retourne True s'il était en attente"""
+        raise NotImplementedError
+
+    async def claim_expired(self, now, limit=500, shard=None):
+        """
+        Retire et retourne les délais expirés : [(room_code, player_id), ...]
+        Avec `shard`, ceux des rooms épinglées à un autre shard sont ignorés.
+        """
+        raise NotImplementedError
+
+
+class LocalGracePeriods(BaseGracePeriods):
+    """
+    Tas des échéances en mémoire (un seul processus). Une annulation ne fait
+    qu'oublier l'entrée : les échéances périmées restées dans le tas sont
+    ignorées à l'expiration, et le tas est compacté quand elles dominent.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._heap = []  # (expires_at, session_id)
+        self._pending = {}  # {session_id: (expires_at, room_code, player_id)}
+
+    async def schedule(self, room_code, player_id, session_id):
+        expires_at = now_ms() + int(self.delay * 1000)
+        self._pending[session_id] = (expires_at, room_code, player_id)
+        heapq.heappush(self._heap, (expires_at, session_id))
+        self._compact()
+
+    async def cancel(self, session_id):
+        return self._pending.pop(session_id, None) is not None
+
+    async def claim_expired(self, now, limit=500, shard=None):
+        expired = []
+        while self._heap and self._heap[0][0] <= now and len(expired) < limit:
+            expires_at, session_id = heapq.heappop(self._heap)
+            pending = self._pending.get(session_id)
+            if pending and pending[0] == expires_at:
+                del self._pending[session_id]
+                expired.append((pending[1], pending[2]))
+        return expired
+
+    def _compact(self):
+        if len(self._heap) > 2 * len(self._pending) + 64:
+            self._heap = [
+                (expires_at, session_id)
+                for session_id, (expires_at, _, _) in self._pending.items()
+            ]
+            heapq.heapify(self._heap)
+
+
+class RedisGracePeriods(BaseGracePeriods):
+    """
+    Échéances partagées entre workers : sorted set des départs (score = date
+    d'expiration, membre "room|joueur|session") et hash session -> membre pour
+    les annulations. Avec plusieurs shards, chaque worker ne réclame que les
+    départs de ses rooms (épingles de RedisShardDirectory).
+    """
+
+    SCHEDULE_SCRIPT = """
+    local previous = redis.call('HGET', KEYS[2], ARGV[1])
+    if previous then
+        redis.call('ZREM', KEYS[1], previous)
+    end
+    redis.call('ZADD', KEYS[1], ARGV[3], ARGV[2])
+    redis.call('HSET', KEYS[2], ARGV[1], ARGV[2])
+    """
+
+    CANCEL_SCRIPT = """
+    local member = redis.call('HGET', KEYS[2], ARGV[1])
+    if not member then
+        return 0
+    end
+    redis.call('HDEL', KEYS[2], ARGV[1])
+    return redis.call('ZREM', KEYS[1], member)
+    """
+
+    CLAIM_SCRIPT = """
+    local members = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+    local claimed = {}
+    for _, member in ipairs(members) do
+        local room_code, session_id = string.match(member, '^([^|]*)|[^|]*|(.*)$')
+        local owner = false
+        if ARGV[3] ~= '' then
+            owner = redis.call('HGET', KEYS[3], room_code)
+        end
+        if not owner or owner == ARGV[3] then
+            redis.call('ZREM', KEYS[1], member)
+            redis.call('HDEL', KEYS[2], session_id)
+            table.insert(claimed, member)
+        end
+    end
+    return claimed
+    """
+
+    def __init__(self, url="redis://127.0.0.1:6379/0", prefix="maudit", **kwargs):
+        super().__init__(**kwargs)
+        from redis import asyncio as aioredis
+
+        self.redis = aioredis.from_url(url, decode_responses=True)
+        self.expiry_key = f"{prefix}:grace_expiry"
+        self.members_key = f"{prefix}:grace_members"
+        self.pins_key = f"{prefix}:room_shards"  # Épingles de RedisShardDirectory
+        self._schedule = self.redis.register_script(self.SCHEDULE_SCRIPT)
+        self._cancel = self.redis.register_script(self.CANCEL_SCRIPT)
+        self._claim = self.redis.register_script(self.CLAIM_SCRIPT)
+
+    async def schedule(self, room_code, player_id, session_id):
+        expires_at = now_ms() + int(self.delay * 1000)
+        member = f"{room_code}|{player_id}|{session_id}"
+        await self._schedule(
+            keys=[self.expiry_key, self.members_key],
+            args=[session_id, member, expires_at],
+        )
+
+    async def cancel(self, session_id):
+        return bool(
+            await self._cancel(
+                keys=[self.expiry_key, self.members_key], args=[session_id]
+            )
+        )
+
+    async def claim_expired(self, now, limit=500, shard=None):
+        members = await self._claim(
+            keys=[self.expiry_key, self.members_key, self.pins_key],
+            args=[now, limit, shard or ""],
+        )
+        return [tuple(member.split("|")[:2]) for member in members]
+
+
+_grace_periods = None
+_worker_task = None
+
+
+def get_grace_periods():
+    """Retourne les délais de grâce configurés par DISCONNECT_GRACE (un par processus)"""
+    global _grace_periods
+    if _grace_periods is None:
+        config = getattr(settings, "DISCONNECT_GRACE", {})
+        backend = import_string(
+            config.get("BACKEND", "game.grace_period.LocalGracePeriods")
+        )
+        _grace_periods = backend(**config.get("CONFIG", {}))
+    return _grace_periods
+
+
+def ensure_expiry_worker():
+    """Lance (une fois par processus) la tâche qui traite les délais expirés"""
+    global _worker_task
+    if _worker_task is None or _worker_task.done():
+        _worker_task = asyncio.get_running_loop().create_task(_run_worker())
+
+
+async def _run_worker():
+    interval = get_grace_periods().poll_interval
+    while True:
+        await asyncio.sleep(interval - (time.time() % interval))
+        try:
+            await process_expired(now_ms())
+        except Exception:
+            logger.exception("Impossible de traiter les délais de grâce expirés")
+
+
+async def process_expired(now):
+    """Retire par lots les joueurs dont le délai a expiré, une commande par room"""
+    grace_periods = get_grace_periods()
+    directory = get_shard_directory()
+    shard = directory.local if directory.sharded else None
+    while expired := await grace_periods.claim_expired(
+        now, grace_periods.batch_size, shard=shard
+    ):
+        by_room = defaultdict(list)
+        for room_code, player_id in expired:
+            by_room[room_code].append(player_id)
+        await asyncio.gather(
+            *(
+                RoomActor.get_instance(room_code).submit(
+                    remove_players, room_code, player_ids
+                )
+                for room_code, player_ids in by_room.items()
+            ),
+            return_exceptions=True,
+        )
+
+
+def _delete_players(room_code, player_ids, new_owner_id):
+    Player = apps.get_model("game", "Player")
+    with transaction.atomic():
+        if new_owner_id is not None:
+            Player.objects.filter(room__code=room_code, is_owner=True).update(
+                is_owner=False
+            )
+            Player.objects.filter(id=new_owner_id).update(is_owner=True)
+        Player.objects.filter(id__in=player_ids).delete()
+
+
+async def remove_players(room_code, player_ids):
+    """
+    Retire d'un coup des joueurs de la room (départs ou délais expirés) : un
+    seul player_left pour tous, et un seul owner_changed si le propriétaire
+    en faisait partie. Libère la room quand elle est vide.
+    """
+    state = await RoomState.get(room_code)
+    if not state:
+        return
+    leaving = [
+        player
+        for player in (state.get_player(player_id) for player_id in player_ids)
+        if player
+    ]
+    if not leaving:
+        return
+
+    for player in leaving:
+        state.remove_player(player.id)
+    new_owner = None
+    if any(player.is_owner for player in leaving):
+        new_owner = next(iter(state.players.values()), None)
+
+    await get_db_executor().run(
+        room_code,
+        _delete_players,
+        room_code,
+        [player.id for player in leaving],
+        new_owner.id if new_owner else None,
+    )
+
+    channel_layer = get_channel_layer()
+    group_name = f"game_{room_code}"
+    players = [{"id": str(player.id), "pseudo": player.pseudo} for player in leaving]
+    # "player" : premier joueur parti (clients qui n'en attendent qu'un)
+    await group_broadcast(
+        channel_layer,
+        group_name,
+        {"type": "player_left", "player": players[0], "players": players},
+    )
+
+    if new_owner:
+        state.set_owner(new_owner.id)
+        await group_broadcast(
+            channel_layer,
+            group_name,
+            {
+                "type": "owner_changed",
+                "player": {
+                    "id": str(new_owner.id),
+                    "pseudo": new_owner.pseudo,
+                    "is_owner": True,
+                },
+            },
+        )
+
+    if not state.players:
+        # Le code sera réattribué : aucune échéance ne doit toucher la future room
+        await get_scheduler().cancel(room_code)
+        RoomTimerManager.discard(room_code)
+        await RoomState.discard(room_code)
+        await get_roster().discard(room_code)
+        RoomEventLog.discard(group_name)
+        # Room terminée : son code redevient disponible
+        await get_db_executor().run(room_code, release_room, room_code)
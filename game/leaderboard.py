@@ -0,0 +1,59 @@
+from bisect import bisect_left, insort
+
+
+class Leaderboard:
+    """
+    Classement d'une room tenu à jour à chaque changement de score : les
+    entrées (-score, id) restent triées, un rang ou le top-K se lisent sans
+    retrier les joueurs. Ex æquo : même rang (1, 2, 2, 4...).
+    """
+
+    def __init__(self, scores=None):
+        self._entries = []  # [(-score, player_id)] triées
+        self._scores = {}  # {player_id: score}
+        for player_id, score in (scores or {}).items():
+            self.update(player_id, score)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def update(self, player_id, score):
+        player_id = str(player_id)
+        score = score or 0
+        previous = self._scores.get(player_id)
+        if previous == score:
+            return
+        if previous is not None:
+            self._remove_entry(player_id, previous)
+        self._scores[player_id] = score
+        insort(self._entries, (-score, player_id))
+
+    def remove(self, player_id):
+        player_id = str(player_id)
+        previous = self._scores.pop(player_id, None)
+        if previous is not None:
+            self._remove_entry(player_id, previous)
+
+    def _remove_entry(self, player_id, score):
+        index = bisect_left(self._entries, (-score, player_id))
+        del self._entries[index]
+
+    def rank(self, player_id):
+        """Rang du joueur (1 = meilleur score), ou None s'il n'est pas classé"""
+        score = self._scores.get(str(player_id))
+        if score is None:
+            return None
+        # Premier joueur ayant ce score : tous ceux d'avant ont strictement plus
+        return bisect_left(self._entries, (-score,)) + 1
+
+    def top(self, count=None):
+        """Les `count` premiers : [{id, score, rank}, ...]"""
+        entries = self._entries if count is None else self._entries[:count]
+        top = []
+        for index, (negative_score, player_id) in enumerate(entries):
+            if top and top[-1]["score"] == -negative_score:
+                rank = top[-1]["rank"]
+            else:
+                rank = index + 1
+            top.append({"id": player_id, "score": -negative_score, "rank": rank})
+        return top
@@ -0,0 +1,106 @@
+# Generated by Django 5.2 on 2026-10-17 11:57
+
+from datetime import datetime
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def parse_timestamp(value, default):
+    try:
+        timestamp = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return default
+    if timezone.is_naive(timestamp):
+        timestamp = timezone.make_aware(timestamp)
+    return timestamp
+
+
+def player_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def backfill_clues_and_guesses(apps, schema_editor):
+    """Recopie les listes JSON des rounds existants dans les tables Clue et Guess"""
+    Round = apps.get_model('game', 'Round')
+    Clue = apps.get_model('game', 'Clue')
+    Guess = apps.get_model('game', 'Guess')
+
+    rounds = Round.objects.only(
+        'id', 'current_player_id', 'given_clues', 'given_guesses', 'guessing_players', 'updated_at'
+    )
+    for round in rounds.iterator(chunk_size=500):
+        clues = round.given_clues or []
+        Clue.objects.bulk_create(
+            Clue(
+                round_id=round.id,
+                player_id=round.current_player_id,
+                position=position,
+                text=str(text)[:100],
+            )
+            for position, text in enumerate(clues)
+        )
+        # Le moment exact de chaque tentative n'est pas connu : les joueurs de la
+        # phase en cours (guessing_players) sont rattachés au dernier indice
+        guessing_players = {str(pid) for pid in round.guessing_players or []}
+        Guess.objects.bulk_create(
+            Guess(
+                round_id=round.id,
+                player_id=player_id(guess.get('playerId')),
+                word=str(guess.get('word', ''))[:100],
+                clue_count=(
+                    len(clues)
+                    if str(guess.get('playerId')) in guessing_players
+                    else max(len(clues) - 1, 0)
+                ),
+                created_at=parse_timestamp(guess.get('timestamp'), round.updated_at),
+            )
+            for guess in round.given_guesses or []
+            if isinstance(guess, dict)
+        )
+
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0008_round_can_malus'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Clue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField()),
+                ('text', models.CharField(max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('player', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='game.player')),
+                ('round', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='clues', to='game.round')),
+            ],
+            options={
+                'ordering': ['position'],
+                'constraints': [models.UniqueConstraint(fields=('round', 'position'), name='unique_clue_position')],
+            },
+        ),
+        migrations.CreateModel(
+            name='Guess',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('word', models.CharField(max_length=100)),
+                ('clue_count', models.PositiveSmallIntegerField(default=0)),
+                ('created_at', models.DateTimeField()),
+                ('player', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='game.player')),
+                ('round', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='guesses', to='game.round')),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['round', 'id'], name='game_guess_round_i_fcae3d_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_clues_and_guesses, migrations.RunPython.noop),
+    ]
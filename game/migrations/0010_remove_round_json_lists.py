@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-17 11:57
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0009_clue_guess'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='round',
+            name='all_guesses',
+        ),
+        migrations.RemoveField(
+            model_name='round',
+            name='given_clues',
+        ),
+        migrations.RemoveField(
+            model_name='round',
+            name='given_guesses',
+        ),
+        migrations.RemoveField(
+            model_name='round',
+            name='guessing_players',
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2 on 2026-10-17 12:03
+
+from django.db import migrations, models
+
+from game.normalize import normalize_word
+
+
+def backfill_normalized(apps, schema_editor):
+    """Calcule la forme normalisée des indices et tentatives existants"""
+    for model_name, field in (('Clue', 'text'), ('Guess', 'word')):
+        model = apps.get_model('game', model_name)
+        rows = []
+        for row in model.objects.only('id', field).iterator(chunk_size=500):
+            # Les ligatures s'allongent (œ -> oe) : ramené à la taille du champ
+            row.normalized = normalize_word(getattr(row, field))[:100]
+            rows.append(row)
+            if len(rows) >= 500:
+                model.objects.bulk_update(rows, ['normalized'])
+                rows = []
+        if rows:
+            model.objects.bulk_update(rows, ['normalized'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0010_remove_round_json_lists'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='clue',
+            name='normalized',
+            field=models.CharField(default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='guess',
+            name='normalized',
+            field=models.CharField(default='', max_length=100),
+        ),
+        migrations.RunPython(backfill_normalized, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 import uuid
 import jsonfield
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 
 
@@ -18,13 +19,6 @@ class Round(models.Model):
     word = models.CharField(max_length=100, blank=True)
     required_clues = models.IntegerField(null=True)
     can_malus = models.BooleanField(default=False)  # Indique si le joueur peut malusser
-    given_clues = models.JSONField(default=list)  # Liste des indices donnés
-    given_guesses = models.JSONField(
-        default=list
-    )  # Liste des tentatives avec {playerId, word, timestamp}
-    guessing_players = models.JSONField(
-        default=list
-    )  # Liste des IDs des joueurs ayant deviné dans la phase actuelle
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_completed = models.BooleanField(default=False)
@@ -32,7 +26,55 @@ class Round(models.Model):
     winner = models.ForeignKey(
         "Player", null=True, on_delete=models.SET_NULL, related_name="won_rounds"
     )
-    all_guesses = models.JSONField(default=list)
+
+
+class Clue(models.Model):
+    """Indice donné pendant un round (ajout seul, une ligne par indice)"""
+
+    round = models.ForeignKey(Round, on_delete=models.CASCADE, related_name="clues")
+    # Sans contrainte : l'historique garde l'id des joueurs partis
+    player = models.ForeignKey(
+        "Player",
+        null=True,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="+",
+    )
+    position = models.PositiveSmallIntegerField()  # Ordre de l'indice dans le round
+    text = models.CharField(max_length=100)
+    normalized = models.CharField(max_length=100, default="")  # Voir normalize_word
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["position"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["round", "position"], name="unique_clue_position"
+            )
+        ]
+
+
+class Guess(models.Model):
+    """Tentative d'un joueur pendant un round (ajout seul, une ligne par tentative)"""
+
+    round = models.ForeignKey(Round, on_delete=models.CASCADE, related_name="guesses")
+    player = models.ForeignKey(
+        "Player",
+        null=True,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="+",
+    )
+    word = models.CharField(max_length=100)
+    normalized = models.CharField(max_length=100, default="")  # Voir normalize_word
+    # Nombre d'indices déjà donnés : les joueurs ayant deviné dans la phase
+    # actuelle sont ceux dont clue_count vaut le nombre d'indices du round
+    clue_count = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [models.Index(fields=["round", "id"])]
 
 
 class GameRoom(models.Model):
@@ -61,3 +103,16 @@ class Player(models.Model):
 
     def __str__(self):
         return self.pseudo
+
+
+class DeadLetter(models.Model):
+    """
+    Écriture différée abandonnée (voir RoomState) : élément qui échouait encore
+    après ROOM_STATE_WRITE_ATTEMPTS tentatives, gardé pour analyse
+    """
+
+    room_code = models.CharField(max_length=6)
+    kind = models.CharField(max_length=10)  # room, round, scores, clue ou guess
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+    error = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
@@ -0,0 +1,16 @@
+import unicodedata
+
+# Ligatures que NFKD ne décompose pas
+LIGATURES = str.maketrans({"œ": "oe", "Œ": "oe", "æ": "ae", "Æ": "ae"})
+
+
+def normalize_word(text):
+    """
+    Forme de comparaison d'un mot : NFKD, accents retirés, casse repliée et
+    espaces réduits ("Élève " et "eleve" donnent la même clé)
+    """
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text.translate(LIGATURES))
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().split())
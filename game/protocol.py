@@ -0,0 +1,134 @@
+import json
+
+import msgpack
+
+# Sous-protocole WebSocket des clients binaires (les autres restent en JSON texte)
+MSGPACK_SUBPROTOCOL = "maudit.msgpack.v1"
+
+# Codes des types de message en binaire : ne jamais renuméroter, seulement ajouter
+TYPE_CODES = {
+    # Client -> serveur
+    "init": 1,
+    "message": 2,
+    "start_game": 3,
+    "word_choice": 4,
+    "give_clue": 5,
+    "make_guess": 6,
+    "join_game": 7,
+    "start_new_round": 8,
+    "apply-malus": 9,
+    "leave_room": 10,
+    "timer_sync": 11,
+    "round_sync": 12,
+    "roster_sync": 13,
+    # Serveur -> client
+    "room_state": 32,
+    "welcome": 33,
+    "error": 34,
+    "player_joined": 35,
+    "player_left": 36,
+    "owner_changed": 37,
+    "lobby_message": 38,
+    "game_message": 39,
+    "game_started": 40,
+    "word_selected": 41,
+    "clue_given": 42,
+    "guess_made": 43,
+    "round_complete": 44,
+    "new_round": 45,
+    "game_end": 46,
+    "timer_update": 47,
+    "phase_started": 48,
+    "shard_moved": 49,
+    "round_snapshot": 50,
+    "roster": 51,
+    "spectator_update": 52,
+}
+TYPE_NAMES = {code: name for name, code in TYPE_CODES.items()}
+
+
+class JsonCodec:
+    """Protocole historique : trames JSON en texte"""
+
+    binary = False
+    subprotocol = None
+
+    @staticmethod
+    def encode(frame):
+        return json.dumps(frame)
+
+    @staticmethod
+    def decode(data):
+        return json.loads(data)
+
+
+class MsgpackCodec:
+    """Trames msgpack binaires, le type remplacé par son code entier"""
+
+    binary = True
+    subprotocol = MSGPACK_SUBPROTOCOL
+
+    @staticmethod
+    def encode(frame):
+        frame_type = frame.get("type")
+        if frame_type in TYPE_CODES:
+            frame = {**frame, "type": TYPE_CODES[frame_type]}
+        return msgpack.packb(frame)
+
+    @staticmethod
+    def decode(data):
+        frame = msgpack.unpackb(data)
+        if not isinstance(frame, dict):
+            raise ValueError("Trame msgpack invalide")
+        frame_type = frame.get("type")
+        if isinstance(frame_type, int):
+            frame["type"] = TYPE_NAMES.get(frame_type)
+        return frame
+
+
+def negotiate(subprotocols):
+    """Codec à utiliser selon les sous-protocoles proposés par le client"""
+    if MSGPACK_SUBPROTOCOL in (subprotocols or ()):
+        return MsgpackCodec
+    return JsonCodec
+
+
+def decode_frame(text_data=None, bytes_data=None):
+    """Décode une trame reçue : binaire en msgpack, texte en JSON"""
+    if bytes_data is not None:
+        return MsgpackCodec.decode(bytes_data)
+    return JsonCodec.decode(text_data)
+
+
+def frame_format(codec):
+    """Clé de la version encodée d'un événement pour ce codec ("text" ou "bytes")"""
+    return "bytes" if codec.binary else "text"
+
+
+def encode_for_group(frame, formats=("text", "bytes")):
+    """
+    Trame encodée une fois par format demandé, pour tous les membres d'un
+    groupe : {"text": JSON, "bytes": msgpack}, selon les clients présents.
+    """
+    encoded = {}
+    if "text" in formats:
+        encoded["text"] = JsonCodec.encode(frame)
+    if "bytes" in formats:
+        encoded["bytes"] = MsgpackCodec.encode(frame)
+    return encoded
+
+
+def event_payload(event, codec):
+    """
+    Version de l'événement dans le format du codec. Absente si aucun client de
+    ce format n'était là à l'envoi (arrivé depuis) : transcodée depuis l'autre
+    format, puis gardée dans l'événement (journal, instantané partagé).
+    """
+    key = frame_format(codec)
+    if key not in event:
+        if codec.binary:
+            frame = JsonCodec.decode(event["text"])
+        else:
+            frame = MsgpackCodec.decode(event["bytes"])
+        event[key] = codec.encode(frame)
+    return event[key]
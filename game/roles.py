@@ -0,0 +1,95 @@
+from .room_actor import RoomActor
+from .room_state import RoomState
+
+# Rôles d'un joueur dans la room, chacun avec son sous-groupe (les
+# spectateurs suivent la room via SpectatorFeed)
+CLUE_GIVER = "clue_giver"
+GUESSERS = "guessers"
+ROLES = (CLUE_GIVER, GUESSERS)
+
+# Événements réservés à certains rôles : {type: {rôle: champs retirés de la trame}}
+# Un rôle absent ne reçoit pas l'événement ; les événements non listés partent
+# au groupe de la room entière.
+EVENT_AUDIENCES = {
+    # Le mot secret et les choix de mots ne quittent pas le serveur pour les autres
+    "word_selected": {CLUE_GIVER: (), GUESSERS: ("word",)},
+    "game_started": {CLUE_GIVER: (), GUESSERS: ("wordChoices",)},
+    "new_round": {CLUE_GIVER: (), GUESSERS: ("wordChoices",)},
+}
+
+
+def role_group(group_name, role):
+    return f"{group_name}_{role}"
+
+
+def role_of(state, player_id):
+    """Rôle d'un joueur : celui qui donne les indices, ou devineur"""
+    return CLUE_GIVER if str(player_id) == state.clue_giver else GUESSERS
+
+
+def scope_frame(frame, role):
+    """Trame telle que la voit le rôle donné (None s'il ne la reçoit pas)"""
+    audience = EVENT_AUDIENCES.get(frame.get("type"))
+    if audience is None:
+        return frame
+    if role not in audience:
+        return None
+    return {key: value for key, value in frame.items() if key not in audience[role]}
+
+
+async def join_role_group(channel_layer, room_code, player_id, channel_name):
+    """Inscrit la socket du joueur dans le sous-groupe de son rôle ; retourne le rôle"""
+
+    async def join():
+        state = await RoomState.get(room_code)
+        # Un joueur peut avoir plusieurs sockets (onglets) : toutes sont suivies
+        state.channels.setdefault(str(player_id), set()).add(channel_name)
+        role = role_of(state, player_id)
+        await channel_layer.group_add(
+            role_group(f"game_{room_code}", role), channel_name
+        )
+        return role
+
+    # Dans la file de la room : pas de changement de rôle entre lecture et inscription
+    return await RoomActor.get_instance(room_code).submit(join)
+
+
+async def leave_role_group(channel_layer, room_code, player_id, channel_name):
+    async def leave():
+        state = RoomState.get_loaded(room_code)
+        channels = state.channels.get(str(player_id)) if state else None
+        if channels is not None:
+            channels.discard(channel_name)
+            if not channels:
+                del state.channels[str(player_id)]
+        # La socket quitte toujours son sous-groupe, même si l'état a été oublié
+        for role in (role_of(state, player_id),) if state else ROLES:
+            await channel_layer.group_discard(
+                role_group(f"game_{room_code}", role), channel_name
+            )
+
+    await RoomActor.get_instance(room_code).submit(leave)
+
+
+async def set_clue_giver(channel_layer, state, player_id):
+    """
+    Change le joueur qui donne les indices : seules les sockets (toutes) de
+    l'ancien et du nouveau changent de sous-groupe.
+    """
+    previous = state.clue_giver
+    player_id = str(player_id) if player_id is not None else None
+    if previous == player_id:
+        return
+    state.clue_giver = player_id
+    group_name = f"game_{state.room_code}"
+    for pid, old_role, new_role in (
+        (previous, CLUE_GIVER, GUESSERS),
+        (player_id, GUESSERS, CLUE_GIVER),
+    ):
+        for channel_name in list(state.channels.get(pid, ())):
+            await channel_layer.group_discard(
+                role_group(group_name, old_role), channel_name
+            )
+            await channel_layer.group_add(
+                role_group(group_name, new_role), channel_name
+            )
@@ -0,0 +1,61 @@
+import asyncio
+import contextvars
+from collections import deque
+
+# Room dont l'acteur exécute la commande en cours (pour les appels imbriqués)
+_current_room = contextvars.ContextVar("current_room", default=None)
+
+
+class RoomActor:
+    """
+    File de commandes d'une room : toutes les modifications de l'état de la
+    room (messages des joueurs, fins de timer, départs) y passent et sont
+    appliquées une à une, dans l'ordre d'arrivée. Une commande lit puis modifie
+    l'état en mémoire sans qu'une autre puisse s'intercaler entre les deux ;
+    les écritures en base qui en découlent sont regroupées par RoomState.
+
+    La tâche de l'acteur ne vit que tant que sa file n'est pas vide.
+    """
+
+    _instances = {}
+
+    @classmethod
+    def get_instance(cls, room_code):
+        if room_code not in cls._instances:
+            cls._instances[room_code] = cls(room_code)
+        return cls._instances[room_code]
+
+    def __init__(self, room_code):
+        self.room_code = room_code
+        self._mailbox = deque()
+        self._task = None
+
+    def __len__(self):
+        return len(self._mailbox)
+
+    async def submit(self, command, *args, **kwargs):
+        """Met la commande (coroutine) en file et retourne son résultat une fois appliquée"""
+        if _current_room.get() == self.room_code:
+            # Appel depuis une commande de la même room : exécution directe
+            return await command(*args, **kwargs)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._mailbox.append((command, args, kwargs, future))
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+        # La commande va au bout même si l'appelant est annulé entre-temps
+        return await asyncio.shield(future)
+
+    async def _run(self):
+        _current_room.set(self.room_code)
+        while self._mailbox:
+            command, args, kwargs, future = self._mailbox.popleft()
+            try:
+                result = await command(*args, **kwargs)
+            except Exception as exc:
+                future.set_exception(exc)
+            else:
+                future.set_result(result)
+        if self._instances.get(self.room_code) is self:
+            del self._instances[self.room_code]
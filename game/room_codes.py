@@ -0,0 +1,165 @@
+import hashlib
+import itertools
+import random
+import string
+from collections import deque
+
+from django.apps import apps
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils.module_loading import import_string
+
+from .sharding import get_shard_directory
+
+ALPHABET = string.ascii_uppercase + string.digits
+CODE_LENGTH = 6
+CODE_SPACE = len(ALPHABET) ** CODE_LENGTH
+
+# Au-delà, l'espace des codes est considéré comme saturé
+MAX_ATTEMPTS = 10
+
+
+class CodeScrambler:
+    """
+    Permutation de [0, CODE_SPACE) par un réseau de Feistel à 4 tours.
+
+    Le nombre est coupé en deux moitiés (3 chiffres en base 36 chacune) ;
+    chaque tour est inversible, donc deux compteurs distincts donnent toujours
+    deux codes distincts, sans table ni vérification en base. La clé dérive
+    de SECRET_KEY pour que les codes successifs ne soient pas devinables.
+    """
+
+    ROUNDS = 4
+
+    def __init__(self, key=None, length=CODE_LENGTH):
+        if key is None:
+            key = settings.SECRET_KEY or ""
+        self.key = hashlib.sha256(f"room-codes:{key}".encode()).digest()
+        self.length = length
+        self.half = len(ALPHABET) ** (length // 2)
+        self.other_half = len(ALPHABET) ** (length - length // 2)
+
+    def _round(self, value, round_index, modulus):
+        digest = hashlib.blake2b(
+            f"{round_index}:{value}".encode(), key=self.key, digest_size=8
+        ).digest()
+        return int.from_bytes(digest, "big") % modulus
+
+    def scramble(self, number):
+        # (gauche, droite) alternent entre Z_half x Z_other_half et l'inverse
+        left, right = divmod(number, self.other_half)
+        moduli = (self.half, self.other_half)
+        for round_index in range(self.ROUNDS):
+            modulus = moduli[round_index % 2]
+            left, right = (
+                right,
+                (left + self._round(right, round_index, modulus)) % modulus,
+            )
+        return left * self.other_half + right
+
+    def encode(self, number):
+        value = self.scramble(number % (self.half * self.other_half))
+        chars = []
+        for _ in range(self.length):
+            value, index = divmod(value, len(ALPHABET))
+            chars.append(ALPHABET[index])
+        return "".join(reversed(chars))
+
+
+class BaseRoomCodeAllocator:
+    """
+    Distribue des codes de room uniques en O(1) : d'abord les codes libérés
+    par des rooms terminées, sinon le code brouillé du prochain compteur.
+    """
+
+    def __init__(self, key=None, **kwargs):
+        self.scrambler = CodeScrambler(key)
+
+    def allocate(self):
+        raise NotImplementedError
+
+    def release(self, code):
+        """Rend le code d'une room terminée réutilisable"""
+        raise NotImplementedError
+
+
+class LocalRoomCodeAllocator(BaseRoomCodeAllocator):
+    """Équivalent en mémoire (un seul processus)"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        # Départ aléatoire : après un redémarrage, on ne repasse pas sur les mêmes codes
+        self._counter = itertools.count(random.randrange(CODE_SPACE))
+        self._released = deque()
+
+    def allocate(self):
+        if self._released:
+            return self._released.popleft()
+        return self.scrambler.encode(next(self._counter))
+
+    def release(self, code):
+        self._released.append(code)
+
+
+class RedisRoomCodeAllocator(BaseRoomCodeAllocator):
+    """Compteur et codes libérés partagés entre workers (INCR / SPOP)"""
+
+    def __init__(self, url="redis://127.0.0.1:6379/0", prefix="maudit", **kwargs):
+        super().__init__(**kwargs)
+        import redis
+
+        self.redis = redis.Redis.from_url(url, decode_responses=True)
+        self.counter_key = f"{prefix}:room_code_counter"
+        self.released_key = f"{prefix}:room_code_released"
+
+    def allocate(self):
+        code = self.redis.spop(self.released_key)
+        if code:
+            return code
+        return self.scrambler.encode(self.redis.incr(self.counter_key))
+
+    def release(self, code):
+        self.redis.sadd(self.released_key, code)
+
+
+_allocator = None
+
+
+def get_allocator():
+    """Retourne l'allocateur configuré par ROOM_CODE_ALLOCATOR (un par processus)"""
+    global _allocator
+    if _allocator is None:
+        config = getattr(settings, "ROOM_CODE_ALLOCATOR", {})
+        backend = import_string(
+            config.get("BACKEND", "game.room_codes.LocalRoomCodeAllocator")
+        )
+        _allocator = backend(**config.get("CONFIG", {}))
+    return _allocator
+
+
+def create_room(**fields):
+    """
+    Crée une room avec un code alloué, sans lecture préalable : la contrainte
+    d'unicité ne rejette l'insertion que si le code est déjà pris (par exemple
+    par une ancienne room au code tiré au hasard), auquel cas on réessaie.
+    """
+    GameRoom = apps.get_model("game", "GameRoom")
+    allocator = get_allocator()
+    for _ in range(MAX_ATTEMPTS):
+        code = allocator.allocate()
+        try:
+            with transaction.atomic():
+                return GameRoom.objects.create(code=code, **fields)
+        except IntegrityError:
+            continue
+    raise RuntimeError("Impossible d'allouer un code de room unique")
+
+
+def release_room(room_code):
+    """Supprime la room si plus aucun joueur n'y est inscrit et libère son code"""
+    GameRoom = apps.get_model("game", "GameRoom")
+    deleted, _ = GameRoom.objects.filter(code=room_code, players__isnull=True).delete()
+    if deleted:
+        get_allocator().release(room_code)
+        get_shard_directory().release(room_code)
+    return bool(deleted)
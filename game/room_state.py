@@ -0,0 +1,727 @@
+import asyncio
+import copy
+import logging
+
+from django.apps import apps
+from django.conf import settings
+from django.db import DataError, IntegrityError, transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .db_executor import get_db_executor
+from .leaderboard import Leaderboard
+from .normalize import normalize_word
+from .roster import get_roster, roster_entry
+from .word_deck import WordDeck
+
+logger = logging.getLogger(__name__)
+
+# Délai maximal (en secondes) entre une modification en mémoire et son écriture en base
+FLUSH_INTERVAL = getattr(settings, "ROOM_STATE_FLUSH_INTERVAL", 1.0)
+
+# Échecs consécutifs d'écriture d'une room avant d'isoler les éléments en cause
+WRITE_ATTEMPTS = getattr(settings, "ROOM_STATE_WRITE_ATTEMPTS", 3)
+
+
+def compose_score_ops(first, then):
+    """
+    Opération de score équivalente à `first` puis `then`. Une opération
+    (shift, floor) transforme score en max(score + shift, floor) ; avec shift
+    None, le score est remplacé par floor. Ajouter des points est (points, 0).
+    """
+    shift, floor = first
+    next_shift, next_floor = then
+    if next_shift is None:
+        return then
+    floor = max(floor + next_shift, next_floor)
+    return (None if shift is None else shift + next_shift), floor
+
+
+class RoomState:
+    """
+    État d'une room gardé en mémoire pendant la partie.
+
+    La room, le round courant (avec ses indices et tentatives) et les joueurs
+    (avec leurs scores) sont chargés une seule fois ; toutes les lectures sont
+    ensuite servies depuis la mémoire. Les modifications sont marquées comme
+    « sales » et écrites en base par lots par une tâche de fond (au plus tard
+    après FLUSH_INTERVAL secondes), ou immédiatement via `flush()` (fin de
+    round). Les indices et tentatives sont des lignes ajoutées (Clue, Guess).
+    """
+
+    _instances = {}
+    _flush_task = None
+
+    def __init__(self, room_code):
+        self.room_code = room_code
+        self.room = None
+        self.round = None
+        self.players = {}  # {player_id (str): Player}
+        self.leaderboard = Leaderboard()  # Classement tenu à jour avec les scores
+        self.online = set()  # Joueurs connectés (init reçu, pas encore déconnectés)
+        self.channels = {}  # {player_id: channels de ses sockets}, voir roles
+        self.clue_giver = None  # Joueur du sous-groupe clue_giver
+        self.clues = []  # Indices du round courant
+        self.guesses = []  # Tentatives du round courant : {playerId, word, timestamp}
+        self.guessing_players = []  # Joueurs ayant deviné depuis le dernier indice
+        # Formes normalisées (normalize_word) du mot, des indices et des tentatives
+        self.word_key = ""
+        self.clue_keys = set()
+        self.guess_keys = set()
+        self.word_deck = WordDeck()  # Aucun mot ne revient avant épuisement du paquet
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+        self._dirty_room = set()
+        self._dirty_round = set()
+        self._score_ops = {}  # {player_id: (shift, floor)}, voir compose_score_ops
+        self._new_clues = []  # Lignes Clue à insérer
+        self._new_guesses = []  # Lignes Guess à insérer
+        self._roster_updates = {}  # {player_id: entrée du roster, ou None (départ)}
+        self._dropped_rounds = set()  # Rounds supprimés en base avec leur joueur
+        self._write_failures = 0  # Échecs consécutifs de l'écriture en base
+        # Version du roster des clients : incrémentée à chaque changement d'un
+        # joueur ; les événements ne portent que les joueurs changés depuis le
+        # précédent delta diffusé (voir roster_delta)
+        self.roster_version = 0
+        self._delta_base = 0
+        self._delta_changed = set()
+        self._delta_removed = set()
+
+    @classmethod
+    async def get(cls, room_code):
+        """Retourne l'état de la room (chargé depuis la base au premier accès), ou None"""
+        state = cls._instances.get(room_code)
+        if state is None:
+            state = cls._instances[room_code] = cls(room_code)
+
+        if not state._loaded:
+            async with state._load_lock:
+                if not state._loaded and not await state._load():
+                    cls._instances.pop(room_code, None)
+                    return None
+        return state
+
+    @classmethod
+    def get_loaded(cls, room_code):
+        """État de la room s'il est déjà en mémoire, sans chargement"""
+        state = cls._instances.get(room_code)
+        return state if state and state._loaded else None
+
+    @classmethod
+    async def discard(cls, room_code):
+        """Écrit les modifications en attente puis oublie l'état de la room"""
+        state = cls._instances.get(room_code)
+        if state:
+            await state.flush()
+            cls._instances.pop(room_code, None)
+
+    # --- Chargement ---
+    async def _load(self):
+        loaded = await get_db_executor().run(self.room_code, self._fetch)
+        if loaded is None:
+            return False
+        self.room, players, clues, guesses = loaded
+        self.round = self.room.current_round
+        if self.round:
+            self.clue_giver = str(self.round.current_player_id)
+        self.players = {str(player.id): player for player in players}
+        self.leaderboard = Leaderboard(
+            {player_id: player.score for player_id, player in self.players.items()}
+        )
+        self._set_round_history(clues, guesses)
+        self._loaded = True
+        # Le roster repart de la base (redémarrage, room reprise par un autre shard)
+        await get_roster().replace(
+            self.room_code, [roster_entry(player) for player in players]
+        )
+        return True
+
+    def _fetch(self):
+        GameRoom = apps.get_model("game", "GameRoom")
+        try:
+            room = GameRoom.objects.select_related("current_round__current_player").get(
+                code=self.room_code
+            )
+        except GameRoom.DoesNotExist:
+            return None
+        clues, guesses = self._fetch_round_history(room.current_round_id)
+        return room, list(room.players.order_by("id")), clues, guesses
+
+    @staticmethod
+    def _fetch_round_history(round_id):
+        """Indices et tentatives du round, en colonnes brutes (lecture compacte)"""
+        if round_id is None:
+            return [], []
+        Clue = apps.get_model("game", "Clue")
+        Guess = apps.get_model("game", "Guess")
+        clues = list(
+            Clue.objects.filter(round_id=round_id).values_list("text", "normalized")
+        )
+        guesses = list(
+            Guess.objects.filter(round_id=round_id).values_list(
+                "player_id", "word", "normalized", "clue_count", "created_at"
+            )
+        )
+        return clues, guesses
+
+    def _set_round_history(self, clues, guesses):
+        self.word_key = normalize_word(self.round.word if self.round else "")
+        self.clues = [text for text, _ in clues]
+        self.clue_keys = {normalized for _, normalized in clues}
+        self.guesses = [
+            {
+                "playerId": str(player_id),
+                "word": word,
+                "timestamp": created_at.isoformat(),
+            }
+            for player_id, word, _, _, created_at in guesses
+        ]
+        self.guess_keys = {normalized for _, _, normalized, _, _ in guesses}
+        self.guessing_players = list(
+            dict.fromkeys(
+                str(player_id)
+                for player_id, _, _, clue_count, _ in guesses
+                if clue_count == len(self.clues)
+            )
+        )
+
+    async def sync_players(self, from_db=False):
+        """
+        Ajoute les joueurs créés via l'API REST depuis le chargement : lus dans
+        le roster (sans SQL), ou en base si le roster ne connaît pas la room
+        """
+        Player = apps.get_model("game", "Player")
+        entries = None if from_db else await get_roster().get(self.room_code)
+        if entries is not None:
+            for entry in entries:
+                if entry["id"] not in self.players:
+                    self.add_player(
+                        Player(
+                            id=int(entry["id"]),
+                            room_id=self.room.id,
+                            pseudo=entry["pseudo"],
+                            session_id=entry["session_id"],
+                            is_owner=entry["is_owner"],
+                            score=entry["score"],
+                        )
+                    )
+            return
+
+        new_players = await get_db_executor().run(
+            self.room_code,
+            lambda: list(
+                Player.objects.filter(room_id=self.room.id)
+                .exclude(id__in=[int(pid) for pid in self.players])
+                .order_by("id")
+            ),
+        )
+        for player in new_players:
+            self.add_player(player)
+
+    # --- Joueurs ---
+    def add_player(self, player):
+        if str(player.id) not in self.players:
+            self.players[str(player.id)] = player
+            self.leaderboard.update(player.id, player.score)
+            self._bump_roster(player.id)
+
+    def remove_player(self, player_id):
+        self._score_ops.pop(str(player_id), None)
+        self.leaderboard.remove(player_id)
+        self.online.discard(str(player_id))
+        self._roster_updates[str(player_id)] = None
+        if self.round and str(self.round.current_player_id) == str(player_id):
+            # Le round disparaît en base avec son joueur (CASCADE) : ses lignes
+            # en attente n'ont plus de round où être écrites
+            self._drop_round(self.round.id)
+        self._schedule_flush()
+        player = self.players.pop(str(player_id), None)
+        if player:
+            self._bump_roster(player_id, removed=True)
+        return player
+
+    def _drop_round(self, round_id):
+        """Écarte les écritures en attente d'un round supprimé, et les suivantes"""
+        self._dropped_rounds.add(round_id)
+        self._new_clues = [c for c in self._new_clues if c["round_id"] != round_id]
+        self._new_guesses = [g for g in self._new_guesses if g["round_id"] != round_id]
+        if self.round and self.round.id == round_id:
+            self._dirty_round.clear()
+
+    def set_online(self, player_id, online):
+        if online:
+            self.online.add(str(player_id))
+        else:
+            self.online.discard(str(player_id))
+        self._touch_roster(player_id)
+
+    def set_owner(self, player_id):
+        """Transfère la propriété de la room au joueur (en mémoire)"""
+        for pid, player in self.players.items():
+            if player.is_owner != (pid == str(player_id)):
+                player.is_owner = pid == str(player_id)
+                self._touch_roster(pid)
+
+    def _touch_roster(self, player_id):
+        player = self.players.get(str(player_id))
+        if player:
+            self._roster_updates[str(player_id)] = roster_entry(
+                player, str(player_id) in self.online
+            )
+            self._bump_roster(player_id)
+            self._schedule_flush()
+
+    def _bump_roster(self, player_id, removed=False):
+        self.roster_version += 1
+        if removed:
+            self._delta_changed.discard(str(player_id))
+            self._delta_removed.add(str(player_id))
+        else:
+            self._delta_removed.discard(str(player_id))
+            self._delta_changed.add(str(player_id))
+
+    def full_roster(self, published=False):
+        """
+        Roster complet et sa version. `published` : il est diffusé à toute la
+        room, le prochain delta repart de cette version.
+        """
+        if published:
+            self._reset_delta()
+        return {"rosterVersion": self.roster_version, "players": self.players_list()}
+
+    def roster_delta(self):
+        """
+        Joueurs changés depuis le précédent delta, à diffuser à toute la room.
+        Un client dont la version est au moins `rosterBase` applique les
+        entrées (état courant complet du joueur) ; sinon il redemande le roster
+        (roster_sync). Le rang n'y figure pas : il se déduit des scores.
+        """
+        delta = {
+            "rosterVersion": self.roster_version,
+            "rosterBase": self._delta_base,
+            "changedPlayers": [
+                self._player_entry(player_id, self.players[player_id])
+                for player_id in sorted(self._delta_changed, key=int)
+            ],
+            "removedPlayers": sorted(self._delta_removed, key=int),
+        }
+        self._reset_delta()
+        return delta
+
+    def _reset_delta(self):
+        self._delta_base = self.roster_version
+        self._delta_changed = set()
+        self._delta_removed = set()
+
+    def get_player(self, player_id):
+        return self.players.get(str(player_id))
+
+    def get_player_by_session(self, session_id):
+        return next(
+            (p for p in self.players.values() if str(p.session_id) == session_id),
+            None,
+        )
+
+    def _player_entry(self, player_id, player):
+        return {
+            "id": player_id,
+            "pseudo": player.pseudo,
+            "is_owner": player.is_owner,
+            "score": player.score,
+            "online": player_id in self.online,
+        }
+
+    def players_list(self):
+        return [
+            {
+                **self._player_entry(player_id, player),
+                "rank": self.leaderboard.rank(player_id),
+            }
+            for player_id, player in self.players.items()
+        ]
+
+    def add_points(self, player_id, points):
+        """Ajoute des points au joueur (score minimum 0)"""
+        player = self.players.get(str(player_id))
+        if not player:
+            return None
+        player.score = max((player.score or 0) + points, 0)
+        self.leaderboard.update(player_id, player.score)
+        self._add_score_op(player_id, (points, 0))
+        self._touch_roster(player_id)
+        return player.score
+
+    def _add_score_op(self, player_id, op):
+        pending = self._score_ops.get(str(player_id))
+        self._score_ops[str(player_id)] = (
+            compose_score_ops(pending, op) if pending else op
+        )
+
+    # --- Room et round ---
+    def update_room(self, **fields):
+        for key, value in fields.items():
+            setattr(self.room, key, value)
+            self._dirty_room.add(self._attname(self.room, key))
+        self._schedule_flush()
+
+    def update_round(self, **fields):
+        for key, value in fields.items():
+            setattr(self.round, key, value)
+            self._dirty_round.add(self._attname(self.round, key))
+        if "word" in fields:
+            self.word_key = normalize_word(self.round.word)
+        self._schedule_flush()
+
+    def add_clue(self, text, player_id, normalized=None):
+        """Ajoute un indice au round courant ; les devineurs peuvent rejouer"""
+        if normalized is None:
+            normalized = normalize_word(text)
+        self._new_clues.append(
+            {
+                "round_id": self.round.id,
+                "player_id": int(player_id) if player_id else None,
+                "position": len(self.clues),
+                "text": text,
+                "normalized": normalized,
+            }
+        )
+        self.clues.append(text)
+        self.clue_keys.add(normalized)
+        self.guessing_players = []
+        self._schedule_flush()
+
+    def add_guess(self, player_id, word, normalized=None):
+        """Ajoute une tentative au round courant et retourne son horodatage"""
+        if normalized is None:
+            normalized = normalize_word(word)
+        created_at = timezone.now()
+        self._new_guesses.append(
+            {
+                "round_id": self.round.id,
+                "player_id": int(player_id),
+                "word": word,
+                "normalized": normalized,
+                "clue_count": len(self.clues),
+                "created_at": created_at,
+            }
+        )
+        guess = {
+            "playerId": str(player_id),
+            "word": word,
+            "timestamp": created_at.isoformat(),
+        }
+        self.guesses.append(guess)
+        self.guess_keys.add(normalized)
+        if guess["playerId"] not in self.guessing_players:
+            self.guessing_players.append(guess["playerId"])
+        self._schedule_flush()
+        return guess["timestamp"]
+
+    @staticmethod
+    def _attname(instance, name):
+        # Les relations sont écrites via leur colonne (ex: current_round -> current_round_id)
+        return instance._meta.get_field(name).attname
+
+    async def start_round(self, player_id):
+        """Crée le nouveau round en base (son id est nécessaire) et le rend courant"""
+        await self.flush()
+        Round = apps.get_model("game", "Round")
+        GameRoom = apps.get_model("game", "GameRoom")
+
+        player = self.players.get(str(player_id))
+
+        def create():
+            with transaction.atomic():
+                round = Round.objects.create(
+                    game_room_id=self.room.id,
+                    current_player_id=player_id,
+                    phase="choice",
+                )
+                GameRoom.objects.filter(id=self.room.id).update(current_round=round)
+            if player:
+                round.current_player = player
+            else:
+                round.current_player  # charge le joueur tant qu'on est dans le thread
+            return round
+
+        round = await get_db_executor().run(self.room_code, create)
+        self.round = round
+        self.room.current_round = round
+        self._set_round_history([], [])
+        return round
+
+    async def reset_game(self):
+        """Remet les scores et la room à zéro et supprime les rounds précédents"""
+        for player_id, player in self.players.items():
+            player.score = 0
+            self.leaderboard.update(player_id, 0)
+            self._add_score_op(player_id, (None, 0))
+            self._touch_roster(player_id)
+        self.round = None
+        self._set_round_history([], [])
+        self.update_room(
+            current_word_choices=None,
+            current_turn=0,
+            current_round=None,
+            completed_rounds=0,
+        )
+        await self.flush()
+
+        Round = apps.get_model("game", "Round")
+        await get_db_executor().run(
+            self.room_code,
+            lambda: Round.objects.filter(game_room_id=self.room.id).delete(),
+        )
+
+    # --- Persistance différée ---
+    @property
+    def is_dirty(self):
+        return self.has_db_changes or bool(self._roster_updates)
+
+    @property
+    def has_db_changes(self):
+        return bool(
+            self._dirty_room
+            or self._dirty_round
+            or self._score_ops
+            or self._new_clues
+            or self._new_guesses
+        )
+
+    def _take_snapshot(self):
+        """Copie les champs modifiés (pour l'écriture dans un thread) et les marque propres"""
+        dropped = self._dropped_rounds
+        if self.round and self.round.id in dropped:
+            self._dirty_round.clear()
+        snapshot = {
+            "room_id": self.room.id,
+            "room": {f: copy.deepcopy(getattr(self.room, f)) for f in self._dirty_room},
+            "round_id": self.round.id if self.round and self._dirty_round else None,
+            "round": (
+                {f: copy.deepcopy(getattr(self.round, f)) for f in self._dirty_round}
+                if self.round
+                else {}
+            ),
+            "scores": {int(pid): op for pid, op in self._score_ops.items()},
+            # Lignes d'un round supprimé (restaurées après un échec, ou ajoutées
+            # depuis) : elles ne pourraient qu'échouer
+            "clues": [c for c in self._new_clues if c["round_id"] not in dropped],
+            "guesses": [g for g in self._new_guesses if g["round_id"] not in dropped],
+        }
+        self._dirty_room.clear()
+        self._dirty_round.clear()
+        self._score_ops = {}
+        self._new_clues = []
+        self._new_guesses = []
+        return snapshot
+
+    def _restore(self, snapshot):
+        """Remet en « sales » les champs d'un lot dont l'écriture a échoué"""
+        self._dirty_room.update(snapshot["room"])
+        if (
+            snapshot["round_id"]
+            and self.round
+            and self.round.id == snapshot["round_id"]
+        ):
+            self._dirty_round.update(snapshot["round"])
+        for pid, op in snapshot["scores"].items():
+            pending = self._score_ops.get(str(pid))
+            self._score_ops[str(pid)] = (
+                compose_score_ops(op, pending) if pending else op
+            )
+        self._new_clues = snapshot["clues"] + self._new_clues
+        self._new_guesses = snapshot["guesses"] + self._new_guesses
+
+    @staticmethod
+    def _split_snapshot(snapshot):
+        """Le lot découpé en éléments : [(nature, lot ne contenant que cet élément)]"""
+        empty = {
+            "room_id": snapshot["room_id"],
+            "room": {},
+            "round_id": None,
+            "round": {},
+            "scores": {},
+            "clues": [],
+            "guesses": [],
+        }
+        parts = []
+        if snapshot["room"]:
+            parts.append(("room", {**empty, "room": snapshot["room"]}))
+        if snapshot["round_id"]:
+            parts.append(
+                (
+                    "round",
+                    {
+                        **empty,
+                        "round_id": snapshot["round_id"],
+                        "round": snapshot["round"],
+                    },
+                )
+            )
+        if snapshot["scores"]:
+            parts.append(("scores", {**empty, "scores": snapshot["scores"]}))
+        parts += [("clue", {**empty, "clues": [row]}) for row in snapshot["clues"]]
+        parts += [("guess", {**empty, "guesses": [row]}) for row in snapshot["guesses"]]
+        return parts
+
+    @staticmethod
+    def _write_snapshot(snapshot):
+        GameRoom = apps.get_model("game", "GameRoom")
+        Round = apps.get_model("game", "Round")
+        Player = apps.get_model("game", "Player")
+        Clue = apps.get_model("game", "Clue")
+        Guess = apps.get_model("game", "Guess")
+
+        if snapshot["room"]:
+            GameRoom.objects.filter(id=snapshot["room_id"]).update(**snapshot["room"])
+        if snapshot["round_id"]:
+            Round.objects.filter(id=snapshot["round_id"]).update(
+                updated_at=timezone.now(), **snapshot["round"]
+            )
+        if snapshot["scores"]:
+            # Une seule mise à jour relative, bornée à 0 par la base : les
+            # points ajoutés entre-temps par un autre écrivain sont conservés
+            Player.objects.filter(id__in=snapshot["scores"]).update(
+                score=Case(
+                    *(
+                        When(
+                            id=pid,
+                            then=(
+                                Value(floor)
+                                if shift is None
+                                else Greatest(F("score") + shift, Value(floor))
+                            ),
+                        )
+                        for pid, (shift, floor) in snapshot["scores"].items()
+                    ),
+                    default=F("score"),
+                )
+            )
+        # Indices et tentatives : un INSERT par table
+        if snapshot["clues"]:
+            Clue.objects.bulk_create([Clue(**row) for row in snapshot["clues"]])
+        if snapshot["guesses"]:
+            Guess.objects.bulk_create([Guess(**row) for row in snapshot["guesses"]])
+
+    @classmethod
+    def _write_room(cls, room_code, snapshot, isolate=False):
+        """
+        Écrit le lot d'une room dans sa propre transaction : une room en erreur
+        ne bloque pas les autres. Retourne None, ou (erreur, lots non écrits).
+        """
+        if not isolate:
+            try:
+                with transaction.atomic():
+                    cls._write_snapshot(snapshot)
+            except Exception as exc:
+                return exc, [snapshot]
+            return None
+
+        # Dernière tentative : un élément par transaction ; ceux que la base
+        # refuse encore (ligne trop longue, round supprimé...) sont écartés
+        parts = cls._split_snapshot(snapshot)
+        for index, (kind, part) in enumerate(parts):
+            try:
+                with transaction.atomic():
+                    cls._write_snapshot(part)
+            except (DataError, IntegrityError) as exc:
+                cls._dead_letter(room_code, kind, part, exc)
+            except Exception as exc:
+                # La base elle-même est en cause : le reste sera retenté
+                return exc, [part for _, part in parts[index:]]
+        return None
+
+    @staticmethod
+    def _dead_letter(room_code, kind, part, error):
+        DeadLetter = apps.get_model("game", "DeadLetter")
+        payload = {key: value for key, value in part.items() if value}
+        logger.error(
+            "Écriture abandonnée après %s tentatives (room %s, %s) : %s",
+            WRITE_ATTEMPTS,
+            room_code,
+            kind,
+            error,
+        )
+        try:
+            DeadLetter.objects.create(
+                room_code=room_code, kind=kind, payload=payload, error=str(error)
+            )
+        except Exception:
+            logger.exception("Lettre morte non enregistrée : %r", payload)
+
+    @classmethod
+    async def _publish_roster(cls, states):
+        """Publie en un lot les changements de roster des rooms"""
+        updates = {}
+        for state in states:
+            if state._roster_updates:
+                updates[state.room_code] = state._roster_updates
+                state._roster_updates = {}
+        if updates:
+            try:
+                await get_roster().apply(updates)
+            except Exception:
+                # Le roster est réinitialisé depuis la base au prochain chargement
+                logger.exception("Échec de la publication du roster")
+
+    @classmethod
+    async def _write_batch(cls, states):
+        await cls._publish_roster(states)
+        states = [state for state in states if state.has_db_changes]
+        if not states:
+            return
+        pending = [(state, state._take_snapshot()) for state in states]
+        # Chaque room dans sa file : pas de course avec ses autres écritures
+        # (suppression des rounds, libération de la room)
+        results = await asyncio.gather(
+            *(
+                get_db_executor().run(
+                    state.room_code,
+                    cls._write_room,
+                    state.room_code,
+                    snapshot,
+                    state._write_failures + 1 >= WRITE_ATTEMPTS,
+                )
+                for state, snapshot in pending
+            ),
+            return_exceptions=True,
+        )
+
+        errors = []
+        for (state, snapshot), result in zip(pending, results):
+            if result is None:
+                state._write_failures = 0
+                continue
+            error, unwritten = (
+                (result, [snapshot]) if isinstance(result, Exception) else result
+            )
+            state._write_failures += 1
+            for part in reversed(unwritten):
+                state._restore(part)
+            errors.append(error)
+        if errors:
+            raise errors[0]
+
+    async def flush(self):
+        """Écrit immédiatement en base les modifications en attente de cette room"""
+        if self._loaded and self.is_dirty:
+            await self._write_batch([self])
+
+    def _schedule_flush(self):
+        cls = type(self)
+        if cls._flush_task is None or cls._flush_task.done():
+            cls._flush_task = asyncio.get_running_loop().create_task(cls._flush_loop())
+
+    @classmethod
+    async def _flush_loop(cls):
+        """Écrit par lots toutes les rooms modifiées, tant qu'il reste des modifications"""
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            dirty = [state for state in cls._instances.values() if state.is_dirty]
+            if not dirty:
+                return
+            try:
+                await cls._write_batch(dirty)
+            except Exception:
+                logger.exception("Échec de l'écriture différée des rooms")
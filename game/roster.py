@@ -0,0 +1,146 @@
+import json
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+def roster_entry(player, online=False):
+    """Entrée du roster d'un joueur (Player)"""
+    return {
+        "id": str(player.id),
+        "pseudo": player.pseudo,
+        "session_id": str(player.session_id),
+        "is_owner": player.is_owner,
+        "score": player.score or 0,
+        "online": online,
+    }
+
+
+class BaseRoster:
+    """
+    Roster des rooms hors de la base : pseudo, propriétaire, score et présence
+    de chaque joueur, par room.
+
+    Les vues y ajoutent les joueurs qu'elles créent (seule écriture
+    synchrone) ; RoomState le réinitialise au chargement d'une room puis y
+    publie par lots les changements (scores, propriétaire, présence, départs).
+    Les consumers y découvrent les nouveaux joueurs sans requête SQL.
+    """
+
+    def add(self, room_code, entry):
+        """Ajoute un joueur (depuis une vue, hors boucle asyncio)"""
+        raise NotImplementedError
+
+    async def get(self, room_code):
+        """Entrées des joueurs triées par id, ou None si la room est inconnue"""
+        raise NotImplementedError
+
+    async def replace(self, room_code, entries):
+        raise NotImplementedError
+
+    async def apply(self, updates):
+        """updates = {room_code: {player_id: entrée, ou None pour un départ}}"""
+        raise NotImplementedError
+
+    async def discard(self, room_code):
+        raise NotImplementedError
+
+    @staticmethod
+    def _sorted(entries):
+        return sorted(entries, key=lambda entry: int(entry["id"]))
+
+
+class LocalRoster(BaseRoster):
+    """Équivalent en mémoire (un seul processus)"""
+
+    def __init__(self, **kwargs):
+        self._rooms = {}  # {room_code: {player_id: entrée}}
+
+    def add(self, room_code, entry):
+        self._rooms.setdefault(room_code, {})[entry["id"]] = entry
+
+    async def get(self, room_code):
+        players = self._rooms.get(room_code)
+        return self._sorted(players.values()) if players else None
+
+    async def replace(self, room_code, entries):
+        self._rooms[room_code] = {entry["id"]: entry for entry in entries}
+
+    async def apply(self, updates):
+        for room_code, players in updates.items():
+            roster = self._rooms.setdefault(room_code, {})
+            for player_id, entry in players.items():
+                if entry is None:
+                    roster.pop(player_id, None)
+                else:
+                    roster[player_id] = entry
+
+    async def discard(self, room_code):
+        self._rooms.pop(room_code, None)
+
+
+class RedisRoster(BaseRoster):
+    """Un hash `{prefix}:roster:{room_code}` par room : id du joueur -> entrée JSON"""
+
+    def __init__(self, url="redis://127.0.0.1:6379/0", prefix="maudit", **kwargs):
+        import redis
+        from redis import asyncio as aioredis
+
+        # Client synchrone pour les vues, asynchrone pour les consumers
+        self.redis = redis.Redis.from_url(url, decode_responses=True)
+        self.aredis = aioredis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+
+    def key(self, room_code):
+        return f"{self.prefix}:roster:{room_code}"
+
+    def add(self, room_code, entry):
+        self.redis.hset(self.key(room_code), entry["id"], json.dumps(entry))
+
+    async def get(self, room_code):
+        players = await self.aredis.hgetall(self.key(room_code))
+        if not players:
+            return None
+        return self._sorted(json.loads(entry) for entry in players.values())
+
+    async def replace(self, room_code, entries):
+        async with self.aredis.pipeline(transaction=True) as pipe:
+            pipe.delete(self.key(room_code))
+            if entries:
+                pipe.hset(
+                    self.key(room_code),
+                    mapping={entry["id"]: json.dumps(entry) for entry in entries},
+                )
+            await pipe.execute()
+
+    async def apply(self, updates):
+        # Toutes les rooms du lot en un seul aller-retour
+        async with self.aredis.pipeline(transaction=False) as pipe:
+            for room_code, players in updates.items():
+                removed = [pid for pid, entry in players.items() if entry is None]
+                changed = {
+                    pid: json.dumps(entry)
+                    for pid, entry in players.items()
+                    if entry is not None
+                }
+                if removed:
+                    pipe.hdel(self.key(room_code), *removed)
+                if changed:
+                    pipe.hset(self.key(room_code), mapping=changed)
+            await pipe.execute()
+
+    async def discard(self, room_code):
+        await self.aredis.delete(self.key(room_code))
+
+
+_roster = None
+
+
+def get_roster():
+    """Retourne le roster configuré par PLAYER_ROSTER (un par processus)"""
+    global _roster
+    if _roster is None:
+        config = getattr(settings, "PLAYER_ROSTER", {})
+        backend = import_string(config.get("BACKEND", "game.roster.LocalRoster"))
+        _roster = backend(**config.get("CONFIG", {}))
+    return _roster
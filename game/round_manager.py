@@ -1,146 +1,119 @@
-from datetime import datetime
-import time
-from channels.db import database_sync_to_async
-from django.apps import apps
+from channels.layers import get_channel_layer
+
+from .roles import set_clue_giver
+from .room_state import RoomState
 
 
 class RoundManager:
+    """
+    Gestion du round courant d'une room.
+
+    Toutes les lectures et écritures passent par le RoomState en mémoire :
+    seule la création d'un round touche directement la base, les autres
+    modifications sont persistées en différé (et forcées en fin de round).
+    """
+
     def __init__(self, room_code):
         self.room_code = room_code
 
-    @database_sync_to_async
-    def start_new_round(self, player_id):
-        GameRoom = apps.get_model("game", "GameRoom")
-        Round = apps.get_model("game", "Round")
-
-        room = GameRoom.objects.get(code=self.room_code)
-        round = Round.objects.create(
-            game_room=room, current_player_id=player_id, phase="choice"
-        )
-        room.current_round = round
-        room.save()
+    async def get_state(self):
+        return await RoomState.get(self.room_code)
+
+    async def start_new_round(self, player_id):
+        state = await self.get_state()
+        round = await state.start_round(player_id)
+        # Le mot et les choix de mots ne partent plus qu'à ce joueur
+        await set_clue_giver(get_channel_layer(), state, player_id)
         return round
 
-    @database_sync_to_async
-    def update_phase(self, phase, **kwargs):
-        GameRoom = apps.get_model("game", "GameRoom")
-        room = GameRoom.objects.get(code=self.room_code)
-        round = room.current_round
-        round.phase = phase
+    async def update_phase(self, phase, **kwargs):
+        state = await self.get_state()
+        state.update_round(phase=phase, **kwargs)
+        return state.round
 
-        # reset les joueurs qui ont deviné
-        if phase == "guess":
-            round.guessing_players = []
+    async def add_clue(self, clue, normalized=None):
+        # Un nouvel indice remet à zéro les joueurs qui ont deviné
+        state = await self.get_state()
+        state.add_clue(clue, state.round.current_player_id, normalized)
 
-        for key, value in kwargs.items():
-            setattr(round, key, value)
+    async def add_guess(self, player_id, word, normalized=None):
+        """Retourne (position de la tentative dans le round, devineurs, horodatage)"""
+        state = await self.get_state()
 
-        round.save()
-        return round
+        # Vérifie si le joueur n'a pas déjà deviné dans cette phase
+        if player_id in state.guessing_players:
+            timestamp = None
+        else:
+            timestamp = state.add_guess(player_id, word, normalized)
 
-    @database_sync_to_async
-    def add_clue(self, clue):
-        GameRoom = apps.get_model("game", "GameRoom")
-        room = GameRoom.objects.get(code=self.room_code)
-        round = room.current_round
-        round.given_clues = round.given_clues + [clue]
-        round.save()
-
-    @database_sync_to_async
-    def add_guessing_player(self, player_id):
-        GameRoom = apps.get_model("game", "GameRoom")
-        room = GameRoom.objects.get(code=self.room_code)
-        round = room.current_round
-        if player_id not in round.guessing_players:
-            round.guessing_players = round.guessing_players + [player_id]
-            round.save()
-
-    @database_sync_to_async
-    def add_guess(self, player_id, word):
-        GameRoom = apps.get_model("game", "GameRoom")
-        room = GameRoom.objects.get(code=self.room_code)
-        round = room.current_round
-        timestamp = datetime.now().isoformat()
-
-        # Ajoute la tentative à l'historique
-        new_guess = {
-            "playerId": player_id,
-            "word": word,
-            "timestamp": timestamp,
-        }
+        return len(state.guesses) - 1, list(state.guessing_players), timestamp
+
+    async def complete_round(self, word_found=False, winner_id=None):
+        state = await self.get_state()
+        fields = {"is_completed": True, "word_found": word_found}
+        if winner_id:
+            fields["winner_id"] = int(winner_id)
+        state.update_round(**fields)
 
-        if not round.given_guesses:
-            round.given_guesses = []
+        # Fin de round : on persiste immédiatement le round et les scores
+        await state.flush()
 
-        if not round.guessing_players:
-            round.guessing_players = []
+    async def get_current_round(self):
+        state = await self.get_state()
+        return state.round if state else None
 
-        # Vérifie si le joueur n'a pas déjà deviné dans cette phase
-        if player_id not in round.guessing_players:
-            round.given_guesses.append(new_guess)
-            round.guessing_players.append(player_id)
-            round.save()
-
-        return round.given_guesses, round.guessing_players, timestamp
-
-    @database_sync_to_async
-    def complete_round(self, word_found=False, winner_id=None):
-        GameRoom = apps.get_model("game", "GameRoom")
-        room = GameRoom.objects.get(code=self.room_code)
-        round = room.current_round
-        round.is_completed = True
-        round.word_found = word_found
-        if winner_id:
-            round.winner_id = winner_id
-        round.save()
-
-    @database_sync_to_async
-    def get_current_round(self):
-        GameRoom = apps.get_model("game", "GameRoom")
-        try:
-            room = GameRoom.objects.get(code=self.room_code)
-            return room.current_round
-        except GameRoom.DoesNotExist:
+    async def get_round_snapshot(self):
+        """État compact du round courant, pour un client désynchronisé"""
+        state = await self.get_state()
+        round = state.round if state else None
+        if not round:
             return None
+        return {
+            "roundId": round.id,
+            "phase": round.phase,
+            "clues": list(state.clues),
+            # [playerId, mot, horodatage] : sans répéter les clés à chaque tentative
+            "guesses": [
+                [guess["playerId"], guess["word"], guess["timestamp"]]
+                for guess in state.guesses
+            ],
+            "guessingPlayers": list(state.guessing_players),
+            "isCompleted": round.is_completed,
+        }
 
-    @database_sync_to_async
-    def get_current_round_with_player(self):
+    async def get_current_round_with_player(self):
         """Récupère le round actuel avec les informations du joueur"""
-        GameRoom = apps.get_model("game", "GameRoom")
-        try:
-            room = GameRoom.objects.get(code=self.room_code)
-            round = room.current_round
-            if round:
-                return {
-                    "id": round.id,
-                    "phase": round.phase,
-                    "word": round.word,
-                    "required_clues": round.required_clues,
-                    "given_clues": round.given_clues,
-                    "given_guesses": round.given_guesses,
-                    "can_malus": round.can_malus,
-                    "guessing_players": round.guessing_players,
-                    "current_player": {
-                        "id": str(round.current_player.id),
-                        "pseudo": round.current_player.pseudo,
-                    },
-                }
-            return None
-        except GameRoom.DoesNotExist:
-            return None
-
-    @database_sync_to_async
-    def set_player_order(self, player_order):
+        state = await self.get_state()
+        round = state.round if state else None
+        if round:
+            return {
+                "id": round.id,
+                "phase": round.phase,
+                "word": round.word,
+                "required_clues": round.required_clues,
+                "given_clues": list(state.clues),
+                "given_guesses": list(state.guesses),
+                # Ensembles en lecture seule : tests d'appartenance en O(1)
+                "word_key": state.word_key,
+                "clue_keys": state.clue_keys,
+                "guess_keys": state.guess_keys,
+                "can_malus": round.can_malus,
+                "guessing_players": list(state.guessing_players),
+                "is_completed": round.is_completed,
+                "current_player": {
+                    "id": str(round.current_player_id),
+                    "pseudo": round.current_player.pseudo,
+                },
+            }
+        return None
+
+    async def set_player_order(self, player_order):
         """Définit l'ordre dans lequel les joueurs vont jouer"""
-        GameRoom = apps.get_model("game", "GameRoom")
-        room = GameRoom.objects.get(code=self.room_code)
-        room.player_order = player_order
-        room.save()
-        return room
-
-    @database_sync_to_async
-    def get_player_order(self):
+        state = await self.get_state()
+        state.update_room(player_order=player_order)
+        return state.room
+
+    async def get_player_order(self):
         """Récupère l'ordre des joueurs"""
-        GameRoom = apps.get_model("game", "GameRoom")
-        room = GameRoom.objects.get(code=self.room_code)
-        return room.player_order
+        state = await self.get_state()
+        return state.room.player_order
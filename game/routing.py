@@ -1,6 +1,11 @@
 from django.urls import path
-from .consumers import GameConsumer
+from .consumers import GameConsumer, SpectatorConsumer
 
 websocket_urlpatterns = [
     path("ws/game/<str:room_code>/", GameConsumer.as_asgi(), name="game_ws"),
+    path(
+        "ws/game/<str:room_code>/spectate/",
+        SpectatorConsumer.as_asgi(),
+        name="spectator_ws",
+    ),
 ]
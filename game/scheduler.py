@@ -0,0 +1,242 @@
+import json
+import time
+import uuid
+from collections import deque
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .timing_wheel import TimingWheel
+
+
+def now_ms():
+    return int(time.time() * 1000)
+
+
+class BasePhaseScheduler:
+    """
+    Stocke les échéances des timers de phase, indépendamment des processus.
+
+    Chaque timer d'une room est décrit par un dict (timer_id, phase,
+    currentPlayer, deadline) et une liste d'événements datés (ticks et fin de
+    phase). `claim_due` retire atomiquement les événements échus : un événement
+    n'est réclamé qu'une seule fois, quel que soit le worker qui le réclame.
+    Programmer un nouveau timer ou l'annuler rend obsolètes les événements
+    restants de l'ancien timer.
+    """
+
+    def __init__(self, poll_interval=0.2, **kwargs):
+        self.poll_interval = poll_interval
+
+    @staticmethod
+    def new_timer_id():
+        return uuid.uuid4().hex
+
+    @staticmethod
+    def _member(room_code, timer_id, kind, value):
+        return f"{room_code}|{timer_id}|{kind}|{value}"
+
+    @staticmethod
+    def _parse_member(member):
+        room_code, timer_id, kind, value = member.split("|")
+        return room_code, timer_id, kind, int(value)
+
+    def _resolve(self, members, timers):
+        """Associe les événements réclamés à leur timer en ignorant ceux devenus obsolètes"""
+        due = []
+        for member in members:
+            room_code, timer_id, kind, value = self._parse_member(member)
+            timer = timers.get(room_code)
+            if timer and timer["timer_id"] == timer_id:
+                due.append((room_code, timer, kind, value))
+        return due
+
+    async def schedule(self, room_code, timer, events):
+        """Remplace le timer de la room ; events = [(fire_at_ms, kind, value), ...]"""
+        raise NotImplementedError
+
+    async def cancel(self, room_code):
+        raise NotImplementedError
+
+    async def get_timer(self, room_code):
+        raise NotImplementedError
+
+    async def finish(self, room_code, timer_id):
+        """Oublie le timer de la room s'il s'agit toujours de timer_id (fin de phase)"""
+        raise NotImplementedError
+
+    async def claim_due(self, now, limit=100, shard=None):
+        """
+        Retire et retourne les événements échus : [(room_code, timer, kind, value), ...]
+        Avec `shard`, les événements des rooms épinglées à un autre shard sont laissés
+        à leur propriétaire.
+        """
+        raise NotImplementedError
+
+
+class LocalPhaseScheduler(BasePhaseScheduler):
+    """
+    Équivalent en mémoire (un seul processus, timers perdus au redémarrage).
+
+    Les événements de toutes les rooms sont rangés dans une seule roue
+    temporelle dont le tick vaut `poll_interval` : programmer ou annuler un
+    timer est en O(1) par événement, et chaque tick du worker relève d'un coup
+    tous les événements échus.
+    """
+
+    def __init__(self, slots=64, levels=4, **kwargs):
+        super().__init__(**kwargs)
+        self._timers = {}  # {room_code: timer}
+        self._wheel = TimingWheel(
+            tick_ms=max(1, int(self.poll_interval * 1000)),
+            slots=slots,
+            levels=levels,
+            start_ms=now_ms(),
+        )
+        self._ready = deque()  # Événements échus pas encore réclamés (au-delà de limit)
+
+    # En mémoire, inutile de sérialiser les événements en chaînes
+    @staticmethod
+    def _member(room_code, timer_id, kind, value):
+        return room_code, timer_id, kind, value
+
+    @staticmethod
+    def _parse_member(member):
+        return member
+
+    async def schedule(self, room_code, timer, events):
+        await self.cancel(room_code)
+        members = []
+        for fire_at, kind, value in events:
+            member = self._member(room_code, timer["timer_id"], kind, value)
+            self._wheel.add(member, fire_at)
+            members.append(member)
+        self._timers[room_code] = {**timer, "members": members}
+
+    async def cancel(self, room_code):
+        timer = self._timers.pop(room_code, None)
+        if timer:
+            for member in timer["members"]:
+                self._wheel.remove(member)
+
+    async def get_timer(self, room_code):
+        return self._timers.get(room_code)
+
+    async def finish(self, room_code, timer_id):
+        timer = self._timers.get(room_code)
+        if timer and timer["timer_id"] == timer_id:
+            await self.cancel(room_code)
+
+    async def claim_due(self, now, limit=100, shard=None):
+        # Un seul processus : toutes les rooms sont locales
+        self._ready.extend(self._wheel.advance(now))
+        members = [self._ready.popleft() for _ in range(min(limit, len(self._ready)))]
+        return self._resolve(members, self._timers)
+
+
+class RedisPhaseScheduler(BasePhaseScheduler):
+    """
+    Échéances partagées entre workers dans Redis : un sorted set des événements
+    (score = date de déclenchement) et un hash des timers par room. Les timers
+    survivent au redémarrage d'un worker.
+    """
+
+    # Réclamation atomique : seul le worker qui retire l'événement le déclenche.
+    # Avec un shard (ARGV[3]), les rooms épinglées ailleurs (KEYS[2]) sont ignorées
+    CLAIM_SCRIPT = """
+    local members = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+    local claimed = {}
+    for _, member in ipairs(members) do
+        local owner = false
+        if ARGV[3] ~= '' then
+            owner = redis.call('HGET', KEYS[2], string.match(member, '^[^|]*'))
+        end
+        if not owner or owner == ARGV[3] then
+            redis.call('ZREM', KEYS[1], member)
+            table.insert(claimed, member)
+        end
+    end
+    return claimed
+    """
+
+    FINISH_SCRIPT = """
+    local timer = redis.call('HGET', KEYS[1], ARGV[1])
+    if timer and cjson.decode(timer)['timer_id'] == ARGV[2] then
+        return redis.call('HDEL', KEYS[1], ARGV[1])
+    end
+    return 0
+    """
+
+    def __init__(self, url="redis://127.0.0.1:6379/0", prefix="maudit", **kwargs):
+        super().__init__(**kwargs)
+        from redis import asyncio as aioredis
+
+        self.redis = aioredis.from_url(url, decode_responses=True)
+        self.events_key = f"{prefix}:phase_events"
+        self.timers_key = f"{prefix}:phase_timers"
+        self.pins_key = f"{prefix}:room_shards"  # Épingles de RedisShardDirectory
+        self._claim = self.redis.register_script(self.CLAIM_SCRIPT)
+        self._finish = self.redis.register_script(self.FINISH_SCRIPT)
+
+    async def schedule(self, room_code, timer, events):
+        previous = await self.get_timer(room_code)
+        members = {
+            self._member(room_code, timer["timer_id"], kind, value): fire_at
+            for fire_at, kind, value in events
+        }
+        async with self.redis.pipeline(transaction=True) as pipe:
+            if previous and previous["members"]:
+                pipe.zrem(self.events_key, *previous["members"])
+            pipe.hset(
+                self.timers_key,
+                room_code,
+                json.dumps({**timer, "members": list(members)}),
+            )
+            if members:
+                pipe.zadd(self.events_key, members)
+            await pipe.execute()
+
+    async def cancel(self, room_code):
+        previous = await self.get_timer(room_code)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            if previous and previous["members"]:
+                pipe.zrem(self.events_key, *previous["members"])
+            pipe.hdel(self.timers_key, room_code)
+            await pipe.execute()
+
+    async def get_timer(self, room_code):
+        timer = await self.redis.hget(self.timers_key, room_code)
+        return json.loads(timer) if timer else None
+
+    async def finish(self, room_code, timer_id):
+        await self._finish(keys=[self.timers_key], args=[room_code, timer_id])
+
+    async def claim_due(self, now, limit=100, shard=None):
+        members = await self._claim(
+            keys=[self.events_key, self.pins_key], args=[now, limit, shard or ""]
+        )
+        if not members:
+            return []
+        room_codes = sorted({self._parse_member(m)[0] for m in members})
+        values = await self.redis.hmget(self.timers_key, room_codes)
+        timers = {
+            room_code: json.loads(value)
+            for room_code, value in zip(room_codes, values)
+            if value
+        }
+        return self._resolve(members, timers)
+
+
+_scheduler = None
+
+
+def get_scheduler():
+    """Retourne le scheduler configuré par PHASE_SCHEDULER (un par processus)"""
+    global _scheduler
+    if _scheduler is None:
+        config = getattr(settings, "PHASE_SCHEDULER", {})
+        backend = import_string(
+            config.get("BACKEND", "game.scheduler.LocalPhaseScheduler")
+        )
+        _scheduler = backend(**config.get("CONFIG", {}))
+    return _scheduler
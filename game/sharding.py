@@ -0,0 +1,388 @@
+import asyncio
+import bisect
+import hashlib
+import json
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .broadcast import group_broadcast
+from .event_log import RoomEventLog
+from .room_actor import RoomActor
+from .room_state import RoomState
+from .spectators import SpectatorFeed
+
+logger = logging.getLogger(__name__)
+
+
+def shard_hash(key):
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """
+    Anneau de hachage cohérent : chaque shard y place `replicas` points
+    virtuels, une room appartient au premier point qui suit son hash. Ajouter
+    ou retirer un shard ne déplace que les rooms des arcs concernés (~1/N).
+    """
+
+    def __init__(self, names, replicas=64):
+        points = sorted(
+            (shard_hash(f"{name}#{i}"), name) for name in names for i in range(replicas)
+        )
+        self.hashes = [point for point, _ in points]
+        self.names = [name for _, name in points]
+
+    def get(self, key):
+        if not self.names:
+            return None
+        index = bisect.bisect(self.hashes, shard_hash(key)) % len(self.hashes)
+        return self.names[index]
+
+
+class BaseShardDirectory:
+    """
+    Associe chaque room au worker (shard) qui détient son état en mémoire.
+
+    Les shards sont décrits par {nom: url websocket}. Une room est épinglée au
+    shard désigné par l'anneau lors de sa première résolution ; l'épingle reste
+    valable tant que le shard existe, même si un autre est ajouté entre-temps.
+    `set_shards` (rebalancement) note les rooms dont l'arc a changé de shard ;
+    leur ancien worker les cède via `hand_over_rooms` (écriture de l'état en
+    base, puis déplacement de l'épingle) : une room n'est jamais servie par
+    deux workers à la fois. Passé `handover_timeout` secondes (ancien worker
+    arrêté), l'épingle est déplacée à la première résolution.
+    Sans shard configuré, tout est local (un seul processus).
+    """
+
+    def __init__(
+        self,
+        shards=None,
+        local=None,
+        replicas=64,
+        check_interval=5.0,
+        handover_timeout=30.0,
+        **kwargs,
+    ):
+        self.config_shards = dict(shards or {})
+        self.local = local
+        self.replicas = replicas
+        self.check_interval = check_interval
+        self.handover_timeout = handover_timeout
+        self.moved = {}  # Rooms cédées par ce worker : {room_code: url websocket}
+        self._ring = None
+        self._ring_names = None
+
+    @property
+    def sharded(self):
+        return bool(self.config_shards)
+
+    def ring(self, shards):
+        names = tuple(sorted(shards))
+        if names != self._ring_names:
+            self._ring = HashRing(names, self.replicas)
+            self._ring_names = names
+        return self._ring
+
+    # --- Stockage des shards et des épingles ---
+    def _lookup(self, room_code):
+        """Retourne (shards, shard épinglé ou None, cession en attente ou None)"""
+        raise NotImplementedError
+
+    def _pin(self, room_code, shard):
+        raise NotImplementedError
+
+    def get_shards(self):
+        raise NotImplementedError
+
+    def get_pins(self):
+        raise NotImplementedError
+
+    def get_handovers(self):
+        """
+        Cessions en attente : {room_code: {"from", "to", "url", "deadline"}},
+        `url` étant l'adresse de l'ancien shard, qui sert la room d'ici là
+        """
+        raise NotImplementedError
+
+    def _store(self, shards, handovers):
+        """Remplace la liste des shards et les cessions en attente"""
+        raise NotImplementedError
+
+    def complete_handover(self, room_code, shard):
+        """Épingle la room à son nouveau shard et clôt sa cession"""
+        raise NotImplementedError
+
+    def release(self, room_code):
+        """Oublie l'épingle (et une éventuelle cession) d'une room terminée"""
+        raise NotImplementedError
+
+    # --- Résolution ---
+    def resolve(self, room_code):
+        """Retourne (nom du shard propriétaire, url websocket de la room)"""
+        if not self.sharded:
+            return self.local, None
+        shards, pinned, handover = self._lookup(room_code)
+        if handover:
+            if time.time() < handover["deadline"]:
+                # Pas encore cédée : la room reste chez son ancien shard
+                return pinned, self.room_url(handover["url"], room_code)
+            self.complete_handover(room_code, handover["to"])
+            pinned = handover["to"]
+        if pinned not in shards:
+            # Room nouvelle, ou shard retiré : l'anneau désigne le propriétaire
+            pinned = self.ring(shards).get(room_code)
+            self._pin(room_code, pinned)
+        return pinned, self.room_url(shards.get(pinned), room_code)
+
+    @staticmethod
+    def room_url(base, room_code):
+        return f"{base.rstrip('/')}/ws/game/{room_code}/" if base else None
+
+    def owner(self, room_code):
+        return self.resolve(room_code)[0]
+
+    def endpoint(self, room_code):
+        return self.resolve(room_code)[1]
+
+    def set_shards(self, shards):
+        """
+        Rebalancement : remplace la liste des shards et note la cession des
+        rooms épinglées dont l'arc appartient désormais à un autre shard (les
+        épingles ne bougent qu'une fois la room cédée par son ancien shard).
+        Retourne {room_code: (ancien shard, nouveau shard)}.
+        """
+        previous = self.get_shards()
+        ring = self.ring(shards)
+        deadline = time.time() + self.handover_timeout
+        moves = {}
+        handovers = {}
+        for room_code, shard in self.get_pins().items():
+            new_shard = ring.get(room_code)
+            if new_shard != shard:
+                moves[room_code] = (shard, new_shard)
+                handovers[room_code] = {
+                    "from": shard,
+                    "to": new_shard,
+                    "url": previous.get(shard, shards.get(shard)),
+                    "deadline": deadline,
+                }
+        self._store(dict(shards), handovers)
+        return moves
+
+
+class LocalShardDirectory(BaseShardDirectory):
+    """Équivalent en mémoire (un seul processus, pour les tests)"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._shards = dict(self.config_shards)
+        self._pins = {}
+        self._handovers = {}
+
+    def _lookup(self, room_code):
+        return self._shards, self._pins.get(room_code), self._handovers.get(room_code)
+
+    def _pin(self, room_code, shard):
+        self._pins[room_code] = shard
+
+    def get_shards(self):
+        return dict(self._shards)
+
+    def get_pins(self):
+        return dict(self._pins)
+
+    def get_handovers(self):
+        return dict(self._handovers)
+
+    def _store(self, shards, handovers):
+        self._shards = shards
+        self._handovers = dict(handovers)
+
+    def complete_handover(self, room_code, shard):
+        self._pins[room_code] = shard
+        self._handovers.pop(room_code, None)
+
+    def release(self, room_code):
+        self._pins.pop(room_code, None)
+        self._handovers.pop(room_code, None)
+
+
+class RedisShardDirectory(BaseShardDirectory):
+    """
+    Shards et épingles partagés entre workers : hash `{prefix}:shards`
+    (initialisé depuis la configuration) et hash `{prefix}:room_shards`,
+    également lu par RedisPhaseScheduler pour ne réclamer que les timers des
+    rooms du worker. Les cessions en attente sont dans `{prefix}:room_handovers`
+    (JSON).
+    """
+
+    def __init__(self, url="redis://127.0.0.1:6379/0", prefix="maudit", **kwargs):
+        super().__init__(**kwargs)
+        import redis
+
+        self.redis = redis.Redis.from_url(url, decode_responses=True)
+        self.shards_key = f"{prefix}:shards"
+        self.pins_key = f"{prefix}:room_shards"
+        self.handovers_key = f"{prefix}:room_handovers"
+
+    def _lookup(self, room_code):
+        # Un seul aller-retour : liste des shards, épingle et cession de la room
+        with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hgetall(self.shards_key)
+            pipe.hget(self.pins_key, room_code)
+            pipe.hget(self.handovers_key, room_code)
+            shards, pinned, handover = pipe.execute()
+        if not shards:
+            shards = self._seed()
+        return shards, pinned, json.loads(handover) if handover else None
+
+    def _seed(self):
+        for name, url in self.config_shards.items():
+            self.redis.hsetnx(self.shards_key, name, url)
+        return self.redis.hgetall(self.shards_key)
+
+    def _pin(self, room_code, shard):
+        self.redis.hset(self.pins_key, room_code, shard)
+
+    def get_shards(self):
+        return self.redis.hgetall(self.shards_key) or self._seed()
+
+    def get_pins(self):
+        return self.redis.hgetall(self.pins_key)
+
+    def get_handovers(self):
+        return {
+            room_code: json.loads(handover)
+            for room_code, handover in self.redis.hgetall(self.handovers_key).items()
+        }
+
+    def _store(self, shards, handovers):
+        with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(self.shards_key, self.handovers_key)
+            pipe.hset(self.shards_key, mapping=shards)
+            if handovers:
+                pipe.hset(
+                    self.handovers_key,
+                    mapping={
+                        room_code: json.dumps(handover)
+                        for room_code, handover in handovers.items()
+                    },
+                )
+            pipe.execute()
+
+    def complete_handover(self, room_code, shard):
+        with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(self.pins_key, room_code, shard)
+            pipe.hdel(self.handovers_key, room_code)
+            pipe.execute()
+
+    def release(self, room_code):
+        with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hdel(self.pins_key, room_code)
+            pipe.hdel(self.handovers_key, room_code)
+            pipe.execute()
+
+
+_directory = None
+_watcher_task = None
+
+
+def get_shard_directory():
+    """Retourne l'annuaire configuré par ROOM_SHARDS (un par processus)"""
+    global _directory
+    if _directory is None:
+        config = getattr(settings, "ROOM_SHARDS", {})
+        backend = import_string(
+            config.get("BACKEND", "game.sharding.LocalShardDirectory")
+        )
+        _directory = backend(**config.get("CONFIG", {}))
+    return _directory
+
+
+async def remote_endpoint(room_code):
+    """Url websocket de la room si un autre worker la détient, sinon None"""
+    directory = get_shard_directory()
+    if not directory.sharded:
+        return None
+    owner, endpoint = await sync_to_async(directory.resolve, thread_sensitive=False)(
+        room_code
+    )
+    if owner == directory.local:
+        # La room a pu revenir à ce worker après un rebalancement
+        directory.moved.pop(room_code, None)
+        return None
+    return endpoint
+
+
+async def hand_over_rooms():
+    """Cède à leur nouveau propriétaire les rooms de ce worker réassignées ailleurs"""
+    directory = get_shard_directory()
+    if directory.sharded:
+        handovers = await sync_to_async(
+            directory.get_handovers, thread_sensitive=False
+        )()
+        shards = await sync_to_async(directory.get_shards, thread_sensitive=False)()
+        for room_code, handover in handovers.items():
+            if handover["from"] != directory.local:
+                continue
+            if room_code in RoomState._instances:
+                endpoint = directory.room_url(shards.get(handover["to"]), room_code)
+                await RoomActor.get_instance(room_code).submit(
+                    _hand_over, room_code, endpoint, handover["to"]
+                )
+            else:
+                await sync_to_async(
+                    directory.complete_handover, thread_sensitive=False
+                )(room_code, handover["to"])
+
+    # Rooms encore en mémoire mais épinglées ailleurs entre-temps
+    for room_code in list(RoomState._instances):
+        endpoint = await remote_endpoint(room_code)
+        if endpoint:
+            await RoomActor.get_instance(room_code).submit(
+                _hand_over, room_code, endpoint
+            )
+
+
+async def _hand_over(room_code, endpoint, new_shard=None):
+    # Les modifications en attente sont écrites avant que l'épingle ne bouge :
+    # le nouveau shard repart de la base et l'ancien ne sert plus la room
+    state = RoomState._instances.get(room_code)
+    if state:
+        await state.flush()
+    if new_shard:
+        await sync_to_async(
+            get_shard_directory().complete_handover, thread_sensitive=False
+        )(room_code, new_shard)
+    group_name = f"game_{room_code}"
+    # Flux des spectateurs cédé d'abord : il ne doit pas recharger la room ici
+    await SpectatorFeed.hand_over(group_name, endpoint)
+    await RoomState.discard(room_code)
+    get_shard_directory().moved[room_code] = endpoint
+    await group_broadcast(
+        get_channel_layer(), group_name, {"type": "shard_moved", "wsUrl": endpoint}
+    )
+    RoomEventLog.discard(group_name)
+    logger.info("Room %s cédée à %s", room_code, endpoint)
+
+
+def ensure_watcher():
+    """Lance (une fois par processus) la vérification périodique des rooms cédées"""
+    global _watcher_task
+    directory = get_shard_directory()
+    if directory.sharded and (_watcher_task is None or _watcher_task.done()):
+        _watcher_task = asyncio.get_running_loop().create_task(_watch(directory))
+
+
+async def _watch(directory):
+    while True:
+        await asyncio.sleep(directory.check_interval)
+        try:
+            await hand_over_rooms()
+        except Exception:
+            logger.exception("Impossible de vérifier les rooms à céder")
@@ -0,0 +1,175 @@
+import asyncio
+import logging
+
+from django.conf import settings
+
+from .event_log import RoomEventLog
+from .protocol import encode_for_group, frame_format
+from .room_state import RoomState
+from .scheduler import get_scheduler, now_ms
+
+logger = logging.getLogger(__name__)
+
+# Code de fermeture des spectateurs d'une room qui n'existe plus
+ROOM_GONE = 4004
+
+
+class SpectatorFeed:
+    """
+    Flux des spectateurs d'une room.
+
+    Les spectateurs ne sont pas dans le groupe de la room : ils ne reçoivent
+    aucun événement de jeu. Chaque diffusion à la room marque seulement le flux
+    comme modifié ; au plus SPECTATOR_UPDATE_RATE fois par seconde, un
+    instantané de la room est construit, encodé une seule fois et envoyé à
+    tous les spectateurs. Le coût côté joueurs ne dépend donc pas du nombre de
+    spectateurs.
+
+    Comme les joueurs, les spectateurs sont redirigés vers le worker qui
+    détient la room : l'envoi se fait directement aux consumers du processus,
+    sans passer par le channel layer (ni file ni dispatch par spectateur).
+    """
+
+    _instances = {}
+
+    @classmethod
+    def get_instance(cls, group_name):
+        if group_name not in cls._instances:
+            cls._instances[group_name] = cls(group_name)
+        return cls._instances[group_name]
+
+    @classmethod
+    def touch(cls, group_name):
+        """Un événement a été diffusé à la room (sans effet sans spectateur)"""
+        feed = cls._instances.get(group_name)
+        if feed:
+            feed.dirty = True
+
+    @classmethod
+    async def hand_over(cls, group_name, endpoint):
+        """Room cédée à un autre worker : ses spectateurs y sont redirigés"""
+        feed = cls._instances.pop(group_name, None)
+        if feed is None:
+            return
+        if feed._task:
+            feed._task.cancel()
+        event = encode_for_group(
+            {"type": "shard_moved", "wsUrl": f"{endpoint}spectate/"}, feed.formats
+        )
+        for viewer in list(feed.viewers):
+            await viewer.broadcast(event)
+
+    @classmethod
+    async def unload_room(cls, room_code):
+        """
+        Dernier spectateur parti : l'état de la room est oublié si aucun
+        joueur n'y est connecté (sinon rien ne le libérerait).
+        """
+        if f"game_{room_code}" in cls._instances:
+            return  # Un spectateur est arrivé entre-temps
+        state = RoomState.get_loaded(room_code)
+        if state and not state.online and not state.channels:
+            await RoomState.discard(room_code)
+
+    def __init__(self, group_name):
+        self.group_name = group_name
+        self.room_code = group_name.removeprefix("game_")
+        self.interval = 1 / getattr(settings, "SPECTATOR_UPDATE_RATE", 2)
+        self.viewers = set()  # SpectatorConsumer de ce processus
+        self.dirty = True
+        self.latest = None  # Dernier instantané encodé : {"text" et/ou "bytes"}
+        self._task = None
+
+    @property
+    def formats(self):
+        """Formats des spectateurs connectés (JSON sans spectateur)"""
+        return {frame_format(viewer.codec) for viewer in self.viewers} or {"text"}
+
+    async def join(self, viewer):
+        """Inscrit un spectateur ; retourne l'instantané à lui envoyer tout de suite"""
+        self.viewers.add(viewer)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        if self.latest is None or self.dirty:
+            await self.refresh()
+        return self.latest
+
+    def leave(self, viewer):
+        self.viewers.discard(viewer)
+        if not self.viewers:
+            if self._task:
+                self._task.cancel()
+            if self._instances.get(self.group_name) is self:
+                del self._instances[self.group_name]
+
+    async def refresh(self):
+        """Reconstruit l'instantané ; retourne False si la room n'existe plus"""
+        self.dirty = False
+        frame = await self.snapshot()
+        if frame is None:
+            return False
+        self.latest = encode_for_group(frame, self.formats)
+        return True
+
+    async def publish(self):
+        """Envoie l'instantané aux spectateurs s'il y a eu du nouveau"""
+        # Un état oublié sans passation (room supprimée) doit être revérifié
+        if not self.dirty and RoomState.get_loaded(self.room_code):
+            return
+        if not await self.refresh():
+            await self.close()
+            return
+        for viewer in list(self.viewers):
+            await viewer.broadcast(self.latest)
+
+    async def close(self):
+        """Room supprimée : ses spectateurs sont déconnectés et le flux oublié"""
+        if self._instances.get(self.group_name) is self:
+            del self._instances[self.group_name]
+        viewers = list(self.viewers)
+        self.viewers.clear()
+        for viewer in viewers:
+            await viewer.close(code=ROOM_GONE)
+        if self._task:
+            self._task.cancel()
+
+    async def snapshot(self):
+        state = await RoomState.get(self.room_code)
+        if not state:
+            return None
+        round = state.round
+        timer = await get_scheduler().get_timer(self.room_code)
+        frame = {
+            "type": "spectator_update",
+            # Dernier événement de la room pris en compte
+            "seq": RoomEventLog.get_instance(self.group_name).seq,
+            "players": state.players_list(),
+            "currentRound": state.room.completed_rounds,
+            "totalRounds": state.room.total_rounds,
+            "round": None,
+            "deadline": timer["deadline"] if timer else None,
+            "serverTime": now_ms(),
+        }
+        if round:
+            frame["round"] = {
+                "currentPlayer": str(round.current_player_id),
+                "phase": round.phase,
+                "requiredClues": round.required_clues,
+                "clues": list(state.clues),
+                "guesses": [[g["playerId"], g["word"]] for g in state.guesses],
+                "isCompleted": round.is_completed,
+                # Le mot n'est montré qu'une fois le round terminé
+                "word": round.word if round.is_completed else None,
+            }
+        return frame
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.publish()
+            except Exception:
+                logger.exception(
+                    "Impossible d'envoyer l'instantané aux spectateurs de %s",
+                    self.room_code,
+                )
@@ -1,3 +1,1456 @@
-from django.test import TestCase
+import asyncio
+import json
+import threading
+import time
+import unicodedata
+from unittest import mock
 
-# Create your tests here.
+import fakeredis
+import msgpack
+from asgiref.sync import sync_to_async
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.db import IntegrityError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.db.backends.signals import connection_created
+from django.db.models import F
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+
+from . import (
+    consumers,
+    room_codes,
+    db_executor,
+    grace_period,
+    protocol,
+    roles,
+    room_state,
+    roster,
+    scheduler,
+    sharding,
+    timer_manager,
+)
+from .broadcast import group_broadcast
+from .channel_layer import HybridChannelLayer
+from .event_log import RoomEventLog
+from .game_manager import GameManager
+from .leaderboard import Leaderboard
+from .models import DeadLetter, GameRoom, Guess, Player, Round
+from .room_state import RoomState
+from .routing import websocket_urlpatterns
+from .spectators import SpectatorFeed
+from .timer_manager import RoomTimerManager
+from .timing_wheel import TimingWheel
+from .word_deck import CATALOGUE, WordCatalogue, WordDeck
+
+# Nombre maximal de requêtes SQL par type de message entrant
+QUERY_BUDGETS = {
+    "init": 0,
+    "message": 0,
+    "start_game": 6,
+    "word_choice": 0,
+    "give_clue": 0,
+    "make_guess": 0,
+    "make_guess (mot trouvé)": 5,  # Room, round et scores + un INSERT Clue et un INSERT Guess
+    "join_game": 0,
+    "round_sync": 0,
+    "roster_sync": 0,
+    "timer_sync": 0,
+    "apply-malus": 0,
+    "leave_room": 6,
+}
+
+# Les gestionnaires d'événements de groupe (fan-out) ne font aucune requête
+FANOUT_QUERY_BUDGET = 0
+
+application = URLRouter(websocket_urlpatterns)
+
+
+class QueryCounter:
+    """
+    execute_wrapper qui compte les requêtes SQL exécutées sur les connexions
+    (hors BEGIN, émis explicitement par le backend SQLite uniquement)
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql != "BEGIN":
+            self.count += 1
+        return execute(sql, params, many, context)
+
+
+def with_fake_redis(backend, server, **config):
+    """Backend Redis branché sur un serveur fakeredis (partagé entre instances)"""
+
+    def from_url(url, **kwargs):
+        return fakeredis.FakeAsyncRedis(server=server, **kwargs)
+
+    def sync_from_url(url, **kwargs):
+        return fakeredis.FakeRedis(server=server, **kwargs)
+
+    with mock.patch("redis.asyncio.from_url", from_url), mock.patch(
+        "redis.Redis.from_url", sync_from_url
+    ):
+        return backend(**config)
+
+
+class QueryBudgetTests(TransactionTestCase):
+    """
+    Chaque type de message entrant passe par un vrai GameConsumer ; le test
+    échoue si son traitement (fan-out compris) dépasse son budget de requêtes.
+    """
+
+    def setUp(self):
+        # Les états en mémoire et tâches de fond ne survivent pas d'un test à l'autre
+        RoomState._instances.clear()
+        RoomState._flush_task = None
+        RoomTimerManager._instances.clear()
+        RoomEventLog._instances.clear()
+        SpectatorFeed._instances.clear()
+        RoomTimerManager._worker_task = None
+        scheduler._scheduler = None
+        db_executor._executor = None
+        sharding._directory = None
+        roster._roster = None
+        grace_period._grace_periods = None
+        grace_period._worker_task = None
+
+        self.room = GameRoom.objects.create(code="TEST01")
+        self.players = [
+            Player.objects.create(room=self.room, pseudo=pseudo, is_owner=i == 0)
+            for i, pseudo in enumerate(["alice", "bob", "carol"])
+        ]
+        # Les requêtes passent par les threads de l'exécuteur : chaque nouvelle
+        # connexion est comptée, comme celle du thread principal
+        self.queries = QueryCounter()
+        connection.execute_wrappers.append(self.queries)
+        connection_created.connect(self.count_queries)
+
+    def tearDown(self):
+        connection_created.disconnect(self.count_queries)
+        connection.execute_wrappers.remove(self.queries)
+        db_executor.get_db_executor().shutdown()
+
+    def count_queries(self, sender, connection, **kwargs):
+        connection.execute_wrappers.append(self.queries)
+
+    async def connect(self, player, init=True):
+        communicator = WebsocketCommunicator(application, f"/ws/game/{self.room.code}/")
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        if init:
+            await communicator.send_json_to(
+                {"type": "init", "sessionId": str(player.session_id)}
+            )
+        return communicator
+
+    async def connect_all(self):
+        self.communicators = {}
+        for player in self.players:
+            self.communicators[str(player.id)] = await self.connect(player)
+        await self.drain()
+        return self.communicators
+
+    async def drain(self):
+        """Lit toutes les trames en attente ; retourne celles de chaque joueur"""
+        frames = {}
+        for player_id, communicator in self.communicators.items():
+            frames[player_id] = []
+            while not await communicator.receive_nothing(timeout=0.05):
+                output = await communicator.receive_output()
+                if output["type"] == "websocket.send":
+                    frames[player_id].append(json.loads(output["text"]))
+        return frames
+
+    async def disconnect_all(self):
+        for communicator in self.communicators.values():
+            await communicator.disconnect()
+
+    async def send(self, player_id, message, budget_name=None):
+        """Envoie un message, attend la fin de son traitement et vérifie le budget"""
+        before = self.queries.count
+        await self.communicators[player_id].send_json_to(message)
+        await asyncio.sleep(0.05)
+        frames = await self.drain()
+        used = self.queries.count - before
+        budget_name = budget_name or message["type"]
+        self.assertLessEqual(
+            used,
+            QUERY_BUDGETS[budget_name],
+            f"{budget_name} : {used} requêtes pour un budget de {QUERY_BUDGETS[budget_name]}",
+        )
+        return frames
+
+    async def start_game(self):
+        """Lance la partie ; retourne le game_started reçu par le premier joueur"""
+        owner = str(self.players[0].id)
+        frames = await self.send(owner, {"type": "start_game", "totalRounds": 1})
+        current = next(f for f in frames[owner] if f["type"] == "game_started")[
+            "currentPlayer"
+        ]
+        return next(f for f in frames[current] if f["type"] == "game_started")
+
+    async def choose_word(self, game_started):
+        current = game_started["currentPlayer"]
+        word = game_started["wordChoices"]["word1"]["word"]
+        await self.send(current, {"type": "word_choice", "word": word})
+        return current, word
+
+    def guessers(self, current):
+        return [player_id for player_id in self.communicators if player_id != current]
+
+    def freeze_clock(self):
+        """Horloge des timers pilotée par le test : retourne [maintenant (ms)]"""
+        clock = [scheduler.now_ms()]
+        patcher = mock.patch.object(timer_manager, "now_ms", lambda: clock[0])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return clock
+
+    async def advance(self, clock, now):
+        """Avance l'horloge ; retourne les timeLeft des timer_update de chaque joueur"""
+        clock[0] = now
+        await asyncio.sleep(0.2)  # Quelques passages du worker des timers
+        frames = await self.drain()
+        return [
+            [f["timeLeft"] for f in player_frames if f["type"] == "timer_update"]
+            for player_frames in frames.values()
+        ]
+
+    async def test_init(self):
+        await self.connect_all()
+        communicator = await self.connect(self.players[1], init=False)
+        self.communicators["late"] = communicator
+        await self.drain()
+        await self.send(
+            "late", {"type": "init", "sessionId": str(self.players[1].session_id)}
+        )
+        await self.disconnect_all()
+
+    async def test_game_messages(self):
+        await self.connect_all()
+        current, word = await self.choose_word(await self.start_game())
+        await self.send(current, {"type": "give_clue", "clue": "indice"})
+
+        first, second = self.guessers(current)
+        await self.send(first, {"type": "make_guess", "guess": "raté"})
+        await self.send(second, {"type": "join_game"})
+        frames = await self.send(
+            second,
+            {"type": "make_guess", "guess": word},
+            budget_name="make_guess (mot trouvé)",
+        )
+        self.assertIn("round_complete", [f["type"] for f in frames[first]])
+        await self.disconnect_all()
+
+    async def test_simultaneous_winning_guesses(self):
+        await self.connect_all()
+        current, word = await self.choose_word(await self.start_game())
+        await self.send(current, {"type": "give_clue", "clue": "indice"})
+
+        # Les deux devineurs trouvent le mot au même moment : un seul gagnant
+        first, second = self.guessers(current)
+        await asyncio.gather(
+            *(
+                self.communicators[player_id].send_json_to(
+                    {"type": "make_guess", "guess": word}
+                )
+                for player_id in (first, second)
+            )
+        )
+        await asyncio.sleep(0.1)
+        frames = await self.drain()
+
+        completed = [f for f in frames[current] if f["type"] == "round_complete"]
+        self.assertEqual(len(completed), 1)
+        # Seuls les joueurs dont le score a changé figurent dans le delta
+        changed = {p["id"] for p in completed[0]["changedPlayers"]}
+        self.assertEqual(len(changed & {first, second}), 1, "un seul devineur crédité")
+        await self.disconnect_all()
+
+    async def test_msgpack_protocol(self):
+        await self.connect_all()
+        communicator = WebsocketCommunicator(
+            application,
+            f"/ws/game/{self.room.code}/",
+            subprotocols=[protocol.MSGPACK_SUBPROTOCOL],
+        )
+        connected, subprotocol = await communicator.connect()
+        self.assertTrue(connected)
+        self.assertEqual(subprotocol, protocol.MSGPACK_SUBPROTOCOL)
+
+        room_state = msgpack.unpackb(await communicator.receive_from())
+        self.assertEqual(room_state["type"], protocol.TYPE_CODES["room_state"])
+
+        # Les trames de groupe arrivent en binaire pour ce client, en JSON pour les autres
+        await communicator.send_to(
+            bytes_data=msgpack.packb(
+                {
+                    "type": protocol.TYPE_CODES["init"],
+                    "sessionId": str(self.players[1].session_id),
+                }
+            )
+        )
+        welcome = msgpack.unpackb(await communicator.receive_from())
+        self.assertEqual(welcome["type"], protocol.TYPE_CODES["welcome"])
+        joined = msgpack.unpackb(await communicator.receive_from())
+        self.assertEqual(joined["type"], protocol.TYPE_CODES["player_joined"])
+
+        frames = await self.drain()
+        self.assertIn(
+            "player_joined", [f["type"] for f in frames[str(self.players[0].id)]]
+        )
+        await communicator.disconnect()
+        await self.disconnect_all()
+
+    async def test_only_connected_formats_are_encoded(self):
+        await self.connect_all()
+        alice = str(self.players[0].id)
+        event_log = RoomEventLog.get_instance(f"game_{self.room.code}")
+        epoch, last_seq = event_log.epoch, event_log.seq
+        await self.send(alice, {"type": "message", "message": "salut"})
+        # Aucun client binaire : pas de version msgpack
+        self.assertEqual(set(event_log.events[-1]) - {"seq"}, {"text"})
+
+        communicator = WebsocketCommunicator(
+            application,
+            f"/ws/game/{self.room.code}/",
+            subprotocols=[protocol.MSGPACK_SUBPROTOCOL],
+        )
+        await communicator.connect()
+        await communicator.receive_from()
+        await communicator.send_to(
+            bytes_data=msgpack.packb(
+                {
+                    "type": protocol.TYPE_CODES["init"],
+                    "sessionId": str(self.players[1].session_id),
+                    "epoch": epoch,
+                    "lastSeq": last_seq,
+                }
+            )
+        )
+        await communicator.receive_from()  # welcome
+        # Événement rejoué : transcodé depuis le JSON
+        replayed = msgpack.unpackb(await communicator.receive_from())
+        self.assertEqual(replayed["type"], protocol.TYPE_CODES["lobby_message"])
+        self.assertEqual(replayed["message"], "salut")
+        self.assertEqual(set(event_log.events[-1]) - {"seq"}, {"text", "bytes"})
+
+        await communicator.disconnect()
+        await self.drain()
+        await self.send(alice, {"type": "message", "message": "re"})
+        self.assertEqual(set(event_log.events[-1]) - {"seq"}, {"text"})
+        await self.disconnect_all()
+
+    async def test_accent_insensitive_matching(self):
+        await self.connect_all()
+        current, word = await self.choose_word(await self.start_game())
+        await self.send(current, {"type": "give_clue", "clue": "Élève"})
+
+        # Même indice sans accents ni majuscule : refusé
+        frames = await self.send(current, {"type": "give_clue", "clue": " eleve"})
+        self.assertEqual(frames[current][-1]["type"], "error")
+
+        # Le mot trouvé sans ses accents et en majuscules
+        guess = "".join(
+            c for c in unicodedata.normalize("NFKD", word) if c.isascii()
+        ).upper()
+        frames = await self.send(
+            self.guessers(current)[0],
+            {"type": "make_guess", "guess": guess},
+            budget_name="make_guess (mot trouvé)",
+        )
+        self.assertIn("round_complete", [f["type"] for f in frames[current]])
+        await self.disconnect_all()
+
+    async def test_secret_word_reaches_only_clue_giver(self):
+        await self.connect_all()
+        owner = str(self.players[0].id)
+        frames = await self.send(owner, {"type": "start_game", "totalRounds": 1})
+        started = {
+            player_id: next(f for f in player_frames if f["type"] == "game_started")
+            for player_id, player_frames in frames.items()
+        }
+        current = started[owner]["currentPlayer"]
+        guesser = self.guessers(current)[0]
+        self.assertIn("wordChoices", started[current])
+        self.assertNotIn("wordChoices", started[guesser])
+        # Même numéro pour les deux versions de l'événement
+        self.assertEqual(started[current]["seq"], started[guesser]["seq"])
+
+        # Le devineur perd sa connexion pendant le choix du mot
+        event_log = RoomEventLog.get_instance(f"game_{self.room.code}")
+        epoch, last_seq = event_log.epoch, event_log.seq
+        await self.communicators.pop(guesser).disconnect()
+        frames = await self.send(
+            current,
+            {
+                "type": "word_choice",
+                "word": started[current]["wordChoices"]["word1"]["word"],
+            },
+        )
+        selected = {
+            player_id: next(f for f in player_frames if f["type"] == "word_selected")
+            for player_id, player_frames in frames.items()
+        }
+        self.assertIn("word", selected[current])
+        self.assertNotIn("word", selected[self.guessers(current)[0]])
+
+        welcome, *replayed = await self.reconnect(guesser, epoch, last_seq)
+        self.assertEqual(welcome["role"], "guessers")
+        selected = next(f for f in replayed if f["type"] == "word_selected")
+        self.assertNotIn("word", selected)
+        await self.disconnect_all()
+
+    async def test_every_socket_of_a_player_changes_role(self):
+        await self.connect_all()
+        alice, bob = (str(player.id) for player in self.players[:2])
+        # Deuxième onglet d'Alice
+        self.communicators["onglet"] = await self.connect(self.players[0])
+        await self.drain()
+        state = await RoomState.get(self.room.code)
+        channel_layer = get_channel_layer()
+        group_name = f"game_{self.room.code}"
+
+        async def words_seen(clue_giver):
+            await roles.set_clue_giver(channel_layer, state, clue_giver)
+            await group_broadcast(
+                channel_layer, group_name, {"type": "word_selected", "word": "mot"}
+            )
+            frames = await self.drain()
+            return [frames[key][0].get("word") for key in (alice, "onglet", bob)]
+
+        self.assertEqual(await words_seen(alice), ["mot", "mot", None])
+        self.assertEqual(await words_seen(bob), [None, None, "mot"])
+
+        # La première socket part : elle quitte son sous-groupe
+        await self.communicators.pop(alice).disconnect()
+        members = [
+            len(channel_layer.groups.get(roles.role_group(group_name, role), ()))
+            for role in roles.ROLES
+        ]
+        self.assertEqual(members, [1, 2])
+        self.assertEqual(len(state.channels[alice]), 1)
+        await self.disconnect_all()
+
+    @override_settings(SPECTATOR_UPDATE_RATE=0.001)
+    async def test_spectators_get_coalesced_snapshots(self):
+        await self.connect_all()
+
+        # Connexion servie par l'état en mémoire : instantané immédiat, sans SQL
+        before = self.queries.count
+        spectator = WebsocketCommunicator(
+            application, f"/ws/game/{self.room.code}/spectate/"
+        )
+        connected, _ = await spectator.connect()
+        self.assertTrue(connected)
+        first = await spectator.receive_json_from()
+        self.assertEqual(self.queries.count - before, 0)
+        self.assertEqual(first["type"], "spectator_update")
+        self.assertEqual(len(first["players"]), 3)
+        self.assertIsNone(first["round"])
+
+        # Aucun événement de jeu : un seul instantané pour tout ce qui s'est passé
+        current, _ = await self.choose_word(await self.start_game())
+        await self.send(current, {"type": "give_clue", "clue": "indice"})
+        self.assertTrue(await spectator.receive_nothing(timeout=0.05))
+        feed = SpectatorFeed.get_instance(f"game_{self.room.code}")
+        await feed.publish()
+        update = await spectator.receive_json_from()
+        self.assertEqual(update["round"]["clues"], ["indice"])
+        self.assertIsNone(update["round"]["word"])
+        self.assertEqual(
+            update["seq"], RoomEventLog.get_instance(f"game_{self.room.code}").seq
+        )
+
+        # Rien de nouveau : rien n'est renvoyé
+        await feed.publish()
+        self.assertTrue(await spectator.receive_nothing(timeout=0.05))
+
+        await spectator.disconnect()
+        self.assertNotIn(f"game_{self.room.code}", SpectatorFeed._instances)
+        await self.disconnect_all()
+
+    async def test_spectator_only_room_is_unloaded(self):
+        url = f"/ws/game/{self.room.code}/spectate/"
+        spectators = [WebsocketCommunicator(application, url) for _ in range(2)]
+        for spectator in spectators:
+            connected, _ = await spectator.connect()
+            self.assertTrue(connected)
+            await spectator.receive_json_from()
+        self.assertIsNotNone(RoomState.get_loaded(self.room.code))
+
+        # L'état ne reste en mémoire que tant qu'un spectateur le regarde
+        await spectators[0].disconnect()
+        self.assertIsNotNone(RoomState.get_loaded(self.room.code))
+        await spectators[1].disconnect()
+        self.assertNotIn(self.room.code, RoomState._instances)
+
+    async def test_spectator_of_vanishing_room_is_closed(self):
+        spectator = WebsocketCommunicator(
+            application, f"/ws/game/{self.room.code}/spectate/"
+        )
+        # Room supprimée entre le chargement de l'état et le premier instantané
+        with mock.patch.object(SpectatorFeed, "snapshot", return_value=None):
+            connected, _ = await spectator.connect()
+            self.assertTrue(connected)
+            output = await spectator.receive_output()
+        self.assertEqual(output, {"type": "websocket.close", "code": 4004})
+        self.assertNotIn(f"game_{self.room.code}", SpectatorFeed._instances)
+
+    async def test_spectators_of_deleted_room_are_closed(self):
+        spectator = WebsocketCommunicator(
+            application, f"/ws/game/{self.room.code}/spectate/"
+        )
+        connected, _ = await spectator.connect()
+        self.assertTrue(connected)
+        await spectator.receive_json_from()
+
+        # Room supprimée sans événement diffusé : le prochain tour le détecte
+        await RoomState.discard(self.room.code)
+        await GameRoom.objects.filter(id=self.room.id).adelete()
+        await SpectatorFeed.get_instance(f"game_{self.room.code}").publish()
+        output = await spectator.receive_output()
+        self.assertEqual(output, {"type": "websocket.close", "code": 4004})
+        self.assertNotIn(f"game_{self.room.code}", SpectatorFeed._instances)
+
+    async def test_incremental_guesses(self):
+        await self.connect_all()
+        current, _ = await self.choose_word(await self.start_game())
+        await self.send(current, {"type": "give_clue", "clue": "indice"})
+
+        first, second = self.guessers(current)
+        frames = await self.send(first, {"type": "make_guess", "guess": "raté"})
+        guess_made = next(f for f in frames[second] if f["type"] == "guess_made")
+        # Seule la nouvelle tentative est diffusée, avec sa position dans le round
+        self.assertNotIn("allGuesses", guess_made)
+        self.assertEqual(guess_made["guess"], "raté")
+        self.assertEqual(guess_made["guessIndex"], 0)
+
+        # Un client désynchronisé redemande le round : réponse à lui seul
+        frames = await self.send(first, {"type": "round_sync"})
+        self.assertEqual(frames[current], [])
+        snapshot = frames[first][0]
+        self.assertEqual(snapshot["type"], "round_snapshot")
+        self.assertEqual(snapshot["clues"], ["indice"])
+        self.assertEqual(
+            [guess[:2] for guess in snapshot["guesses"]], [[first, "raté"]]
+        )
+        self.assertEqual(
+            snapshot["seq"], RoomEventLog.get_instance(f"game_{self.room.code}").seq
+        )
+        await self.disconnect_all()
+
+    async def test_roster_deltas(self):
+        await self.connect_all()
+        game_started = await self.start_game()
+        self.assertEqual(len(game_started["players"]), 3)
+        current, word = await self.choose_word(game_started)
+        await self.send(current, {"type": "give_clue", "clue": "indice"})
+
+        winner = self.guessers(current)[0]
+        frames = await self.send(
+            winner,
+            {"type": "make_guess", "guess": word},
+            budget_name="make_guess (mot trouvé)",
+        )
+        completed = next(f for f in frames[current] if f["type"] == "round_complete")
+        self.assertNotIn("players", completed)
+        # Le delta part de la version du roster diffusé avec game_started
+        self.assertEqual(completed["rosterBase"], game_started["rosterVersion"])
+        changed = {p["id"]: p["score"] for p in completed["changedPlayers"]}
+        self.assertIn(winner, changed)
+        self.assertLessEqual(set(changed), {winner, current})
+        self.assertEqual(completed["removedPlayers"], [])
+
+        # Un client en retard redemande le roster complet
+        frames = await self.send(winner, {"type": "roster_sync"})
+        roster = frames[winner][0]
+        self.assertEqual(roster["type"], "roster")
+        self.assertEqual(roster["rosterVersion"], completed["rosterVersion"])
+        self.assertEqual(len(roster["players"]), 3)
+        await self.disconnect_all()
+
+    async def reconnect(self, player_id, epoch, last_seq):
+        """Reconnecte un joueur qui reprend au numéro last_seq"""
+        player = next(p for p in self.players if str(p.id) == player_id)
+        self.communicators[player_id] = await self.connect(player, init=False)
+        await self.drain()
+        frames = await self.send(
+            player_id,
+            {
+                "type": "init",
+                "sessionId": str(player.session_id),
+                "epoch": epoch,
+                "lastSeq": last_seq,
+            },
+        )
+        return frames[player_id]
+
+    async def miss_two_clues(self):
+        """Un devineur perd sa connexion pendant deux indices"""
+        await self.connect_all()
+        current, _ = await self.choose_word(await self.start_game())
+        guesser = self.guessers(current)[0]
+        event_log = RoomEventLog.get_instance(f"game_{self.room.code}")
+        epoch, last_seq = event_log.epoch, event_log.seq
+
+        await self.communicators.pop(guesser).disconnect()
+        await self.send(current, {"type": "give_clue", "clue": "un"})
+        await self.send(current, {"type": "give_clue", "clue": "deux"})
+        return guesser, epoch, last_seq
+
+    async def test_resume_missed_events(self):
+        guesser, epoch, last_seq = await self.miss_two_clues()
+        welcome, *frames = await self.reconnect(guesser, epoch, last_seq)
+
+        self.assertTrue(welcome["resumed"])
+        replayed = [f for f in frames if f["seq"] <= welcome["seq"]]
+        self.assertEqual(
+            [f["seq"] for f in replayed],
+            list(range(last_seq + 1, welcome["seq"] + 1)),
+        )
+        self.assertEqual(
+            [f["clue"] for f in replayed if f["type"] == "clue_given"], ["un", "deux"]
+        )
+        await self.disconnect_all()
+
+    async def test_events_broadcast_during_init_arrive_once(self):
+        guesser, epoch, last_seq = await self.miss_two_clues()
+        join_role_group = consumers.join_role_group
+
+        async def join_then_broadcast(channel_layer, *args):
+            # Diffusé pendant l'init : journalisé et déjà en file pour la socket
+            await group_broadcast(
+                channel_layer, f"game_{self.room.code}", {"type": "timer_update"}
+            )
+            return await join_role_group(channel_layer, *args)
+
+        with mock.patch.object(consumers, "join_role_group", join_then_broadcast):
+            welcome, *frames = await self.reconnect(guesser, epoch, last_seq)
+
+        # Chaque numéro une seule fois, dans l'ordre (player_joined compris)
+        seqs = [f["seq"] for f in frames if "seq" in f]
+        self.assertTrue(welcome["resumed"])
+        self.assertEqual(seqs, list(range(last_seq + 1, seqs[-1] + 1)))
+        self.assertGreater(seqs[-1], welcome["seq"])
+        self.assertEqual([f["type"] for f in frames].count("timer_update"), 1)
+        await self.disconnect_all()
+
+    @override_settings(EVENT_BUFFER_SIZE=2)
+    async def test_resume_falls_back_to_snapshot(self):
+        guesser, epoch, last_seq = await self.miss_two_clues()
+        welcome, *frames = await self.reconnect(guesser, epoch, last_seq)
+
+        # Les événements manqués sont sortis du tampon : instantané de la partie
+        self.assertFalse(welcome["resumed"])
+        snapshot = next(f for f in frames if f["type"] == "game_started")
+        self.assertEqual(snapshot["givenClues"], ["un", "deux"])
+        await self.disconnect_all()
+
+    async def test_roster_serves_new_players(self):
+        await self.connect_all()
+
+        # Inscription via l'API : le joueur est ajouté au roster
+        client = APIClient()
+        response = await sync_to_async(client.post)(
+            "/api/game/join-room/",
+            {"roomCode": self.room.code, "pseudo": "dave"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        dave = await Player.objects.aget(pseudo="dave")
+
+        # Connexion et init servis par le roster, sans requête SQL
+        before = self.queries.count
+        self.communicators[str(dave.id)] = await self.connect(dave)
+        await asyncio.sleep(0.05)
+        frames = await self.drain()
+        self.assertEqual(self.queries.count - before, 0)
+
+        room_state = next(f for f in frames[str(dave.id)] if f["type"] == "room_state")
+        self.assertIn("dave", [p["pseudo"] for p in room_state["players"]])
+        state = await RoomState.get(self.room.code)
+        self.assertEqual(
+            {p["pseudo"] for p in state.players_list() if p["online"]},
+            {"alice", "bob", "carol", "dave"},
+        )
+        await self.disconnect_all()
+
+    async def test_score_updates_are_relative(self):
+        state = await RoomState.get(self.room.code)
+        bob = self.players[1]
+        state.add_points(bob.id, -1)
+        state.add_points(bob.id, 2)
+        self.assertEqual(state.get_player(bob.id).score, 2)
+
+        # Un autre écrivain ajoute des points avant l'écriture différée
+        await Player.objects.filter(id=bob.id).aupdate(score=F("score") + 3)
+        await state.flush()
+
+        # max(3 + (-1 + 2), 2) : la mise à jour est relative et bornée à 0
+        await bob.arefresh_from_db()
+        self.assertEqual(bob.score, 4)
+
+    async def test_bad_row_does_not_block_other_rooms(self):
+        other = await GameRoom.objects.acreate(code="TEST02")
+        dave = await Player.objects.acreate(room=other, pseudo="dave")
+        for room, player in ((self.room, self.players[0]), (other, dave)):
+            room.current_round = await Round.objects.acreate(
+                game_room=room, current_player=player, phase="guess"
+            )
+            await room.asave()
+        broken = await RoomState.get(self.room.code)
+        healthy = await RoomState.get(other.code)
+        bob = self.players[1]
+        broken.add_points(bob.id, 2)
+        broken.add_guess(bob.id, "perdu")
+        # Le round de la tentative en attente disparaît avant l'écriture
+        await Round.objects.filter(id=broken.round.id).adelete()
+
+        for attempt in range(1, room_state.WRITE_ATTEMPTS):
+            healthy.add_guess(dave.id, f"essai{attempt}")
+            with self.assertRaises(IntegrityError):
+                await RoomState._write_batch([broken, healthy])
+            self.assertEqual(
+                await Guess.objects.filter(round_id=healthy.round.id).acount(),
+                attempt,
+            )
+
+        # Dernière tentative : seule la ligne fautive est écartée
+        await RoomState._write_batch([broken, healthy])
+        self.assertFalse(broken.is_dirty)
+        await bob.arefresh_from_db()
+        self.assertEqual(bob.score, 2)
+        letter = await DeadLetter.objects.aget()
+        self.assertEqual((letter.room_code, letter.kind), ("TEST01", "guess"))
+        self.assertEqual(letter.payload["guesses"][0]["word"], "perdu")
+
+    async def test_clue_giver_leaving_drops_round_rows(self):
+        alice, bob = self.players[:2]
+        self.room.current_round = await Round.objects.acreate(
+            game_room=self.room, current_player=alice, phase="guess"
+        )
+        await self.room.asave()
+        state = await RoomState.get(self.room.code)
+        state.add_guess(bob.id, "avant")
+        # Le round part avec Alice (CASCADE) : ses lignes en attente aussi
+        await grace_period.remove_players(self.room.code, [alice.id])
+        state.add_guess(bob.id, "apres")
+        await state.flush()
+        self.assertFalse(state.is_dirty)
+        self.assertEqual(state._write_failures, 0)
+        self.assertFalse(await Round.objects.aexists())
+        self.assertFalse(await Guess.objects.aexists())
+        self.assertFalse(await DeadLetter.objects.aexists())
+
+    async def test_words_too_long_are_rejected(self):
+        await self.connect_all()
+        current, _ = await self.choose_word(await self.start_game())
+        frames = await self.send(current, {"type": "give_clue", "clue": "x" * 101})
+        self.assertEqual(frames[current][0]["type"], "error")
+        await self.send(current, {"type": "give_clue", "clue": "indicex"})
+        guesser = self.guessers(current)[0]
+        # Une ligature s'allonge une fois normalisée
+        frames = await self.send(guesser, {"type": "make_guess", "guess": "œ" * 60})
+        self.assertEqual(frames[guesser][0]["type"], "error")
+        state = await RoomState.get(self.room.code)
+        self.assertEqual((state.clues, state.guesses), (["indicex"], []))
+        await self.disconnect_all()
+
+    async def test_grace_period_expiry(self):
+        await self.connect_all()
+        alice, bob, carol = (str(player.id) for player in self.players)
+
+        # Carol revient avant la fin du délai ; Alice (propriétaire) et Bob partent
+        for player_id in (alice, bob, carol):
+            await self.communicators.pop(player_id).disconnect()
+        self.communicators[carol] = await self.connect(self.players[2])
+        await self.drain()
+        await grace_period.process_expired(scheduler.now_ms() + 60_000)
+        frames = await self.drain()
+
+        left = [f for f in frames[carol] if f["type"] == "player_left"]
+        self.assertEqual(len(left), 1, "un seul player_left pour la room")
+        self.assertEqual({p["id"] for p in left[0]["players"]}, {alice, bob})
+        owner_changed = [f for f in frames[carol] if f["type"] == "owner_changed"]
+        self.assertEqual([f["player"]["id"] for f in owner_changed], [carol])
+        remaining = await sync_to_async(list)(
+            Player.objects.filter(room=self.room).values_list("pseudo", flat=True)
+        )
+        self.assertEqual(remaining, ["carol"])
+        await self.disconnect_all()
+
+    async def test_shard_redirect_and_handover(self):
+        directory = sharding.LocalShardDirectory(
+            shards={"a": "ws://a.test", "b": "ws://b.test"}, local="a"
+        )
+        sharding._directory = directory
+
+        # Room détenue par l'autre worker : redirection dès la connexion
+        directory._pin(self.room.code, "b")
+        communicator = WebsocketCommunicator(application, f"/ws/game/{self.room.code}/")
+        await communicator.connect()
+        moved = await communicator.receive_json_from()
+        self.assertEqual(
+            moved,
+            {"type": "shard_moved", "wsUrl": f"ws://b.test/ws/game/{self.room.code}/"},
+        )
+        await communicator.disconnect()
+
+        # Room locale, puis réassignée à "b" quand "a" est retiré
+        directory._pin(self.room.code, "a")
+        await self.connect_all()
+        state = await RoomState.get(self.room.code)
+        state.add_points(self.players[1].id, 3)
+        moves = directory.set_shards({"b": "ws://b.test"})
+        self.assertEqual(moves, {self.room.code: ("a", "b")})
+        # Tant que "a" ne l'a pas cédée, la room reste chez lui
+        self.assertEqual(
+            directory.resolve(self.room.code),
+            ("a", f"ws://a.test/ws/game/{self.room.code}/"),
+        )
+        await sharding.hand_over_rooms()
+        frames = await self.drain()
+        for player_frames in frames.values():
+            self.assertEqual(player_frames[-1]["type"], "shard_moved")
+        self.assertNotIn(self.room.code, RoomState._instances)
+        self.assertEqual(directory.get_pins(), {self.room.code: "b"})
+        self.assertEqual(directory.get_handovers(), {})
+        # Écrit en base avant le déplacement de l'épingle
+        await self.players[1].arefresh_from_db()
+        self.assertEqual(self.players[1].score, 3)
+        await self.disconnect_all()
+
+    def test_handover_timeout(self):
+        directory = sharding.LocalShardDirectory(
+            shards={"a": "ws://a.test", "b": "ws://b.test"},
+            local="b",
+            handover_timeout=0,
+        )
+        directory._pin("R1", "a")
+        directory.set_shards({"b": "ws://b.test"})
+        # "a" ne répond plus : la room passe à "b" à la première résolution
+        self.assertEqual(directory.owner("R1"), "b")
+        self.assertEqual(directory.get_handovers(), {})
+
+    async def test_phase_started_carries_deadline(self):
+        await self.connect_all()
+        clock = self.freeze_clock()
+        owner = str(self.players[0].id)
+        frames = await self.send(owner, {"type": "start_game", "totalRounds": 1})
+        for player_frames in frames.values():
+            started = [f for f in player_frames if f["type"] == "phase_started"]
+            self.assertEqual(len(started), 1)
+            self.assertEqual(started[0]["phase"], "choice")
+            self.assertEqual(started[0]["deadline"], clock[0] + 30_000)
+            self.assertEqual(started[0]["serverTime"], clock[0])
+            self.assertNotIn("timer_update", [f["type"] for f in player_frames])
+        await self.disconnect_all()
+
+    async def test_timer_updates_only_at_checkpoints(self):
+        await self.connect_all()
+        clock = self.freeze_clock()
+        await self.start_game()
+        deadline = clock[0] + 30_000
+        self.assertEqual(await self.advance(clock, deadline - 11_000), [[]] * 3)
+        self.assertEqual(await self.advance(clock, deadline - 10_000), [[10]] * 3)
+        self.assertEqual(await self.advance(clock, deadline - 6_000), [[]] * 3)
+        self.assertEqual(await self.advance(clock, deadline - 5_000), [[5]] * 3)
+        await self.disconnect_all()
+
+    async def test_phase_shorter_than_first_checkpoint(self):
+        await self.connect_all()
+        clock = self.freeze_clock()
+        current = (await self.start_game())["currentPlayer"]
+        await GameManager(self.room.code).switch_timer(7, "choice", current)
+        frames = await self.drain()
+        started = [f for f in frames[current] if f["type"] == "phase_started"]
+        self.assertEqual(started[0]["deadline"], clock[0] + 7_000)
+        # Le checkpoint de 10 s, déjà passé, n'est pas envoyé
+        deadline = clock[0] + 7_000
+        self.assertEqual(await self.advance(clock, deadline - 6_000), [[]] * 3)
+        self.assertEqual(await self.advance(clock, deadline - 5_000), [[5]] * 3)
+        await self.disconnect_all()
+
+    async def test_tick_mode_counts_down_every_second(self):
+        await self.connect_all()
+        clock = self.freeze_clock()
+        start = clock[0]
+        with mock.patch.object(timer_manager, "TIMER_MODE", "tick"):
+            owner = str(self.players[0].id)
+            frames = await self.send(owner, {"type": "start_game", "totalRounds": 1})
+        for player_frames in frames.values():
+            self.assertNotIn("phase_started", [f["type"] for f in player_frames])
+        self.assertEqual(await self.advance(clock, start + 1_000), [[30]] * 3)
+        self.assertEqual(await self.advance(clock, start + 2_000), [[29]] * 3)
+        await self.disconnect_all()
+
+    async def test_timer_sync_answers_only_the_requester(self):
+        await self.connect_all()
+        clock = self.freeze_clock()
+        current = (await self.start_game())["currentPlayer"]
+        guesser = self.guessers(current)[0]
+        clock[0] += 12_000
+        frames = await self.send(guesser, {"type": "timer_sync"})
+        [update] = frames[guesser]
+        self.assertEqual(update["type"], "timer_update")
+        self.assertEqual(update["timeLeft"], 18)
+        self.assertEqual(update["deadline"] - update["serverTime"], 18_000)
+        self.assertEqual(
+            [frames[pid] for pid in self.communicators if pid != guesser], [[], []]
+        )
+        await self.disconnect_all()
+
+    async def test_apply_malus(self):
+        await self.connect_all()
+        current, _ = await self.choose_word(await self.start_game())
+        state = await RoomState.get(self.room.code)
+        state.update_round(can_malus=True)
+        target = state.get_player(self.guessers(current)[0])
+        state.add_points(target.id, 2)
+
+        frames = await self.send(
+            current, {"type": "apply-malus", "targetPlayerPseudo": target.pseudo}
+        )
+        self.assertTrue(frames[current][-1]["malusApplied"])
+        await self.disconnect_all()
+
+    async def test_leave_room(self):
+        await self.connect_all()
+        owner = str(self.players[0].id)
+        await self.send(owner, {"type": "leave_room"})
+        del self.communicators[owner]
+        await self.disconnect_all()
+
+    async def test_last_player_leaving_releases_room(self):
+        await self.connect_all()
+        for player_id in list(self.communicators):
+            communicator = self.communicators.pop(player_id)
+            await communicator.send_json_to({"type": "leave_room"})
+            while (await communicator.receive_output())["type"] != "websocket.close":
+                pass
+        self.assertFalse(await GameRoom.objects.filter(code=self.room.code).aexists())
+        self.assertNotIn(self.room.code, RoomState._instances)
+
+    async def test_released_room_leaves_no_timers(self):
+        await self.connect_all()
+        await self.start_game()  # Timer de la phase de choix en cours
+        for player_id in list(self.communicators):
+            communicator = self.communicators.pop(player_id)
+            await communicator.send_json_to({"type": "leave_room"})
+            while (await communicator.receive_output())["type"] != "websocket.close":
+                pass
+        phase_scheduler = scheduler.get_scheduler()
+        self.assertIsNone(await phase_scheduler.get_timer(self.room.code))
+        self.assertEqual(
+            await phase_scheduler.claim_due(scheduler.now_ms() + 600_000), []
+        )
+        self.assertNotIn(self.room.code, RoomTimerManager._instances)
+
+    async def test_fanout_handlers(self):
+        await self.connect_all()
+        channel_layer = get_channel_layer()
+        group_name = f"game_{self.room.code}"
+
+        before = self.queries.count
+        await group_broadcast(
+            channel_layer, group_name, {"type": "timer_update", "timeLeft": 5}
+        )
+        await channel_layer.group_send(
+            group_name,
+            {"type": "game_message", "message": "salut", "player": {"id": "1"}},
+        )
+        await asyncio.sleep(0.05)
+        frames = await self.drain()
+
+        self.assertEqual(self.queries.count - before, FANOUT_QUERY_BUDGET)
+        for player_frames in frames.values():
+            self.assertEqual(
+                [f["type"] for f in player_frames], ["timer_update", "game_message"]
+            )
+        await self.disconnect_all()
+
+
+class ClueGuessMigrationTests(TransactionTestCase):
+    """Recopie des listes JSON des rounds dans les tables Clue et Guess (0009)"""
+
+    before = [("game", "0008_round_can_malus")]
+    after = [("game", "0011_clue_guess_normalized")]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        self.migrate(executor.loader.graph.leaf_nodes("game"))
+
+    def test_backfill(self):
+        old_apps = self.migrate(self.before)
+        GameRoom = old_apps.get_model("game", "GameRoom")
+        OldPlayer = old_apps.get_model("game", "Player")
+        OldRound = old_apps.get_model("game", "Round")
+        room = GameRoom.objects.create(code="MIGR01")
+        alice, bob, carol = (
+            OldPlayer.objects.create(room=room, pseudo=pseudo)
+            for pseudo in ("alice", "bob", "carol")
+        )
+        round = OldRound.objects.create(
+            game_room=room,
+            current_player=alice,
+            word="élève",
+            given_clues=["École", "x" * 150],
+            given_guesses=[
+                {
+                    "playerId": str(bob.id),
+                    "word": "Professeur",
+                    "timestamp": "2025-01-01T10:00:00+00:00",
+                },
+                # Ligatures : la forme normalisée dépasse la taille du champ
+                {"playerId": str(carol.id), "word": "œ" * 60},
+                "pas un dict",
+            ],
+            guessing_players=[str(carol.id)],
+        )
+
+        new_apps = self.migrate(self.after)
+        Clue = new_apps.get_model("game", "Clue")
+        Guess = new_apps.get_model("game", "Guess")
+        self.assertEqual(
+            list(
+                Clue.objects.filter(round_id=round.id).values_list(
+                    "position", "player_id", "text", "normalized"
+                )
+            ),
+            [(0, alice.id, "École", "ecole"), (1, alice.id, "x" * 100, "x" * 100)],
+        )
+        guesses = list(Guess.objects.filter(round_id=round.id))
+        self.assertEqual(
+            [(g.player_id, g.word, g.normalized, g.clue_count) for g in guesses],
+            [
+                (bob.id, "Professeur", "professeur", 1),
+                (carol.id, "œ" * 60, "oe" * 50, 2),
+            ],
+        )
+        self.assertEqual(guesses[0].created_at.isoformat(), "2025-01-01T10:00:00+00:00")
+        # Horodatage inconnu : celui de la dernière mise à jour du round
+        self.assertEqual(guesses[1].created_at, round.updated_at)
+
+
+class LeaderboardTests(SimpleTestCase):
+    def test_ranks_and_top(self):
+        leaderboard = Leaderboard({"1": 3, "2": 5, "3": 3, "4": 0})
+        self.assertEqual([leaderboard.rank(p) for p in "1234"], [2, 1, 2, 4])
+        self.assertEqual(
+            leaderboard.top(3),
+            [
+                {"id": "2", "score": 5, "rank": 1},
+                {"id": "1", "score": 3, "rank": 2},
+                {"id": "3", "score": 3, "rank": 2},
+            ],
+        )
+
+        leaderboard.update("4", 6)
+        leaderboard.remove("2")
+        self.assertEqual([entry["id"] for entry in leaderboard.top()], ["4", "1", "3"])
+        self.assertEqual(leaderboard.rank("2"), None)
+
+
+class TimingWheelTests(SimpleTestCase):
+    """Roue à 3 niveaux de 4 cases, tick de 10 ms : 4, 16 puis 64 ticks par niveau"""
+
+    def setUp(self):
+        self.wheel = TimingWheel(tick_ms=10, slots=4, levels=3, start_ms=0)
+
+    def run_until(self, end_ms):
+        """Avance tick par tick ; retourne {clé: tick de déclenchement}"""
+        fired = {}
+        for now in range(10, end_ms + 10, 10):
+            for key in self.wheel.advance(now):
+                self.assertNotIn(key, fired)
+                fired[key] = now // 10
+        return fired
+
+    def test_keys_fire_on_their_tick_across_levels(self):
+        deadlines = {"niveau0": 35, "niveau1": 150, "niveau2": 430, "bord": 160}
+        for key, fire_at in deadlines.items():
+            self.wheel.add(key, fire_at)
+        self.assertEqual(self.wheel.positions["niveau1"][0], 1)
+        self.assertEqual(self.wheel.positions["niveau2"][0], 2)
+
+        fired = self.run_until(500)
+        self.assertEqual(
+            fired, {key: fire_at // 10 for key, fire_at in deadlines.items()}
+        )
+        self.assertEqual(len(self.wheel), 0)
+
+    def test_long_timers_cascade_down(self):
+        # Au-delà de la portée du dernier niveau (64 ticks) : plusieurs tours
+        self.wheel.add("long", 2000)
+        self.wheel.add("court", 20)
+        fired = self.run_until(2100)
+        self.assertEqual(fired, {"court": 2, "long": 200})
+
+    def test_advance_returns_keys_in_deadline_order(self):
+        for key, fire_at in (("c", 300), ("a", 50), ("b", 170)):
+            self.wheel.add(key, fire_at)
+        self.assertEqual(self.wheel.advance(1000), ["a", "b", "c"])
+        # Une échéance passée part au tick suivant
+        self.wheel.add("retard", 0)
+        self.assertEqual(self.wheel.advance(1010), ["retard"])
+
+    def test_removed_and_rescheduled_keys(self):
+        self.wheel.add("annulé", 170)
+        self.wheel.add("déplacé", 170)
+        self.wheel.remove("annulé")
+        self.wheel.remove("inconnu")
+        self.wheel.add("déplacé", 40)
+        self.assertEqual(self.run_until(300), {"déplacé": 4})
+
+
+class LocalPhaseSchedulerTests(SimpleTestCase):
+    def setUp(self):
+        self.scheduler = scheduler.LocalPhaseScheduler(poll_interval=0.01)
+        self.start = scheduler.now_ms()
+
+    async def schedule(self, room_code, offsets):
+        timer = {"timer_id": self.scheduler.new_timer_id()}
+        events = [(self.start + offset, "tick", offset) for offset in offsets]
+        await self.scheduler.schedule(room_code, timer, events)
+        return timer["timer_id"]
+
+    async def claim_all(self, until):
+        claimed = []
+        for now in range(self.start, self.start + until, 10):
+            while batch := await self.scheduler.claim_due(now, limit=5):
+                claimed += batch
+        return [(room_code, value) for room_code, _, _, value in claimed]
+
+    async def test_each_event_fires_once(self):
+        offsets = [50, 120, 800, 3000]
+        for room in range(10):
+            await self.schedule(f"R{room}", offsets)
+        claimed = await self.claim_all(3100)
+        self.assertEqual(
+            sorted(claimed),
+            sorted((f"R{room}", offset) for room in range(10) for offset in offsets),
+        )
+        self.assertEqual(await self.scheduler.claim_due(self.start + 10_000), [])
+
+    async def test_stale_timer_events_are_dropped(self):
+        old_timer = await self.schedule("R1", [100, 200])
+        await self.schedule("R1", [300])
+        # finish() d'un ancien timer n'annule pas le timer courant
+        await self.scheduler.finish("R1", old_timer)
+        self.assertEqual(await self.claim_all(400), [("R1", 300)])
+
+
+class RoomTimerManagerTests(SimpleTestCase):
+    def tearDown(self):
+        if RoomTimerManager._worker_task:
+            RoomTimerManager._worker_task.cancel()
+        RoomTimerManager._worker_task = None
+        RoomTimerManager._instances.clear()
+        RoomEventLog._instances.clear()
+
+    async def test_slow_phase_end_does_not_hold_other_rooms(self):
+        released = asyncio.Event()
+        ended = []
+
+        async def timer_end(manager, event):
+            await released.wait()  # Acteur occupé ou écriture lente
+            ended.append(manager.room_code)
+
+        timer = {"timer_id": "t1", "phase": "guess", "currentPlayer": "1"}
+        with mock.patch.object(GameManager, "timer_end", timer_end):
+            # Lot réclamé ensemble : le tick de R2 part sans attendre la fin de R1
+            await asyncio.wait_for(
+                asyncio.gather(
+                    RoomTimerManager._fire("R1", timer, "end", 0),
+                    RoomTimerManager._fire("R2", timer, "tick", 5),
+                ),
+                1,
+            )
+            self.assertEqual(RoomEventLog.get_instance("game_R2").seq, 1)
+            self.assertEqual(ended, [])
+            released.set()
+            await asyncio.gather(*RoomTimerManager._end_tasks)
+        self.assertEqual(ended, ["R1"])
+
+
+class RoomCodeTests(SimpleTestCase):
+    def test_scrambler_is_a_bijection(self):
+        # Codes courts : l'espace entier se parcourt (moitiés égales ou non)
+        for length in (2, 3):
+            scrambler = room_codes.CodeScrambler(key="test", length=length)
+            space = len(room_codes.ALPHABET) ** length
+            scrambled = {scrambler.scramble(number) for number in range(space)}
+            self.assertEqual(scrambled, set(range(space)))
+
+    def test_scrambled_codes_do_not_repeat(self):
+        scrambler = room_codes.CodeScrambler(key="test")
+        codes = [scrambler.encode(number) for number in range(5000)]
+        self.assertEqual(len(set(codes)), len(codes))
+        self.assertTrue(all(len(code) == room_codes.CODE_LENGTH for code in codes))
+
+    def check_allocator(self, allocator):
+        codes = [allocator.allocate() for _ in range(200)]
+        self.assertEqual(len(set(codes)), len(codes))
+        # Un code n'est réutilisé qu'une fois libéré, et une seule fois
+        allocator.release(codes[10])
+        self.assertEqual(allocator.allocate(), codes[10])
+        later = [allocator.allocate() for _ in range(200)]
+        self.assertFalse(set(later) & set(codes))
+
+    def test_local_allocator(self):
+        self.check_allocator(room_codes.LocalRoomCodeAllocator(key="test"))
+
+    def test_redis_allocator(self):
+        self.check_allocator(
+            with_fake_redis(
+                room_codes.RedisRoomCodeAllocator, fakeredis.FakeServer(), key="test"
+            )
+        )
+
+
+class WordDeckTests(SimpleTestCase):
+    def setUp(self):
+        self.catalogue = WordCatalogue(
+            {"un": ["chat", "chien", "lapin", "vache"], "deux": ["vache", "poule"]}
+        )
+
+    def texts(self, words):
+        return [word.text for word in words]
+
+    def test_no_repeat_until_exhausted(self):
+        deck = WordDeck()
+        drawn = [word.id for _ in range(len(CATALOGUE) // 3) for word in deck.draw(3)]
+        self.assertEqual(len(set(drawn)), len(drawn))
+
+    def test_reshuffles_after_exhaustion(self):
+        deck = WordDeck(self.catalogue)
+        first = self.texts(deck.draw(5))
+        self.assertEqual(sorted(first), ["chat", "chien", "lapin", "poule", "vache"])
+        self.assertEqual(len(deck), 0)
+        # Nouveau tour complet, sans doublon dans un même tirage à cheval
+        second = self.texts(deck.draw(2) + deck.draw(3))
+        self.assertEqual(sorted(second), sorted(first))
+        deck.draw(4)
+        straddling = self.texts(deck.draw(3))  # 1 mot restant + 2 du nouveau paquet
+        self.assertEqual(len(set(straddling)), 3)
+
+    def test_rooms_have_independent_decks(self):
+        first, second = WordDeck(self.catalogue), WordDeck(self.catalogue)
+        first.draw(4)
+        self.assertEqual(len(first), 1)
+        self.assertEqual(len(second), 0)
+        self.assertEqual(len(set(self.texts(second.draw(5)))), 5)
+        self.assertEqual(len(first), 1)
+
+    def test_categories(self):
+        deck = WordDeck(self.catalogue, categories=["deux"])
+        self.assertEqual(sorted(self.texts(deck.draw(2))), ["poule", "vache"])
+        with self.assertRaises(ValueError):
+            deck.draw(3)
+
+
+class HashRingTests(SimpleTestCase):
+    """Ajouter ou retirer un shard ne déplace que les rooms de ses arcs"""
+
+    rooms = [f"ROOM{i:03d}" for i in range(400)]
+
+    def setUp(self):
+        self.directory = sharding.LocalShardDirectory(
+            shards={name: f"ws://{name}.test" for name in "abc"}, local="a"
+        )
+        for room_code in self.rooms:
+            self.directory.owner(room_code)
+
+    def test_adding_a_shard(self):
+        shards = {name: f"ws://{name}.test" for name in "abcd"}
+        moves = self.directory.set_shards(shards)
+        self.assertEqual({new for _, new in moves.values()}, {"d"})
+        self.assertLess(len(moves), len(self.rooms) / 2)
+
+    def test_removing_a_shard(self):
+        before = self.directory.get_pins()
+        moves = self.directory.set_shards({"a": "ws://a.test", "b": "ws://b.test"})
+        self.assertEqual(
+            set(moves), {room for room, shard in before.items() if shard == "c"}
+        )
+
+
+class RedisShardDirectoryTests(SimpleTestCase):
+    def test_pin_moves_only_once_handed_over(self):
+        server = fakeredis.FakeServer()
+        config = {"shards": {"a": "ws://a.test"}, "local": "a"}
+        old, new = (
+            with_fake_redis(sharding.RedisShardDirectory, server, **config)
+            for _ in range(2)
+        )
+        self.assertEqual(old.owner("R1"), "a")
+        moves = new.set_shards({"b": "ws://b.test"})
+        self.assertEqual(moves, {"R1": ("a", "b")})
+        self.assertEqual(new.resolve("R1"), ("a", "ws://a.test/ws/game/R1/"))
+        self.assertEqual(old.get_handovers()["R1"]["to"], "b")
+
+        old.complete_handover("R1", "b")
+        self.assertEqual(new.resolve("R1"), ("b", "ws://b.test/ws/game/R1/"))
+        self.assertEqual(new.get_handovers(), {})
+
+
+class DatabaseExecutorTests(SimpleTestCase):
+    """Ordre des tâches d'une même room et parallélisme entre rooms"""
+
+    def setUp(self):
+        self.executor = db_executor.DatabaseExecutor(max_workers=2)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    async def test_room_tasks_run_in_order(self):
+        done = []
+
+        def task(index):
+            time.sleep(0.01 * (5 - index))
+            done.append(index)
+
+        await asyncio.gather(*(self.executor.run("R1", task, i) for i in range(5)))
+        self.assertEqual(done, list(range(5)))
+
+    async def test_rooms_run_in_parallel(self):
+        release = threading.Event()
+
+        def slow():
+            return release.wait(timeout=2)
+
+        slow_task = asyncio.ensure_future(self.executor.run("R1", slow))
+        # La room R2 n'attend pas la requête lente de R1
+        self.assertEqual(await self.executor.run("R2", lambda: "R2"), "R2")
+        release.set()
+        self.assertTrue(await slow_task)
+
+        metrics = self.executor.metrics.snapshot()
+        self.assertEqual(metrics["completed"], 2)
+        self.assertEqual(metrics["queue_depth"], 0)
+
+
+class RedisPhaseSchedulerTests(SimpleTestCase):
+    """Échéances partagées dans Redis entre plusieurs workers"""
+
+    def setUp(self):
+        server = fakeredis.FakeServer()
+        self.workers = [
+            with_fake_redis(scheduler.RedisPhaseScheduler, server) for _ in range(2)
+        ]
+
+    async def schedule(self, room_code, fire_at):
+        timer = {"timer_id": scheduler.BasePhaseScheduler.new_timer_id()}
+        events = [(fire_at + i, "tick", i) for i in range(3)]
+        await self.workers[0].schedule(room_code, timer, events)
+        return timer["timer_id"]
+
+    async def test_each_event_is_claimed_once(self):
+        now = scheduler.now_ms()
+        for room in range(20):
+            await self.schedule(f"R{room}", now - 1000)
+
+        async def claim(worker):
+            claimed = []
+            while batch := await worker.claim_due(now, limit=7):
+                claimed += batch
+                await asyncio.sleep(0)
+            return claimed
+
+        claimed = sum(await asyncio.gather(*map(claim, self.workers)), [])
+        events = [(room_code, value) for room_code, _, _, value in claimed]
+        self.assertEqual(len(events), 60)
+        self.assertEqual(len(set(events)), 60)
+
+    async def test_reschedule_and_cancel_replace_deadlines(self):
+        now = scheduler.now_ms()
+        await self.schedule("R1", now - 1000)
+        timer_id = await self.schedule("R1", now - 500)
+        await self.schedule("R2", now - 1000)
+        await self.workers[1].cancel("R2")
+
+        claimed = await self.workers[1].claim_due(now)
+        self.assertEqual(
+            [(room_code, timer["timer_id"]) for room_code, timer, _, _ in claimed],
+            [("R1", timer_id)] * 3,
+        )
+        self.assertEqual(await self.workers[0].claim_due(now), [])
+        self.assertIsNone(await self.workers[0].get_timer("R2"))
+
+
+class HybridChannelLayerTests(SimpleTestCase):
+    """Membres locaux servis en mémoire, membres des autres processus par Redis"""
+
+    async def test_local_and_remote_members(self):
+        redis = fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer())
+        local, remote = HybridChannelLayer(), HybridChannelLayer()
+        for layer in (local, remote):
+            layer.connection = lambda index: redis
+        local_channel = await local.new_channel()
+        remote_channel = await remote.new_channel()
+        receives = [
+            asyncio.ensure_future(local.receive(local_channel)),
+            asyncio.ensure_future(remote.receive(remote_channel)),
+        ]
+        await asyncio.sleep(0)
+        await local.group_add("game_R1", local_channel)
+        await remote.group_add("game_R1", remote_channel)
+
+        await local.group_send("game_R1", {"type": "broadcast", "text": "x"})
+        for message in await asyncio.wait_for(asyncio.gather(*receives), 10):
+            self.assertEqual(message, {"type": "broadcast", "text": "x"})
+        # Rien n'a été écrit dans Redis pour le processus qui diffuse
+        self.assertFalse(
+            await redis.exists(local.prefix + local.non_local_name(local_channel))
+        )
+
+        # Envoi direct d'un autre processus : toujours par Redis
+        await remote.send(local_channel, {"type": "ping"})
+        self.assertEqual(
+            await asyncio.wait_for(local.receive(local_channel), 10),
+            {"type": "ping"},
+        )
+        await local.flush()
+        await remote.flush()
+
+    async def test_messages_from_one_process_stay_in_order(self):
+        redis = fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer())
+        local, remote = HybridChannelLayer(), HybridChannelLayer()
+        for layer in (local, remote):
+            layer.connection = lambda index: redis
+        channel = await local.new_channel()
+        await remote.send(channel, {"type": "ping"})
+        self.assertEqual(
+            await asyncio.wait_for(local.receive(channel), 10), {"type": "ping"}
+        )
+
+        # Entre deux receive() (message en cours de traitement par le consumer),
+        # les envois de ce processus passent toujours par la mémoire
+        await local.send(channel, {"type": "broadcast", "seq": 1})
+        await local.group_add("game_R1", channel)
+        # Inscription faite par un autre processus : même chemin pour le membre
+        await remote.group_add("game_R2", channel)
+        receiving = asyncio.ensure_future(local.receive(channel))
+        await asyncio.sleep(0)  # Le consumer attend de nouveau son channel
+        await local.group_send("game_R1", {"type": "broadcast", "seq": 2})
+        await local.group_send("game_R2", {"type": "broadcast", "seq": 3})
+        received = [await asyncio.wait_for(receiving, 10)]
+        for _ in range(2):
+            received.append(await asyncio.wait_for(local.receive(channel), 10))
+        self.assertEqual([message["seq"] for message in received], [1, 2, 3])
+        self.assertFalse(
+            await redis.exists(local.prefix + local.non_local_name(channel))
+        )
+        await local.flush()
+        await remote.flush()
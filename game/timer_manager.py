@@ -1,76 +1,170 @@
 import asyncio
+import logging
+import time
 from channels.layers import get_channel_layer
+from django.conf import settings
+
+from .broadcast import group_broadcast
+from .room_actor import RoomActor
+from .scheduler import get_scheduler, now_ms
+from .sharding import get_shard_directory
+
+logger = logging.getLogger(__name__)
+
+# "tick" : un timer_update par seconde ; "deadline" : un phase_started avec l'échéance,
+# puis des timer_update uniquement aux checkpoints (secondes restantes)
+TIMER_MODE = getattr(settings, "TIMER_MODE", "deadline")
+TIMER_CHECKPOINTS = getattr(settings, "TIMER_CHECKPOINTS", (10, 5))
 
 
 class RoomTimerManager:
+    """
+    Timers de phase d'une room.
+
+    Les échéances sont confiées au scheduler (Redis ou local) : n'importe quel
+    worker du processus peut réclamer un événement échu et le déclencher une
+    seule fois, sans dépendre du consumer qui a lancé le timer.
+    """
+
     _instances = {}
-    _active_consumers = {}  # Pour stocker le consumer actif par room
+    _worker_task = None
+    _end_tasks = set()  # Fins de phase en cours (référence gardée jusqu'à la fin)
 
     @classmethod
     def get_instance(cls, room_code):
         if room_code not in cls._instances:
             cls._instances[room_code] = cls(room_code)
+        cls.ensure_worker()
         return cls._instances[room_code]
 
+    @classmethod
+    def discard(cls, room_code):
+        cls._instances.pop(room_code, None)
+
     def __init__(self, room_code):
         self.room_code = room_code
         self.room_group_name = f"game_{room_code}"
-        self.timer_task = None
-        self.current_timer_id = 0
 
-    def set_active_consumer(self, consumer):
-        """Définit le consumer actif pour cette room"""
-        self._active_consumers[self.room_code] = consumer
+    async def get_timer_state(self):
+        """Retourne l'échéance de la phase en cours (pour une resynchronisation), ou None"""
+        timer = await get_scheduler().get_timer(self.room_code)
+        now = now_ms()
+        if not timer or timer["deadline"] <= now:
+            return None
+        return {
+            "timeLeft": max(0, round((timer["deadline"] - now) / 1000)),
+            "deadline": timer["deadline"],
+            "serverTime": now,
+            "phase": timer["phase"],
+            "currentPlayer": timer["currentPlayer"],
+        }
 
     async def switch_timer(self, duration, phase, current_player):
-        self.current_timer_id += 1
-        current_id = self.current_timer_id
-
-        if self.timer_task and not self.timer_task.done():
-            self.timer_task.cancel()
-            try:
-                await self.timer_task
-            except asyncio.CancelledError:
-                pass
+        scheduler = get_scheduler()
+        start = now_ms()
+        deadline = start + duration * 1000
+        timer = {
+            "timer_id": scheduler.new_timer_id(),
+            "phase": phase,
+            "currentPlayer": current_player,
+            "deadline": deadline,
+        }
 
-        self.timer_task = asyncio.create_task(
-            self.run_timer(duration, phase, current_player, current_id)
-        )
+        if TIMER_MODE == "tick":
+            # Un timer_update par seconde (décompte historique)
+            events = [
+                (start + (duration - t + 1) * 1000, "tick", t)
+                for t in range(duration, 0, -1)
+            ]
+        else:
+            events = [
+                (deadline - t * 1000, "tick", t)
+                for t in TIMER_CHECKPOINTS
+                if t < duration
+            ]
+        events.append((deadline, "end", 0))
+        await scheduler.schedule(self.room_code, timer, events)
 
-    async def run_timer(self, duration, phase, current_player, timer_id):
-        channel_layer = get_channel_layer()
-        try:
-            for t in range(duration, 0, -1):
-                if timer_id != self.current_timer_id:
-                    return
-
-                await asyncio.sleep(1)
-                await channel_layer.group_send(
-                    self.room_group_name,
-                    {
-                        "type": "timer_update",
-                        "timeLeft": t,
-                        "phase": phase,
-                        "currentPlayer": current_player,
-                    },
-                )
-
-            # Timer terminé - appeler directement la méthode du consumer actif
-            active_consumer = self._active_consumers.get(self.room_code)
-            if active_consumer:
-                await active_consumer.timer_end(
-                    {"phase": phase, "currentPlayer": current_player}
-                )
-        except asyncio.CancelledError:
-            print(f"Timer {timer_id} cancelled")
-            return
+        if TIMER_MODE != "tick":
+            # Une seule annonce de l'échéance ; les clients décomptent localement
+            await group_broadcast(
+                get_channel_layer(),
+                self.room_group_name,
+                {
+                    "type": "phase_started",
+                    "duration": duration,
+                    "deadline": deadline,
+                    "serverTime": now_ms(),
+                    "phase": phase,
+                    "currentPlayer": current_player,
+                },
+            )
 
     async def cancel_timer(self):
         """Annule le timer en cours s'il existe"""
-        if self.timer_task and not self.timer_task.done():
-            self.timer_task.cancel()
+        await get_scheduler().cancel(self.room_code)
+
+    # --- Déclenchement des échéances (une tâche par processus) ---
+    @classmethod
+    def ensure_worker(cls):
+        if cls._worker_task is None or cls._worker_task.done():
+            cls._worker_task = asyncio.get_running_loop().create_task(cls._run_worker())
+
+    @classmethod
+    async def _run_worker(cls):
+        scheduler = get_scheduler()
+        interval = scheduler.poll_interval
+        # Avec plusieurs workers, seuls les timers des rooms de ce shard sont réclamés
+        directory = get_shard_directory()
+        shard = directory.local if directory.sharded else None
+        while True:
+            # Réveil aligné sur les ticks, quel que soit le nombre de rooms
+            await asyncio.sleep(interval - (time.time() % interval))
             try:
-                await self.timer_task
-            except asyncio.CancelledError:
-                pass
-            self.timer_task = None
+                # Traite par lots tout ce qui est échu avant de se rendormir
+                while due := await scheduler.claim_due(now_ms(), shard=shard):
+                    await asyncio.gather(*(cls._fire(*event) for event in due))
+            except Exception:
+                logger.exception("Impossible de réclamer les échéances de timer")
+
+    @classmethod
+    async def _fire(cls, room_code, timer, kind, value):
+        if kind != "tick":
+            # La fin de phase attend l'acteur de la room (et ses écritures) : tâche
+            # détachée, les échéances des autres rooms ne l'attendent pas
+            task = asyncio.get_running_loop().create_task(cls._end(room_code, timer))
+            cls._end_tasks.add(task)
+            task.add_done_callback(cls._end_tasks.discard)
+            return
+        try:
+            await group_broadcast(
+                get_channel_layer(),
+                f"game_{room_code}",
+                {
+                    "type": "timer_update",
+                    "timeLeft": value,
+                    "phase": timer["phase"],
+                    "currentPlayer": timer["currentPlayer"],
+                },
+            )
+        except Exception:
+            logger.exception(
+                "Erreur au déclenchement du timer de la room %s", room_code
+            )
+
+    @staticmethod
+    async def _end(room_code, timer):
+        from .game_manager import GameManager
+
+        try:
+            await get_scheduler().finish(room_code, timer["timer_id"])
+            await RoomActor.get_instance(room_code).submit(
+                GameManager(room_code).timer_end,
+                {
+                    "timer_id": timer["timer_id"],
+                    "phase": timer["phase"],
+                    "currentPlayer": timer["currentPlayer"],
+                },
+            )
+        except Exception:
+            logger.exception("Erreur à la fin du timer de la room %s", room_code)
@@ -0,0 +1,84 @@
+class TimingWheel:
+    """
+    Roue temporelle hiérarchique (à la Linux) pour les échéances d'un processus.
+
+    Le temps est découpé en ticks de `tick_ms` ; chaque niveau compte `slots`
+    cases et couvre `slots` fois la durée du niveau inférieur. Une échéance est
+    rangée au niveau le plus bas qui la couvre, puis redescend d'un niveau
+    (« cascade ») quand son tour approche. Ajouter, remplacer ou retirer une
+    échéance est en O(1) ; `advance` retourne d'un coup toutes les clés échues.
+    """
+
+    def __init__(self, tick_ms=100, slots=64, levels=4, start_ms=0):
+        self.tick_ms = tick_ms
+        self.slots = slots
+        self.levels = levels
+        self.wheels = [[{} for _ in range(slots)] for _ in range(levels)]
+        self.positions = {}  # {clé: (niveau, case)}
+        self.current_tick = start_ms // tick_ms
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __contains__(self, key):
+        return key in self.positions
+
+    def add(self, key, fire_at):
+        """Programme (ou reprogramme) la clé pour l'instant fire_at (ms)"""
+        self.remove(key)
+        # Une échéance déjà passée est déclenchée au prochain tick
+        self._place(key, max(fire_at // self.tick_ms, self.current_tick + 1))
+
+    def remove(self, key):
+        position = self.positions.pop(key, None)
+        if position:
+            level, slot = position
+            del self.wheels[level][slot][key]
+
+    def _place(self, key, tick):
+        delta = tick - self.current_tick
+        level = 0
+        span = self.slots
+        while delta >= span and level < self.levels - 1:
+            level += 1
+            span *= self.slots
+        slot = (tick // self.slots**level) % self.slots
+        self.wheels[level][slot][key] = tick
+        self.positions[key] = (level, slot)
+
+    def _cascade(self, level):
+        """Redistribue vers les niveaux inférieurs la case courante de `level`"""
+        slot = (self.current_tick // self.slots**level) % self.slots
+        entries = self.wheels[level][slot]
+        self.wheels[level][slot] = {}
+        for key, tick in entries.items():
+            del self.positions[key]
+            self._place(key, tick)
+
+    def advance(self, now_ms):
+        """Avance jusqu'à now_ms et retourne les clés échues, dans l'ordre d'échéance"""
+        target = now_ms // self.tick_ms
+        if not self.positions:
+            self.current_tick = max(self.current_tick, target)
+            return []
+
+        due = []
+        while self.current_tick < target:
+            self.current_tick += 1
+            level = 1
+            while level < self.levels and not self.current_tick % self.slots**level:
+                level += 1
+            # Les niveaux hauts d'abord : leurs clés peuvent redescendre de plusieurs niveaux
+            for cascading in range(level - 1, 0, -1):
+                self._cascade(cascading)
+
+            slot = self.current_tick % self.slots
+            bucket = self.wheels[0][slot]
+            if bucket:
+                self.wheels[0][slot] = {}
+                for key in bucket:
+                    del self.positions[key]
+                due.extend(bucket)
+            if not self.positions:
+                self.current_tick = target
+        return due
@@ -1,16 +1,13 @@
 import uuid
-import random
-import string
 
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 
 from .models import GameRoom, Player
-
-
-def generate_room_code(length=6):
-    return "".join(random.choices(string.ascii_uppercase + string.digits, k=length))
+from .room_codes import create_room
+from .roster import get_roster, roster_entry
+from .sharding import get_shard_directory
 
 
 class CreateRoomView(APIView):
@@ -21,18 +18,15 @@ class CreateRoomView(APIView):
                 {"error": "Pseudo is required"}, status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Générer un code unique
-        code = generate_room_code()
-        while GameRoom.objects.filter(code=code).exists():
-            code = generate_room_code()
-
-        room = GameRoom.objects.create(code=code)
+        # Code unique alloué sans vérification préalable en base
+        room = create_room()
         player = Player.objects.create(
             room=room,
             pseudo=pseudo,
             session_id=uuid.uuid4(),
             is_owner=True,
         )
+        get_roster().add(room.code, roster_entry(player))
 
         return Response(
             {
@@ -40,6 +34,8 @@ class CreateRoomView(APIView):
                 "session_id": str(player.session_id),
                 "player_id": player.id,
                 "pseudo": player.pseudo,
+                # Websocket du worker qui détient la room (None sans sharding)
+                "ws_url": get_shard_directory().endpoint(room.code),
             },
             status=status.HTTP_201_CREATED,
         )
@@ -75,6 +71,8 @@ class JoinRoomView(APIView):
             session_id=uuid.uuid4(),
             is_owner=False,
         )
+        # Les consumers de la room découvrent le joueur sans requête SQL
+        get_roster().add(room.code, roster_entry(player))
 
         return Response(
             {
@@ -82,6 +80,7 @@ class JoinRoomView(APIView):
                 "session_id": str(player.session_id),
                 "player_id": player.id,
                 "pseudo": player.pseudo,
+                "ws_url": get_shard_directory().endpoint(room.code),
             },
             status=status.HTTP_201_CREATED,
         )
@@ -0,0 +1,92 @@
+import random
+from dataclasses import dataclass
+
+from .word_list import CATEGORIES
+
+
+@dataclass(frozen=True)
+class Word:
+    """Entrée du catalogue : le mot et ses métadonnées"""
+
+    id: int
+    text: str
+    categories: tuple
+    length: int
+
+
+class WordCatalogue:
+    """
+    Catalogue indexé des mots, construit une seule fois au chargement du module :
+    chaque mot distinct reçoit un identifiant et l'ensemble de ses catégories.
+    """
+
+    def __init__(self, categories):
+        categories_by_word = {}
+        for category, words in categories.items():
+            for text in words:
+                categories_by_word.setdefault(text, []).append(category)
+
+        self.words = tuple(
+            Word(
+                id=index,
+                text=text,
+                categories=tuple(dict.fromkeys(word_categories)),
+                length=len(text),
+            )
+            for index, (text, word_categories) in enumerate(categories_by_word.items())
+        )
+        self.by_text = {word.text: word for word in self.words}
+        self.by_category = {
+            category: tuple(
+                word.id for word in self.words if category in word.categories
+            )
+            for category in categories
+        }
+
+    def __len__(self):
+        return len(self.words)
+
+    def __getitem__(self, word_id):
+        return self.words[word_id]
+
+    def ids(self, categories=None):
+        """Identifiants des mots, éventuellement restreints à certaines catégories"""
+        if not categories:
+            return range(len(self.words))
+        return sorted(
+            {i for category in categories for i in self.by_category[category]}
+        )
+
+
+CATALOGUE = WordCatalogue(CATEGORIES)
+
+
+class WordDeck:
+    """
+    Paquet mélangé propre à une room : chaque tirage est un pop() en O(1) et
+    aucun mot ne revient avant que le paquet soit épuisé, puis remélangé.
+    """
+
+    def __init__(self, catalogue=CATALOGUE, categories=None):
+        self.catalogue = catalogue
+        self.word_ids = list(catalogue.ids(categories))
+        self.remaining = []
+
+    def __len__(self):
+        return len(self.remaining)
+
+    def _reshuffle(self, exclude):
+        self.remaining = [i for i in self.word_ids if i not in exclude]
+        random.shuffle(self.remaining)
+
+    def draw(self, count=1):
+        """Tire `count` mots distincts (objets Word)"""
+        drawn = []
+        while len(drawn) < count:
+            if not self.remaining:
+                # Paquet épuisé : les mots de ce tirage ne reviennent pas aussitôt
+                self._reshuffle({word.id for word in drawn})
+                if not self.remaining:
+                    raise ValueError("Pas assez de mots dans le paquet")
+            drawn.append(self.catalogue[self.remaining.pop()])
+        return drawn
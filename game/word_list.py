@@ -1,549 +1,572 @@
-WORDS = [
-    # Objets quotidiens
-    "table",
-    "chaise",
-    "lit",
-    "lampe",
-    "miroir",
-    "horloge",
-    "téléphone",
-    "livre",
-    "crayon",
-    "stylo",
-    "cahier",
-    "bureau",
-    "armoire",
-    "canapé",
-    "coussin",
-    "tapis",
-    "brosse",
-    "couteau",
-    "fourchette",
-    "cuillère",
-    "assiette",
-    "verre",
-    "tasse",
-    "serviette",
-    "savon",
-    "peigne",
-    "télévision",
-    "radio",
-    "ordinateur",
-    "clavier",
-    "souris",
-    "écran",
-    "télécommande",
-    "aspirateur",
-    "balai",
-    "parapluie",
-    "sac",
-    "portefeuille",
-    "lunettes",
-    "montre",
-    "réveil",
-    "journal",
-    "magazine",
-    "album",
-    "bouteille",
-    "casserole",
-    "poêle",
-    "four",
-    "micro-ondes",
-    "réfrigérateur",
-    "valise",
-    "cartable",
-    "agenda",
-    "calendrier",
-    "pendule",
-    "réveil",
-    "carnet",
-    "enveloppe",
-    "timbre",
-    "ciseaux",
-    "règle",
-    "gomme",
-    "pinceau",
-    "craie",
-    "tableau",
-    "cadre",
-    "poster",
-    "rideau",
-    "store",
-    "clé",
-    "serrure",
-    "cadenas",
-    "tiroir",
-    "étagère",
-    "placard",
-    "tabouret",
-    "fauteuil",
-    "pouf",
-    "matelas",
-    "oreiller",
-    "couverture",
-    "drap",
-    "paillasson",
-    "sonnette",
-    "ampoule",
-    "ventilateur",
-    "radiateur",
-    "thermostat",
-    "prise",
-    "interrupteur",
-    "fil",
-    "chargeur",
-    "batterie",
-    "téléphone",
-    "tablette",
-    "enceinte",
-    "casque",
-    "appareil",
-    "briquet",
-    "allumette",
-    "bougie",
-    "torche",
-    "pile",
-    # Nature et environnement
-    "arbre",
-    "fleur",
-    "feuille",
-    "herbe",
-    "forêt",
-    "montagne",
-    "rivière",
-    "lac",
-    "mer",
-    "plage",
-    "soleil",
-    "lune",
-    "étoile",
-    "nuage",
-    "pluie",
-    "neige",
-    "vent",
-    "pierre",
-    "sable",
-    "terre",
-    "jardin",
-    "parc",
-    "plante",
-    "fruit",
-    "légume",
-    "branche",
-    "tronc",
-    "racine",
-    "prairie",
-    "colline",
-    "volcan",
-    "désert",
-    "île",
-    "océan",
-    "cascade",
-    "grotte",
-    "rocher",
-    "falaise",
-    "vallée",
-    "source",
-    "étang",
-    "ruisseau",
-    "graine",
-    "buisson",
-    "champignon",
-    "mousse",
-    "roseau",
-    "bambou",
-    # Alimentation
-    "pain",
-    "fromage",
-    "lait",
-    "œuf",
-    "sucre",
-    "sel",
-    "farine",
-    "riz",
-    "pâtes",
-    "pomme",
-    "banane",
-    "orange",
-    "citron",
-    "fraise",
-    "raisin",
-    "poire",
-    "cerise",
-    "carotte",
-    "poireau",
-    "oignon",
-    "tomate",
-    "salade",
-    "pomme de terre",
-    "haricot",
-    "chocolat",
-    "gâteau",
-    "bonbon",
-    "miel",
-    "confiture",
-    "beurre",
-    "huile",
-    "eau",
-    "jus",
-    "soupe",
-    "viande",
-    "poulet",
-    "poisson",
-    "jambon",
-    "saucisse",
-    "yaourt",
-    # Pièces et bâtiments
-    "cuisine",
-    "salon",
-    "chambre",
-    "salle de bain",
-    "toilette",
-    "garage",
-    "cave",
-    "grenier",
-    "escalier",
-    "couloir",
-    "porte",
-    "fenêtre",
-    "mur",
-    "plafond",
-    "sol",
-    "toit",
-    "cheminée",
-    "balcon",
-    "terrasse",
-    "jardin",
-    "immeuble",
-    "maison",
-    "école",
-    "magasin",
-    "restaurant",
-    "cinéma",
-    "hôpital",
-    "gare",
-    "aéroport",
-    # Vêtements et accessoires
-    "pantalon",
-    "chemise",
-    "tshirt",
-    "robe",
-    "jupe",
-    "manteau",
-    "veste",
-    "pull",
-    "sweat",
-    "short",
-    "chaussette",
-    "collant",
-    "culotte",
-    "slip",
-    "caleçon",
-    "pyjama",
-    "chaussure",
-    "basket",
-    "botte",
-    "sandale",
-    "chapeau",
-    "casquette",
-    "bonnet",
-    "gant",
-    "écharpe",
-    "ceinture",
-    "cravate",
-    "noeud",
-    "bracelet",
-    "montre",
-    "collier",
-    "bague",
-    "boucle",
-    "bandeau",
-    "lunette",
-    "mouchoir",
-    "sac",
-    "cartable",
-    "valise",
-    "portefeuille",
-    "parapluie",
-    "bijou",
-    # Cuisine et ustensiles
-    "marmite",
-    "cocotte",
-    "passoire",
-    "râpe",
-    "planche",
-    "fouet",
-    "spatule",
-    "louche",
-    "écumoire",
-    "presse",
-    "moulin",
-    "ouvre",
-    "tire",
-    "plateau",
-    "thermos",
-    "cafetière",
-    "théière",
-    "bouilloire",
-    "grille",
-    "moule",
-    "balance",
-    "minuteur",
-    "torchon",
-    "éponge",
-    "bassine",
-    "seau",
-    "poubelle",
-    "robot",
-    "mixeur",
-    "batteur",
-    "frigo",
-    "congélateur",
-    "lave",
-    "plat",
-    "saladier",
-    "bol",
-    "ramequin",
-    "pichet",
-    "carafe",
-    "bocal",
-    "boîte",
-    # Sport et loisirs
-    "ballon",
-    "balle",
-    "raquette",
-    "filet",
-    "panier",
-    "but",
-    "cible",
-    "carte",
-    "dé",
-    "pion",
-    "puzzle",
-    "jouet",
-    "peluche",
-    "poupée",
-    "voiture",
-    "train",
-    "avion",
-    "bateau",
-    "vélo",
-    "trottinette",
-    "skate",
-    "roller",
-    "patin",
-    "ski",
-    "luge",
-    "frisbee",
-    "cerf",
-    "corde",
-    "balançoire",
-    "toboggan",
-    # Animaux domestiques
-    "chien",
-    "chat",
-    "poisson",
-    "hamster",
-    "lapin",
-    "perroquet",
-    "tortue",
-    "cochon",
-    "souris",
-    "canari",
-    "poule",
-    "coq",
-    "poussin",
-    "cheval",
-    "poney",
-    "cochon",
-    "vache",
-    "mouton",
-    "chèvre",
-    "âne",
-    # Instruments de musique
-    "piano",
-    "guitare",
-    "violon",
-    "flûte",
-    "tambour",
-    "trompette",
-    "harmonica",
-    "batterie",
-    "clavier",
-    "saxophone",
-    "accordéon",
-    "harpe",
-    "triangle",
-    "maracas",
-    "xylophone",
-    "hautbois",
-    "clarinette",
-    "micro",
-    # Métiers et outils
-    "marteau",
-    "tournevis",
-    "pince",
-    "clou",
-    "vis",
-    "scie",
-    "perceuse",
-    "lime",
-    "pelle",
-    "rateau",
-    "brouette",
-    "tondeuse",
-    "échelle",
-    "escabeau",
-    "pinceau",
-    "rouleau",
-    "mètre",
-    "niveau",
-    "compas",
-    "équerre",
-    # Transport
-    "voiture",
-    "bus",
-    "train",
-    "métro",
-    "tram",
-    "taxi",
-    "camion",
-    "moto",
-    "scooter",
-    "vélo",
-    "tracteur",
-    "ambulance",
-    "pompier",
-    "police",
-    "bateau",
-    "avion",
-    "hélicoptère",
-    "fusée",
-    "navette",
-    "soucoupe",
-    # École et bureau
-    "crayon",
-    "stylo",
-    "feutre",
-    "marker",
-    "cahier",
-    "classeur",
-    "dossier",
-    "trousse",
-    "cartable",
-    "ardoise",
-    "calculette",
-    "compas",
-    "taille",
-    "agrafeuse",
-    "scotch",
-    "colle",
-    "peinture",
-    "pinceau",
-    "craie",
-    "feuille",
-    # Santé et hygiène
-    "brosse",
-    "peigne",
-    "savon",
-    "shampooing",
-    "dentifrice",
-    "mouchoir",
-    "coton",
-    "pansement",
-    "bandage",
-    "thermomètre",
-    "médicament",
-    "pilule",
-    "crème",
-    "gel",
-    "parfum",
-    "serviette",
-    "gant",
-    "miroir",
-    "rasoir",
-    "lime",  # Lieux et bâtiments publics
-    "mairie",
-    "église",
-    "cathédrale",
-    "musée",
-    "bibliothèque",
-    "piscine",
-    "stade",
-    "gymnase",
-    "poste",
-    "banque",
-    "commissariat",
-    "caserne",
-    "prison",
-    "théâtre",
-    "zoo",
-    "parc",
-    "square",
-    "château",
-    "palais",
-    "temple",
-    # Événements et phénomènes
-    "incendie",
-    "orage",
-    "tempête",
-    "avalanche",
-    "tremblement",
-    "tsunami",
-    "foudre",
-    "tornade",
-    "brouillard",
-    "arc-en-ciel",
-    "éclipse",
-    "aurore",
-    "festival",
-    "carnaval",
-    "concert",
-    "foire",
-    "cirque",
-    "mariage",
-    "anniversaire",
-    "parade",
-    # Métiers
-    "boulanger",
-    "boucher",
-    "facteur",
-    "policier",
-    "pompier",
-    "médecin",
-    "infirmier",
-    "dentiste",
-    "professeur",
-    "jardinier",
-    "cuisinier",
-    "serveur",
-    "chauffeur",
-    "pilote",
-    "vendeur",
-    "coiffeur",
-    "peintre",
-    "musicien",
-    "architecte",
-    "plombier",
-    # Infrastructure et urbanisme
-    "route",
-    "pont",
-    "tunnel",
-    "parking",
-    "trottoir",
-    "passage",
-    "fontaine",
-    "statue",
-    "monument",
-    "panneau",
-    "feu",
-    "lampadaire",
-    "antenne",
-    "pylône",
-    "barrage",
-    "canal",
-    "port",
-    "quai",
-    "piste",
-    "station",
-]
+# Catalogue des mots à faire deviner, par catégorie.
+# Un mot peut figurer dans plusieurs catégories.
+CATEGORIES = {
+    "Objets quotidiens": [
+        "table",
+        "chaise",
+        "lit",
+        "lampe",
+        "miroir",
+        "horloge",
+        "téléphone",
+        "livre",
+        "crayon",
+        "stylo",
+        "cahier",
+        "bureau",
+        "armoire",
+        "canapé",
+        "coussin",
+        "tapis",
+        "brosse",
+        "couteau",
+        "fourchette",
+        "cuillère",
+        "assiette",
+        "verre",
+        "tasse",
+        "serviette",
+        "savon",
+        "peigne",
+        "télévision",
+        "radio",
+        "ordinateur",
+        "clavier",
+        "souris",
+        "écran",
+        "télécommande",
+        "aspirateur",
+        "balai",
+        "parapluie",
+        "sac",
+        "portefeuille",
+        "lunettes",
+        "montre",
+        "réveil",
+        "journal",
+        "magazine",
+        "album",
+        "bouteille",
+        "casserole",
+        "poêle",
+        "four",
+        "micro-ondes",
+        "réfrigérateur",
+        "valise",
+        "cartable",
+        "agenda",
+        "calendrier",
+        "pendule",
+        "réveil",
+        "carnet",
+        "enveloppe",
+        "timbre",
+        "ciseaux",
+        "règle",
+        "gomme",
+        "pinceau",
+        "craie",
+        "tableau",
+        "cadre",
+        "poster",
+        "rideau",
+        "store",
+        "clé",
+        "serrure",
+        "cadenas",
+        "tiroir",
+        "étagère",
+        "placard",
+        "tabouret",
+        "fauteuil",
+        "pouf",
+        "matelas",
+        "oreiller",
+        "couverture",
+        "drap",
+        "paillasson",
+        "sonnette",
+        "ampoule",
+        "ventilateur",
+        "radiateur",
+        "thermostat",
+        "prise",
+        "interrupteur",
+        "fil",
+        "chargeur",
+        "batterie",
+        "téléphone",
+        "tablette",
+        "enceinte",
+        "casque",
+        "appareil",
+        "briquet",
+        "allumette",
+        "bougie",
+        "torche",
+        "pile",
+    ],
+    "Nature et environnement": [
+        "arbre",
+        "fleur",
+        "feuille",
+        "herbe",
+        "forêt",
+        "montagne",
+        "rivière",
+        "lac",
+        "mer",
+        "plage",
+        "soleil",
+        "lune",
+        "étoile",
+        "nuage",
+        "pluie",
+        "neige",
+        "vent",
+        "pierre",
+        "sable",
+        "terre",
+        "jardin",
+        "parc",
+        "plante",
+        "fruit",
+        "légume",
+        "branche",
+        "tronc",
+        "racine",
+        "prairie",
+        "colline",
+        "volcan",
+        "désert",
+        "île",
+        "océan",
+        "cascade",
+        "grotte",
+        "rocher",
+        "falaise",
+        "vallée",
+        "source",
+        "étang",
+        "ruisseau",
+        "graine",
+        "buisson",
+        "champignon",
+        "mousse",
+        "roseau",
+        "bambou",
+    ],
+    "Alimentation": [
+        "pain",
+        "fromage",
+        "lait",
+        "œuf",
+        "sucre",
+        "sel",
+        "farine",
+        "riz",
+        "pâtes",
+        "pomme",
+        "banane",
+        "orange",
+        "citron",
+        "fraise",
+        "raisin",
+        "poire",
+        "cerise",
+        "carotte",
+        "poireau",
+        "oignon",
+        "tomate",
+        "salade",
+        "pomme de terre",
+        "haricot",
+        "chocolat",
+        "gâteau",
+        "bonbon",
+        "miel",
+        "confiture",
+        "beurre",
+        "huile",
+        "eau",
+        "jus",
+        "soupe",
+        "viande",
+        "poulet",
+        "poisson",
+        "jambon",
+        "saucisse",
+        "yaourt",
+    ],
+    "Pièces et bâtiments": [
+        "cuisine",
+        "salon",
+        "chambre",
+        "salle de bain",
+        "toilette",
+        "garage",
+        "cave",
+        "grenier",
+        "escalier",
+        "couloir",
+        "porte",
+        "fenêtre",
+        "mur",
+        "plafond",
+        "sol",
+        "toit",
+        "cheminée",
+        "balcon",
+        "terrasse",
+        "jardin",
+        "immeuble",
+        "maison",
+        "école",
+        "magasin",
+        "restaurant",
+        "cinéma",
+        "hôpital",
+        "gare",
+        "aéroport",
+    ],
+    "Vêtements et accessoires": [
+        "pantalon",
+        "chemise",
+        "tshirt",
+        "robe",
+        "jupe",
+        "manteau",
+        "veste",
+        "pull",
+        "sweat",
+        "short",
+        "chaussette",
+        "collant",
+        "culotte",
+        "slip",
+        "caleçon",
+        "pyjama",
+        "chaussure",
+        "basket",
+        "botte",
+        "sandale",
+        "chapeau",
+        "casquette",
+        "bonnet",
+        "gant",
+        "écharpe",
+        "ceinture",
+        "cravate",
+        "noeud",
+        "bracelet",
+        "montre",
+        "collier",
+        "bague",
+        "boucle",
+        "bandeau",
+        "lunette",
+        "mouchoir",
+        "sac",
+        "cartable",
+        "valise",
+        "portefeuille",
+        "parapluie",
+        "bijou",
+    ],
+    "Cuisine et ustensiles": [
+        "marmite",
+        "cocotte",
+        "passoire",
+        "râpe",
+        "planche",
+        "fouet",
+        "spatule",
+        "louche",
+        "écumoire",
+        "presse",
+        "moulin",
+        "ouvre",
+        "tire",
+        "plateau",
+        "thermos",
+        "cafetière",
+        "théière",
+        "bouilloire",
+        "grille",
+        "moule",
+        "balance",
+        "minuteur",
+        "torchon",
+        "éponge",
+        "bassine",
+        "seau",
+        "poubelle",
+        "robot",
+        "mixeur",
+        "batteur",
+        "frigo",
+        "congélateur",
+        "lave",
+        "plat",
+        "saladier",
+        "bol",
+        "ramequin",
+        "pichet",
+        "carafe",
+        "bocal",
+        "boîte",
+    ],
+    "Sport et loisirs": [
+        "ballon",
+        "balle",
+        "raquette",
+        "filet",
+        "panier",
+        "but",
+        "cible",
+        "carte",
+        "dé",
+        "pion",
+        "puzzle",
+        "jouet",
+        "peluche",
+        "poupée",
+        "voiture",
+        "train",
+        "avion",
+        "bateau",
+        "vélo",
+        "trottinette",
+        "skate",
+        "roller",
+        "patin",
+        "ski",
+        "luge",
+        "frisbee",
+        "cerf",
+        "corde",
+        "balançoire",
+        "toboggan",
+    ],
+    "Animaux domestiques": [
+        "chien",
+        "chat",
+        "poisson",
+        "hamster",
+        "lapin",
+        "perroquet",
+        "tortue",
+        "cochon",
+        "souris",
+        "canari",
+        "poule",
+        "coq",
+        "poussin",
+        "cheval",
+        "poney",
+        "cochon",
+        "vache",
+        "mouton",
+        "chèvre",
+        "âne",
+    ],
+    "Instruments de musique": [
+        "piano",
+        "guitare",
+        "violon",
+        "flûte",
+        "tambour",
+        "trompette",
+        "harmonica",
+        "batterie",
+        "clavier",
+        "saxophone",
+        "accordéon",
+        "harpe",
+        "triangle",
+        "maracas",
+        "xylophone",
+        "hautbois",
+        "clarinette",
+        "micro",
+    ],
+    "Métiers et outils": [
+        "marteau",
+        "tournevis",
+        "pince",
+        "clou",
+        "vis",
+        "scie",
+        "perceuse",
+        "lime",
+        "pelle",
+        "rateau",
+        "brouette",
+        "tondeuse",
+        "échelle",
+        "escabeau",
+        "pinceau",
+        "rouleau",
+        "mètre",
+        "niveau",
+        "compas",
+        "équerre",
+    ],
+    "Transport": [
+        "voiture",
+        "bus",
+        "train",
+        "métro",
+        "tram",
+        "taxi",
+        "camion",
+        "moto",
+        "scooter",
+        "vélo",
+        "tracteur",
+        "ambulance",
+        "pompier",
+        "police",
+        "bateau",
+        "avion",
+        "hélicoptère",
+        "fusée",
+        "navette",
+        "soucoupe",
+    ],
+    "École et bureau": [
+        "crayon",
+        "stylo",
+        "feutre",
+        "marker",
+        "cahier",
+        "classeur",
+        "dossier",
+        "trousse",
+        "cartable",
+        "ardoise",
+        "calculette",
+        "compas",
+        "taille",
+        "agrafeuse",
+        "scotch",
+        "colle",
+        "peinture",
+        "pinceau",
+        "craie",
+        "feuille",
+    ],
+    "Santé et hygiène": [
+        "brosse",
+        "peigne",
+        "savon",
+        "shampooing",
+        "dentifrice",
+        "mouchoir",
+        "coton",
+        "pansement",
+        "bandage",
+        "thermomètre",
+        "médicament",
+        "pilule",
+        "crème",
+        "gel",
+        "parfum",
+        "serviette",
+        "gant",
+        "miroir",
+        "rasoir",
+        "lime",
+    ],
+    "Lieux et bâtiments publics": [
+        "mairie",
+        "église",
+        "cathédrale",
+        "musée",
+        "bibliothèque",
+        "piscine",
+        "stade",
+        "gymnase",
+        "poste",
+        "banque",
+        "commissariat",
+        "caserne",
+        "prison",
+        "théâtre",
+        "zoo",
+        "parc",
+        "square",
+        "château",
+        "palais",
+        "temple",
+    ],
+    "Événements et phénomènes": [
+        "incendie",
+        "orage",
+        "tempête",
+        "avalanche",
+        "tremblement",
+        "tsunami",
+        "foudre",
+        "tornade",
+        "brouillard",
+        "arc-en-ciel",
+        "éclipse",
+        "aurore",
+        "festival",
+        "carnaval",
+        "concert",
+        "foire",
+        "cirque",
+        "mariage",
+        "anniversaire",
+        "parade",
+    ],
+    "Métiers": [
+        "boulanger",
+        "boucher",
+        "facteur",
+        "policier",
+        "pompier",
+        "médecin",
+        "infirmier",
+        "dentiste",
+        "professeur",
+        "jardinier",
+        "cuisinier",
+        "serveur",
+        "chauffeur",
+        "pilote",
+        "vendeur",
+        "coiffeur",
+        "peintre",
+        "musicien",
+        "architecte",
+        "plombier",
+    ],
+    "Infrastructure et urbanisme": [
+        "route",
+        "pont",
+        "tunnel",
+        "parking",
+        "trottoir",
+        "passage",
+        "fontaine",
+        "statue",
+        "monument",
+        "panneau",
+        "feu",
+        "lampadaire",
+        "antenne",
+        "pylône",
+        "barrage",
+        "canal",
+        "port",
+        "quai",
+        "piste",
+        "station",
+    ],
+}
+
+# Liste à plat, sans doublon, dans l'ordre du catalogue
+WORDS = list(dict.fromkeys(word for words in CATEGORIES.values() for word in words))